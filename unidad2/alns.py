@@ -0,0 +1,370 @@
+import random
+import math
+import time
+import numpy as np
+from model import Solucion
+from metaheuristica import generar_solucion_inicial
+from busqueda_local import BusquedaLocal
+from restricciones import crear_restricciones
+from observadores import Notificador
+from vecindario import K_VECINOS
+
+# operadores de destrucción (quitan tiendas) y de reparación (las reinsertan)
+DESTRUCCIONES = ('aleatoria', 'peor_costo', 'relacionada', 'ruta')
+REPARACIONES = ('codiciosa', 'arrepentimiento')
+
+# tiendas quitadas por iteración: entre estas fracciones del total, con mínimo y máximo absolutos
+FRACCION_DESTRUCCION = (0.02, 0.08)
+MIN_DESTRUCCION = 4
+MAX_DESTRUCCION = 60
+
+# inserción por arrepentimiento-k: suma de las diferencias entre la mejor ruta y las k - 1 siguientes
+K_ARREPENTIMIENTO = 3
+
+# aleatoriedad de las destrucciones por peor costo y relacionada: de la lista ordenada se
+# toma el elemento floor(y^p * n) con y uniforme (p alto = más determinista)
+ALEATORIEDAD_PEOR = 3
+ALEATORIEDAD_RELACIONADA = 6
+
+# pesos adaptativos (Ropke y Pisinger): puntaje por nuevo mejor, por mejorar la actual y
+# por aceptar una peor; cada SEGMENTO iteraciones el peso se mueve hacia el puntaje
+# medio por uso con la reacción REACCION (y nunca baja de PESO_MINIMO)
+PUNTAJES = (33, 9, 13)
+SEGMENTO = 100
+REACCION = 0.1
+PESO_MINIMO = 0.05
+
+# aceptación tipo recocido: al inicio una solución PEOR_RELATIVA_INICIAL más cara que la
+# inicial se acepta con probabilidad 0.5; la temperatura baja geométricamente hasta
+# TEMPERATURA_FINAL_RELATIVA veces la inicial al agotar el presupuesto
+PEOR_RELATIVA_INICIAL = 0.05
+TEMPERATURA_FINAL_RELATIVA = 0.002
+
+# iteraciones por defecto (sin tiempo límite) y cada cuántas se reporta el progreso
+ITERACIONES_ALNS = 20000
+ITERACIONES_PROGRESO_ALNS = 100
+
+# una mejora debe superar esta tolerancia para contar como tal
+TOLERANCIA = 1e-9
+
+
+def _distancia_ruta(ruta, matriz_distancia):
+    ruta = np.asarray(ruta)
+    return float(np.sum(matriz_distancia[ruta[:-1], ruta[1:]], dtype=np.float64))
+
+
+class OperadoresALNS:
+    """
+    Operadores de la ALNS sobre una lista de rutas como listas de IDs ([CD, T1, ..., CD]).
+    Cambian la lista en su lugar, pero nunca una ruta que no hayan copiado antes
+    (copia al escribir): la candidata puede compartir sus rutas con la solución actual.
+    Los índices de las rutas que cambiaron se acumulan en 'modificadas' (se vacía con
+    iniciar), para recalcular solo sus distancias.
+      - destrucción 'aleatoria': tiendas al azar
+      - 'peor_costo': las tiendas que más distancia agregan a su ruta
+      - 'relacionada' (Shaw): una tienda al azar y las más cercanas a ella
+      - 'ruta': vacía una ruta (o un tramo contiguo si tiene más tiendas que las pedidas)
+      - reparación 'codiciosa': inserta primero la tienda con la inserción más barata
+      - 'arrepentimiento': inserta primero la que más perdería si no va a su mejor ruta
+    Las reparaciones guardan en caché el costo y la posición de la mejor inserción de
+    cada tienda pendiente en cada ruta; tras una inserción solo se revisa la columna
+    de la ruta que cambió, y solo en las aristas nuevas (ver _actualizar_cache).
+    """
+
+    def __init__(self, datos, rng=random):
+        self.matriz_distancia = datos['matriz_distancia']
+        self.tiendas = np.asarray(datos['indices_tiendas'], dtype=np.int64)
+        self.rng = rng
+        self.modificadas = set()
+
+    def iniciar(self):
+        """Empieza una nueva candidata: ninguna ruta copiada ni modificada."""
+        self.modificadas = set()
+
+    def _quitar(self, rutas, quitar):
+        quitar = set(quitar)
+        for r, ruta in enumerate(rutas):
+            if not quitar.isdisjoint(ruta[1:-1]):
+                rutas[r] = [nodo for nodo in ruta if nodo not in quitar] # lista nueva
+                self.modificadas.add(r)
+        return list(quitar)
+
+    def _elegir_sesgado(self, orden, q, p):
+        """Toma q elementos de 'orden' (lista, del más al menos preferido) con sesgo y^p."""
+        orden = list(orden)
+        elegidos = []
+        for _ in range(min(q, len(orden))):
+            elegidos.append(orden.pop(int(self.rng.random() ** p * len(orden))))
+        return elegidos
+
+    def destruir_aleatoria(self, rutas, q):
+        elegidas = self.rng.sample(range(len(self.tiendas)), min(q, len(self.tiendas)))
+        return self._quitar(rutas, self.tiendas[elegidas].tolist())
+
+    def destruir_peor_costo(self, rutas, q):
+        D = self.matriz_distancia
+        tiendas, ahorros = [], []
+        for ruta in rutas:
+            if len(ruta) < 3:
+                continue
+            R = np.asarray(ruta)
+            anterior, actual, siguiente = R[:-2], R[1:-1], R[2:]
+            ahorros.append(np.asarray(D[anterior, actual] + D[actual, siguiente] - D[anterior, siguiente]))
+            tiendas.append(actual)
+        if not tiendas:
+            return []
+        tiendas, ahorros = np.concatenate(tiendas), np.concatenate(ahorros)
+        orden = tiendas[np.argsort(-ahorros, kind='stable')]
+        return self._quitar(rutas, self._elegir_sesgado(orden.tolist(), q, ALEATORIEDAD_PEOR))
+
+    def destruir_relacionada(self, rutas, q):
+        semilla = self.tiendas[self.rng.randrange(len(self.tiendas))]
+        distancias = np.asarray(self.matriz_distancia[semilla, self.tiendas])
+        orden = self.tiendas[np.argsort(distancias, kind='stable')] # la semilla queda primero
+        return self._quitar(rutas, [int(semilla)] + self._elegir_sesgado(
+            orden[1:].tolist(), q - 1, ALEATORIEDAD_RELACIONADA))
+
+    def destruir_ruta(self, rutas, q):
+        con_tiendas = [r for r, ruta in enumerate(rutas) if len(ruta) > 2]
+        if not con_tiendas:
+            return []
+        ruta = rutas[self.rng.choice(con_tiendas)]
+        tiendas = ruta[1:-1]
+        if len(tiendas) > q:
+            inicio = self.rng.randrange(len(tiendas) - q + 1)
+            tiendas = tiendas[inicio:inicio + q]
+        return self._quitar(rutas, tiendas)
+
+    def _costos_insercion(self, ruta, tiendas):
+        """Costo y posición de la mejor inserción de cada tienda en 'ruta' (vectorizado)."""
+        D = self.matriz_distancia
+        R = np.asarray(ruta)
+        u, v = R[:-1], R[1:]
+        costos = np.asarray(D[tiendas[:, np.newaxis], u[np.newaxis, :]]
+                            + D[tiendas[:, np.newaxis], v[np.newaxis, :]] - D[u, v], dtype=np.float64)
+        mejor = costos.argmin(axis=1)
+        return costos[np.arange(len(tiendas)), mejor], mejor + 1
+
+    def _insertar(self, rutas, pendientes, k):
+        pendientes = np.asarray(pendientes, dtype=np.int64)
+        if len(pendientes) == 0:
+            return
+        num_rutas = len(rutas)
+        costos = np.empty((len(pendientes), num_rutas))
+        posiciones = np.empty((len(pendientes), num_rutas), dtype=np.int64)
+        for r in range(num_rutas):
+            costos[:, r], posiciones[:, r] = self._costos_insercion(rutas[r], pendientes)
+
+        restantes = np.arange(len(pendientes))
+        k = min(k, num_rutas)
+        while len(restantes):
+            sub = costos[restantes]
+            if k <= 1:
+                i = int(np.argmin(sub.min(axis=1)))
+            else:
+                ordenados = np.sort(sub, axis=1)[:, :k]
+                arrepentimiento = (ordenados[:, 1:] - ordenados[:, :1]).sum(axis=1)
+                # mayor arrepentimiento; en empate, la inserción más barata
+                i = int(np.lexsort((ordenados[:, 0], -arrepentimiento))[0])
+            fila = restantes[i]
+            r = int(np.argmin(costos[fila]))
+            p = int(posiciones[fila, r])
+            if r not in self.modificadas:
+                rutas[r] = list(rutas[r]) # copia al escribir: la original es de la solución actual
+                self.modificadas.add(r)
+            rutas[r].insert(p, int(pendientes[fila]))
+
+            restantes = np.delete(restantes, i)
+            if len(restantes):
+                self._actualizar_cache(costos, posiciones, restantes, pendientes, rutas[r], r, p)
+
+    def _actualizar_cache(self, costos, posiciones, filas, pendientes, ruta, r, p):
+        """
+        Columna 'r' de la caché tras insertar en la posición p: la arista (u, v) se
+        cambió por (u, x) y (x, v). Solo las tiendas cuya mejor inserción era (u, v)
+        se recalculan sobre toda la ruta; las demás comparan con las dos aristas nuevas.
+        """
+        D = self.matriz_distancia
+        posicion = posiciones[filas, r]
+        rotas = posicion == p
+        if rotas.any():
+            costos[filas[rotas], r], posiciones[filas[rotas], r] = self._costos_insercion(
+                ruta, pendientes[filas[rotas]])
+        filas = filas[~rotas]
+        if len(filas) == 0:
+            return
+        posicion = posicion[~rotas]
+        posicion[posicion > p] += 1
+        tiendas = pendientes[filas]
+        u, x, v = ruta[p - 1], ruta[p], ruta[p + 1]
+        antes = np.asarray(D[tiendas, u] + D[tiendas, x] - D[u, x], dtype=np.float64)
+        despues = np.asarray(D[tiendas, x] + D[tiendas, v] - D[x, v], dtype=np.float64)
+        costo = costos[filas, r]
+        nueva = np.minimum(antes, despues)
+        mejora = nueva < costo
+        costos[filas, r] = np.where(mejora, nueva, costo)
+        posiciones[filas, r] = np.where(mejora, np.where(antes <= despues, p, p + 1), posicion)
+
+    def reparar_codiciosa(self, rutas, pendientes):
+        self._insertar(rutas, pendientes, 1)
+
+    def reparar_arrepentimiento(self, rutas, pendientes):
+        self._insertar(rutas, pendientes, K_ARREPENTIMIENTO)
+
+
+def _elegir(pesos, rng):
+    return rng.choices(range(len(pesos)), weights=pesos)[0]
+
+
+def _actualizar_pesos(pesos, puntajes, usos):
+    for j in range(len(pesos)):
+        if usos[j]:
+            pesos[j] = max(PESO_MINIMO, pesos[j] * (1 - REACCION) + REACCION * puntajes[j] / usos[j])
+        puntajes[j] = usos[j] = 0
+
+
+def busqueda_alns(datos, params, rng=random, observadores=None, estadisticas=None,
+                  solucion_inicial=None):
+    """
+    Búsqueda adaptativa de grandes vecindarios (ALNS): en cada iteración un operador
+    de destrucción quita entre FRACCION_DESTRUCCION de las tiendas (ver OperadoresALNS)
+    y uno de reparación las reinserta; la candidata se acepta con el criterio de
+    Metropolis. Los operadores se eligen por ruleta con pesos que se adaptan según
+    sus resultados (PUNTAJES). Usa los mismos datos y devuelve una Solucion como
+    recocido_simulado.
+
+    'params' admite 'max_iteraciones' (por defecto ITERACIONES_ALNS si no hay tiempo
+    límite), 'tiempo_limite_s', 'iteraciones_sin_mejora', 'constructor',
+    'busqueda_local_inicial', 'pulido_final', 'k_busqueda_local', 'destrucciones' y
+    'reparaciones' (subconjuntos de DESTRUCCIONES y REPARACIONES). La temperatura
+    depende del avance del presupuesto (iteraciones o tiempo, el mayor). No considera
+    capacidad ni ventanas de tiempo.
+    """
+    inicio = time.perf_counter()
+    if crear_restricciones(datos, params) is not None:
+        raise ValueError("La ALNS no considera capacidad ni ventanas de tiempo.")
+
+    matriz_distancia = datos['matriz_distancia']
+    operadores = OperadoresALNS(datos, rng)
+    destrucciones = tuple(params.get('destrucciones', DESTRUCCIONES))
+    reparaciones = tuple(params.get('reparaciones', REPARACIONES))
+    for nombre in destrucciones + reparaciones:
+        if nombre not in DESTRUCCIONES + REPARACIONES:
+            raise ValueError(f"Operador ALNS desconocido: {nombre}. Opciones: "
+                             f"{', '.join(DESTRUCCIONES + REPARACIONES)}")
+    destruir = [getattr(operadores, 'destruir_' + nombre) for nombre in destrucciones]
+    reparar = [getattr(operadores, 'reparar_' + nombre) for nombre in reparaciones]
+    pesos_d, puntajes_d, usos_d = [1.0] * len(destruir), [0.0] * len(destruir), [0] * len(destruir)
+    pesos_r, puntajes_r, usos_r = [1.0] * len(reparar), [0.0] * len(reparar), [0] * len(reparar)
+
+    notificador = Notificador(observadores, datos.get('nombres_nodos'),
+                              params.get('intervalo_reporte_s', 0.5),
+                              params.get('iteraciones_progreso', ITERACIONES_PROGRESO_ALNS))
+    busqueda_local = None
+    if params.get('busqueda_local_inicial') or params.get('pulido_final'):
+        busqueda_local = BusquedaLocal(datos, params.get('k_busqueda_local', K_VECINOS))
+
+    if solucion_inicial is None:
+        mejor_solucion = generar_solucion_inicial(datos, params.get('constructor', 'vecino_mas_cercano'))
+    else:
+        mejor_solucion = solucion_inicial.copia()
+    costo_inicial = mejor_solucion.costo_global
+    if params.get('busqueda_local_inicial'):
+        busqueda_local.mejorar(mejor_solucion)
+
+    # la solución actual se maneja como listas (las operaciones cambian largos de ruta)
+    # con la distancia de cada ruta; la mejor es una Solucion que se sobrescribe en su lugar
+    rutas = mejor_solucion.rutas
+    distancias = [_distancia_ruta(ruta, matriz_distancia) for ruta in rutas]
+    costo_actual = mejor_costo = sum(distancias)
+
+    num_tiendas = len(operadores.tiendas)
+    q_max = min(num_tiendas, MAX_DESTRUCCION, max(MIN_DESTRUCCION, int(FRACCION_DESTRUCCION[1] * num_tiendas)))
+    q_min = min(q_max, max(MIN_DESTRUCCION, int(FRACCION_DESTRUCCION[0] * num_tiendas)))
+
+    tiempo_limite = params.get('tiempo_limite_s')
+    max_iteraciones = params.get('max_iteraciones', None if tiempo_limite else ITERACIONES_ALNS)
+    sin_mejora_max = params.get('iteraciones_sin_mejora')
+    temperatura_inicial = T = -PEOR_RELATIVA_INICIAL * costo_actual / math.log(0.5)
+    iteracion = aceptados = ultima_mejora = 0
+    motivo_fin = None if num_tiendas else 'sin_tiendas'
+
+    notificador.inicio(iteracion, T, mejor_solucion)
+
+    while motivo_fin is None:
+        avance_tiempo = (time.perf_counter() - inicio) / tiempo_limite if tiempo_limite else 0.0
+        avance_iteraciones = iteracion / max_iteraciones if max_iteraciones else 0.0
+        if avance_tiempo >= 1:
+            motivo_fin = 'tiempo'
+            break
+        if avance_iteraciones >= 1:
+            motivo_fin = 'iteraciones'
+            break
+        if sin_mejora_max is not None and iteracion - ultima_mejora >= sin_mejora_max:
+            motivo_fin = 'estancamiento'
+            break
+        T = temperatura_inicial * TEMPERATURA_FINAL_RELATIVA ** max(avance_tiempo, avance_iteraciones)
+        iteracion += 1
+
+        d, r = _elegir(pesos_d, rng), _elegir(pesos_r, rng)
+        # la candidata comparte con la actual las rutas que los operadores no tocan:
+        # solo se copian y se vuelven a medir las modificadas
+        candidata = list(rutas)
+        operadores.iniciar()
+        quitadas = destruir[d](candidata, rng.randint(q_min, q_max))
+        reparar[r](candidata, quitadas)
+        distancias_candidata = list(distancias)
+        for m in operadores.modificadas:
+            distancias_candidata[m] = _distancia_ruta(candidata[m], matriz_distancia)
+        costo_candidata = sum(distancias_candidata)
+        delta = costo_candidata - costo_actual
+
+        puntaje = 0
+        if costo_candidata < mejor_costo - TOLERANCIA:
+            puntaje = PUNTAJES[0]
+        elif delta < -TOLERANCIA:
+            puntaje = PUNTAJES[1]
+        elif delta <= TOLERANCIA or rng.random() < math.exp(-delta / T):
+            # las candidatas de igual costo se aceptan sin puntaje (suelen ser la misma solución)
+            puntaje = PUNTAJES[2] if delta > TOLERANCIA else 0
+        else:
+            puntaje = None
+
+        if puntaje is not None:
+            rutas, distancias, costo_actual = candidata, distancias_candidata, costo_candidata
+            aceptados += 1
+            puntajes_d[d] += puntaje
+            puntajes_r[r] += puntaje
+            if costo_candidata < mejor_costo - TOLERANCIA:
+                mejor_costo = costo_candidata
+                mejor_solucion.copiar_de(Solucion(candidata, matriz_distancia))
+                ultima_mejora = iteracion
+                notificador.nuevo_mejor(iteracion, T, mejor_solucion)
+        usos_d[d] += 1
+        usos_r[r] += 1
+
+        if iteracion % SEGMENTO == 0:
+            _actualizar_pesos(pesos_d, puntajes_d, usos_d)
+            _actualizar_pesos(pesos_r, puntajes_r, usos_r)
+        if notificador.activo and iteracion % notificador.cada_iteraciones == 0:
+            notificador.progreso(iteracion, T, costo_actual, mejor_solucion)
+
+    if params.get('pulido_final'):
+        busqueda_local.mejorar(mejor_solucion)
+    mejor_solucion.evaluar_costo_global(matriz_distancia)
+    notificador.fin(iteracion, T, mejor_solucion)
+
+    if estadisticas is not None:
+        estadisticas.update({
+            'iteraciones': iteracion,
+            'aceptados': aceptados,
+            'costo_inicial': costo_inicial,
+            'mejor_costo': mejor_solucion.costo_global,
+            'temperatura_inicial': temperatura_inicial,
+            'temperatura_final': T,
+            'segundos': time.perf_counter() - inicio,
+            'motivo_fin': motivo_fin,
+            'pesos_destruccion': dict(zip(destrucciones, pesos_d)),
+            'pesos_reparacion': dict(zip(reparaciones, pesos_r)),
+        })
+    return mejor_solucion
@@ -0,0 +1,230 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import time
+import tracemalloc
+try:
+    import resource # solo Unix: memoria máxima del proceso
+except ImportError:
+    resource = None
+import numpy as np
+from data_loader import generar_instancia, procesar_nodos
+from metaheuristica import generar_solucion_inicial, recocido_simulado
+from observadores import Observador
+
+# tamaños (número total de nodos) que se miden por defecto
+TAMANOS = (100, 1000, 5000, 20000)
+
+# iteraciones del recocido simulado en cada tamaño (fijas, para comparar iteraciones/s)
+ITERACIONES_SA = 100000
+
+# niveles de temperatura en que se reparten las iteraciones
+NIVELES_TEMPERATURA = 100
+
+# una métrica de tiempo que empeora más que esta fracción se marca como regresión
+TOLERANCIA_REGRESION = 0.20
+
+ARCHIVO_RESULTADOS = 'resultados_benchmark.json'
+
+
+class CurvaCosto(Observador):
+    """Registra (segundos, iteración, mejor costo) en cada nuevo mejor."""
+
+    def __init__(self):
+        self.puntos = []
+        self._inicio = None
+
+    def inicio(self, evento):
+        self._inicio = time.perf_counter()
+        self.puntos.append((0.0, 0, evento.mejor_costo))
+
+    def nuevo_mejor(self, evento):
+        self.puntos.append((time.perf_counter() - self._inicio, evento.iteracion, evento.mejor_costo))
+
+    def fin(self, evento):
+        self.puntos.append((time.perf_counter() - self._inicio, evento.iteracion, evento.mejor_costo))
+
+
+def params_sa(iteraciones, temperatura_inicial=1.0, tasa_enfriamiento=0.95, k_vecinos=10,
+              tamano_lote=None):
+    """
+    Parámetros del SA que dan exactamente 'iteraciones' iteraciones en NIVELES_TEMPERATURA
+    niveles; con vecindario granular, que es el que escala a instancias grandes.
+    Con 'tamano_lote' se usa la evaluación por lotes (lotes.py).
+    """
+    temperatura_final = temperatura_inicial * tasa_enfriamiento**NIVELES_TEMPERATURA * 1.0001
+    return {
+        'tamano_lote': tamano_lote,
+        'temperatura_inicial': temperatura_inicial,
+        'temperatura_final': temperatura_final,
+        'tasa_enfriamiento': tasa_enfriamiento,
+        'iteraciones_por_temp': max(1, iteraciones // NIVELES_TEMPERATURA),
+        'k_vecinos': k_vecinos,
+        'intervalo_reporte_s': 0.05,
+    }
+
+
+def _medir(funcion, medir_memoria=True):
+    """Ejecuta 'funcion' y devuelve (resultado, segundos, pico de memoria en MB)."""
+    if medir_memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    pico_mb = None
+    if medir_memoria:
+        pico_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return resultado, segundos, pico_mb
+
+
+def _memoria_max_proceso_mb():
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KB y macOS en bytes
+    return maximo / 2**20 if platform.system() == 'Darwin' else maximo / 2**10
+
+
+def medir_tamano(num_nodos, num_cds=10, distribucion='uniforme', semilla=0,
+                 iteraciones=ITERACIONES_SA, modo='auto', tamano_lote=None):
+    """
+    Mide una instancia sintética de 'num_nodos' nodos: construcción de la matriz,
+    solución inicial y recocido simulado. La memoria se mide con tracemalloc solo al
+    construir la matriz (en las fases con muchos objetos pequeños de Python distorsionaría
+    los tiempos); además se reporta la memoria máxima del proceso hasta ese punto (solo
+    es de este tamaño si se mide en un proceso nuevo, ver medir_tamano_aislado).
+    El tiempo del SA es solo el del ciclo (desde el evento de inicio hasta el de fin).
+    """
+    df_nodos = generar_instancia(num_nodos, num_cds, distribucion, semilla)
+
+    datos, t_matriz, mem_matriz = _medir(lambda: procesar_nodos(df_nodos, modo=modo))
+    solucion, t_inicial, _ = _medir(lambda: generar_solucion_inicial(datos), medir_memoria=False)
+
+    curva = CurvaCosto()
+    estadisticas = {}
+    params = params_sa(iteraciones, tamano_lote=tamano_lote)
+    recocido_simulado(datos, params, rng=random.Random(semilla), observadores=[curva],
+                      estadisticas=estadisticas)
+    t_sa = curva.puntos[-1][0]
+
+    return {
+        'num_nodos': num_nodos,
+        'num_cds': num_cds,
+        'distribucion': distribucion,
+        'tamano_lote': tamano_lote,
+        'modo_matriz': 'denso' if isinstance(datos['matriz_distancia'], np.ndarray) else 'disperso',
+        'tiempo_matriz_s': t_matriz,
+        'memoria_pico_matriz_mb': mem_matriz,
+        'tiempo_solucion_inicial_s': t_inicial,
+        'costo_inicial': solucion.costo_global,
+        'iteraciones_sa': estadisticas['iteraciones'],
+        'tiempo_sa_s': t_sa,
+        'iteraciones_por_s': estadisticas['iteraciones'] / t_sa,
+        'mejor_costo': estadisticas['mejor_costo'],
+        'memoria_max_proceso_mb': _memoria_max_proceso_mb(),
+        'curva_costo': curva.puntos,
+    }
+
+
+def medir_tamano_aislado(*args, **kwargs):
+    """
+    medir_tamano en un proceso nuevo (spawn). La memoria máxima del proceso
+    (ru_maxrss) solo crece, así que en el mismo proceso cada tamaño heredaría el pico
+    del mayor medido antes.
+    """
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(medir_tamano, args, kwargs)
+
+
+def ejecutar_benchmark(tamanos=TAMANOS, num_cds=10, distribucion='uniforme', semilla=0,
+                       iteraciones=ITERACIONES_SA, tamano_lote=None, aislar=True):
+    """
+    Mide todos los tamaños y devuelve el reporte completo (metadatos + resultados).
+    Con 'aislar' cada tamaño se mide en su propio proceso (ver medir_tamano_aislado).
+    """
+    medir = medir_tamano_aislado if aislar else medir_tamano
+    resultados = []
+    for num_nodos in tamanos:
+        print(f"\n=== Benchmark: {num_nodos} nodos ({distribucion}) ===")
+        r = medir(num_nodos, num_cds, distribucion, semilla, iteraciones, tamano_lote=tamano_lote)
+        print(f"Matriz: {r['tiempo_matriz_s']:.3f} s ({r['memoria_pico_matriz_mb']:.1f} MB) | "
+              f"Inicial: {r['tiempo_solucion_inicial_s']:.3f} s | "
+              f"SA: {r['iteraciones_por_s']:.0f} it/s | "
+              f"Costo: {r['costo_inicial']:.2f} -> {r['mejor_costo']:.2f}")
+        resultados.append(r)
+
+    return {
+        'metadatos': {
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'procesador': platform.processor(),
+            'semilla': semilla,
+            'iteraciones_sa': iteraciones,
+            'tamano_lote': tamano_lote,
+            'procesos_aislados': aislar,
+        },
+        'resultados': resultados,
+    }
+
+
+def comparar_resultados(actual, referencia, tolerancia=TOLERANCIA_REGRESION):
+    """
+    Compara dos reportes por tamaño e imprime las métricas de tiempo que empeoraron
+    más que 'tolerancia'. Solo se comparan corridas de la misma configuración (tamaño,
+    distribución, tamaño de lote y modo de la matriz). Devuelve la lista de regresiones.
+    """
+    metricas = (('tiempo_matriz_s', False), ('tiempo_solucion_inicial_s', False),
+                ('iteraciones_por_s', True))
+
+    def llave(r):
+        return (r['num_nodos'], r['distribucion'], r.get('tamano_lote'), r.get('modo_matriz'))
+
+    por_tamano = {llave(r): r for r in referencia['resultados']}
+    regresiones = []
+
+    for r in actual['resultados']:
+        base = por_tamano.get(llave(r))
+        if base is None:
+            continue
+        for metrica, mayor_es_mejor in metricas:
+            if not base[metrica] or not r[metrica]:
+                continue
+            # razón > 1 siempre significa "peor"
+            razon = base[metrica] / r[metrica] if mayor_es_mejor else r[metrica] / base[metrica]
+            if razon > 1 + tolerancia:
+                regresiones.append((r['num_nodos'], metrica, base[metrica], r[metrica]))
+                print(f"REGRESIÓN {r['num_nodos']} nodos, {metrica}: {base[metrica]:.4g} -> {r[metrica]:.4g}")
+
+    if not regresiones:
+        print("Sin regresiones de rendimiento respecto a la referencia.")
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del MDVRP con instancias sintéticas.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=list(TAMANOS))
+    parser.add_argument('--cds', type=int, default=10)
+    parser.add_argument('--distribucion', choices=('uniforme', 'agrupada'), default='uniforme')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--iteraciones', type=int, default=ITERACIONES_SA)
+    parser.add_argument('--tamano-lote', type=int, help="evaluación del SA por lotes de este tamaño")
+    parser.add_argument('--mismo-proceso', action='store_true',
+                        help="no medir cada tamaño en un proceso nuevo (la memoria máxima se acumula)")
+    parser.add_argument('--salida', default=ARCHIVO_RESULTADOS)
+    parser.add_argument('--comparar', help="reporte JSON de referencia para detectar regresiones")
+    args = parser.parse_args()
+
+    reporte = ejecutar_benchmark(args.tamanos, args.cds, args.distribucion, args.semilla,
+                                 args.iteraciones, args.tamano_lote, not args.mismo_proceso)
+    with open(args.salida, 'w') as f:
+        json.dump(reporte, f, indent=2)
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar_resultados(reporte, json.load(f))
@@ -0,0 +1,202 @@
+from collections import deque
+import numpy as np
+from vecindario import obtener_vecinos_cercanos, K_VECINOS
+
+# operadores disponibles para la búsqueda local
+OPERADORES = ('2opt', 'oropt', 'cruce')
+
+# largo máximo de los segmentos que mueven Or-opt y el cross-exchange
+LARGO_MAX_SEGMENTO = 3
+
+# una mejora debe superar esta tolerancia para aplicarse (evita ciclos por redondeo)
+TOLERANCIA = 1e-9
+
+
+class BusquedaLocal:
+    """
+    Búsqueda local determinista (primera mejora) para intensificar soluciones:
+      - '2opt': invierte un tramo de una ruta (elimina cruces)
+      - 'oropt': mueve un segmento de 1 a 3 tiendas dentro de la misma ruta
+      - 'cruce': cross-exchange, intercambia segmentos de 0 a 3 / 1 a 3 tiendas
+        entre dos rutas
+    Solo se prueban movimientos que dejan a una tienda junto a uno de sus k
+    vecinos más cercanos, cada movimiento se evalúa por delta (aristas afectadas)
+    y se usan bits "don't look": una tienda sin mejoras no se vuelve a revisar
+    hasta que un movimiento toque alguno de sus extremos.
+    Las inversiones de tramo suponen distancias simétricas.
+    """
+
+    def __init__(self, datos, k=K_VECINOS, operadores=OPERADORES):
+        self.matriz_distancia = datos['matriz_distancia']
+        self.vecinos = obtener_vecinos_cercanos(datos, k)
+        self.es_cd = np.zeros(datos['num_nodos'], dtype=bool)
+        self.es_cd[datos['indices_cds']] = True
+        self.operadores = tuple(operadores)
+        self.movimientos_aplicados = 0
+
+    def mejorar(self, solucion, nodos=None, max_movimientos=None):
+        """
+        Aplica movimientos de mejora sobre 'solucion' (en su lugar) hasta que
+        ninguna tienda activa mejore. 'nodos' limita las tiendas activas al
+        inicio (por defecto todas). Devuelve la reducción total de costo.
+        """
+        if nodos is None:
+            nodos = solucion.tour[~self.es_cd[solucion.tour]]
+        en_cola = np.zeros(len(self.es_cd), dtype=bool)
+        cola = deque()
+        for nodo in np.asarray(nodos).tolist():
+            if not self.es_cd[nodo] and not en_cola[nodo]:
+                en_cola[nodo] = True
+                cola.append(nodo)
+
+        costo_inicial = solucion.costo_global
+        aplicados = 0
+        while cola:
+            x = cola.popleft()
+            en_cola[x] = False
+
+            tocados = self._mejorar_nodo(solucion, x)
+            if tocados is None:
+                continue # sin mejora: queda con su bit "don't look" encendido
+
+            aplicados += 1
+            for nodo in tocados + [x]:
+                if not self.es_cd[nodo] and not en_cola[nodo]:
+                    en_cola[nodo] = True
+                    cola.append(nodo)
+            if max_movimientos is not None and aplicados >= max_movimientos:
+                break
+
+        self.movimientos_aplicados += aplicados
+        return costo_inicial - solucion.costo_global
+
+    def _ubicar(self, solucion, nodo):
+        g = solucion.posicion[nodo]
+        ruta = int(np.searchsorted(solucion.inicios, g, side='right')) - 1
+        return ruta, int(g - solucion.inicios[ruta])
+
+    def _mejorar_nodo(self, solucion, x):
+        """Prueba los movimientos de x con sus vecinos; aplica el primero que mejora."""
+        ruta_x, i = self._ubicar(solucion, x)
+        R1 = solucion.ruta(ruta_x).tolist()
+
+        for y in self.vecinos[x].tolist():
+            if self.es_cd[y]:
+                continue
+            ruta_y, j = self._ubicar(solucion, y)
+
+            if ruta_y == ruta_x:
+                if '2opt' in self.operadores:
+                    tocados = self._dos_opt(solucion, ruta_x, R1, i, j)
+                    if tocados:
+                        return tocados
+                if 'oropt' in self.operadores:
+                    tocados = self._or_opt(solucion, ruta_x, R1, i, j)
+                    if tocados:
+                        return tocados
+            elif 'cruce' in self.operadores:
+                R2 = solucion.ruta(ruta_y).tolist()
+                tocados = self._cruce(solucion, ruta_x, R1, i, ruta_y, R2, j)
+                if tocados:
+                    return tocados
+        return None
+
+    def _dos_opt(self, solucion, ruta, R, i, j):
+        """2-opt que deja a R[i] y R[j] unidos por una arista."""
+        D = self.matriz_distancia
+        p, q = min(i, j), max(i, j)
+        if q - p < 2:
+            return None
+
+        # variante sucesor: (R[p], R[p+1]) + (R[q], R[q+1]) -> (R[p], R[q]) + (R[p+1], R[q+1])
+        a, b, c, e = R[p], R[p + 1], R[q], R[q + 1]
+        delta = D[a, c] + D[b, e] - D[a, b] - D[c, e]
+        if delta < -TOLERANCIA:
+            solucion.invertir_tramo(ruta, p + 1, q, delta)
+            return [a, b, c, e]
+
+        # variante predecesor: (R[p-1], R[p]) + (R[q-1], R[q]) -> (R[p-1], R[q-1]) + (R[p], R[q])
+        a, b, c, e = R[p - 1], R[p], R[q - 1], R[q]
+        delta = D[a, c] + D[b, e] - D[a, b] - D[c, e]
+        if delta < -TOLERANCIA:
+            solucion.invertir_tramo(ruta, p, q - 1, delta)
+            return [a, b, c, e]
+        return None
+
+    def _or_opt(self, solucion, ruta, R, i, j):
+        """Mueve el segmento R[i..i+L-1] (que empieza en x) junto a y = R[j] dentro de la ruta."""
+        D = self.matriz_distancia
+        n = len(R)
+        for largo in range(1, LARGO_MAX_SEGMENTO + 1):
+            if i + largo - 1 > n - 2:
+                break
+            anterior, siguiente = R[i - 1], R[i + largo]
+            primero, ultimo = R[i], R[i + largo - 1]
+            quitar = D[anterior, siguiente] - D[anterior, primero] - D[ultimo, siguiente]
+
+            # opción A: y -> segmento -> R[j+1]
+            if j < i - 1 or j > i + largo - 1:
+                u, v = R[j], R[j + 1]
+                delta = quitar + D[u, primero] + D[ultimo, v] - D[u, v]
+                if delta < -TOLERANCIA:
+                    return self._aplicar_or_opt(solucion, ruta, R, i, largo, j, True, delta,
+                                                [anterior, siguiente, u, v, primero, ultimo])
+
+            # opción B: R[j-1] -> segmento invertido -> y
+            if j < i or j > i + largo:
+                u, v = R[j - 1], R[j]
+                delta = quitar + D[u, ultimo] + D[primero, v] - D[u, v]
+                if delta < -TOLERANCIA:
+                    return self._aplicar_or_opt(solucion, ruta, R, i, largo, j, False, delta,
+                                                [anterior, siguiente, u, v, primero, ultimo])
+        return None
+
+    def _aplicar_or_opt(self, solucion, ruta, R, i, largo, j, despues, delta, tocados):
+        nueva = R[:i] + R[i + largo:]
+        segmento = R[i:i + largo]
+        pos_y = j if j < i else j - largo # posición de y ya sin el segmento
+        if despues:
+            nueva[pos_y + 1:pos_y + 1] = segmento
+        else:
+            nueva[pos_y:pos_y] = segmento[::-1]
+        solucion.reemplazar_rutas({ruta: nueva}, {ruta: delta})
+        return tocados
+
+    def _cruce(self, solucion, ruta_1, R1, i, ruta_2, R2, j):
+        """
+        Cross-exchange: el segmento S1 = R1[i+1..i+L1] (tras x) se cambia por
+        S2 = R2[j..j+L2-1] (que empieza en y), de modo que x queda unido a y.
+        Con L1 = 0 es una reubicación del segmento S2 a la ruta de x.
+        """
+        D = self.matriz_distancia
+        n1, n2 = len(R1), len(R2)
+        a, c = R1[i], R2[j - 1]
+
+        for largo_2 in range(1, LARGO_MAX_SEGMENTO + 1):
+            if j + largo_2 - 1 > n2 - 2:
+                break
+            f2, l2, e = R2[j], R2[j + largo_2 - 1], R2[j + largo_2]
+            interno_2 = sum(D[R2[k], R2[k + 1]] for k in range(j, j + largo_2 - 1))
+
+            for largo_1 in range(0, LARGO_MAX_SEGMENTO + 1):
+                if i + largo_1 > n1 - 2:
+                    break
+                b = R1[i + largo_1 + 1]
+                if largo_1 == 0:
+                    delta_1 = D[a, f2] + interno_2 + D[l2, b] - D[a, b]
+                    delta_2 = D[c, e] - D[c, f2] - interno_2 - D[l2, e]
+                    tocados = [a, b, c, e, f2, l2]
+                else:
+                    f1, l1 = R1[i + 1], R1[i + largo_1]
+                    interno_1 = sum(D[R1[k], R1[k + 1]] for k in range(i + 1, i + largo_1))
+                    delta_1 = D[a, f2] + interno_2 + D[l2, b] - D[a, f1] - interno_1 - D[l1, b]
+                    delta_2 = D[c, f1] + interno_1 + D[l1, e] - D[c, f2] - interno_2 - D[l2, e]
+                    tocados = [a, b, c, e, f1, l1, f2, l2]
+
+                if delta_1 + delta_2 < -TOLERANCIA:
+                    nueva_1 = R1[:i + 1] + R2[j:j + largo_2] + R1[i + largo_1 + 1:]
+                    nueva_2 = R2[:j] + R1[i + 1:i + largo_1 + 1] + R2[j + largo_2:]
+                    solucion.reemplazar_rutas({ruta_1: nueva_1, ruta_2: nueva_2},
+                                              {ruta_1: delta_1, ruta_2: delta_2})
+                    return tocados
+        return None
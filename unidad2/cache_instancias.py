@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# directorio donde se guardan las instancias procesadas
+DIRECTORIO_CACHE = '.cache_instancias'
+
+
+def huella_coordenadas(coordenadas):
+    """Huella (sha256) del contenido de las coordenadas; identifica una instancia."""
+    coordenadas = np.ascontiguousarray(coordenadas, dtype=np.float64)
+    h = hashlib.sha256()
+    h.update(str(coordenadas.shape).encode())
+    h.update(coordenadas.tobytes())
+    return h.hexdigest()[:32]
+
+
+def _escritura_atomica(ruta, escribir):
+    """Escribe en un archivo temporal y lo renombra, para que otro proceso nunca lea un archivo a medias."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _ruta_indice(ruta_archivo, directorio):
+    clave = hashlib.sha1(os.path.abspath(ruta_archivo).encode()).hexdigest()
+    return os.path.join(directorio, 'archivos', f"{clave}.json")
+
+
+def cargar_tabla_nodos(ruta_archivo, directorio=DIRECTORIO_CACHE):
+    """
+    Devuelve la tabla de nodos guardada para 'ruta_archivo' si el archivo no ha
+    cambiado (mismo tamaño y fecha de modificación); si no, devuelve None.
+    """
+    try:
+        estado = os.stat(ruta_archivo)
+        with open(_ruta_indice(ruta_archivo, directorio)) as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if indice.get('tamano') != estado.st_size or indice.get('mtime_ns') != estado.st_mtime_ns:
+        return None
+
+    try:
+        return pd.read_pickle(os.path.join(directorio, indice['huella'], 'nodos.pkl'))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def guardar_tabla_nodos(ruta_archivo, df_nodos, directorio=DIRECTORIO_CACHE, huella=None):
+    """
+    Guarda la tabla de nodos (formato binario de pandas) y la asocia a 'ruta_archivo'.
+    'huella' es la llave de la instancia (la misma con que se guardan sus matrices);
+    por defecto, la de las coordenadas de la tabla en el orden recibido.
+    """
+    if huella is None:
+        huella = huella_coordenadas(df_nodos[['Latitud', 'Longitud']].values)
+    _escritura_atomica(os.path.join(directorio, huella, 'nodos.pkl'), df_nodos.to_pickle)
+
+    estado = os.stat(ruta_archivo)
+    indice = {'ruta': os.path.abspath(ruta_archivo), 'tamano': estado.st_size,
+              'mtime_ns': estado.st_mtime_ns, 'huella': huella}
+
+    def escribir(ruta):
+        with open(ruta, 'w') as f:
+            json.dump(indice, f)
+
+    _escritura_atomica(_ruta_indice(ruta_archivo, directorio), escribir)
+    return huella
+
+
+def ruta_matriz(huella, nombre, directorio=DIRECTORIO_CACHE):
+    """Ruta del archivo .npy de una matriz de la instancia 'huella'."""
+    return os.path.join(directorio, huella, f"{nombre}.npy")
+
+
+def _abrir_mapeada(ruta):
+    # np.asarray quita la subclase memmap (su __getitem__ en Python hace lento el
+    # acceso por elemento) pero el arreglo sigue respaldado por el archivo mapeado
+    return np.asarray(np.load(ruta, mmap_mode='r'))
+
+
+def cargar_matriz(huella, nombre, directorio=DIRECTORIO_CACHE):
+    """
+    Abre una matriz guardada como memoria mapeada de solo lectura (no se copia a RAM;
+    los procesos que la abren comparten las mismas páginas). Devuelve None si no existe.
+    """
+    try:
+        return _abrir_mapeada(ruta_matriz(huella, nombre, directorio))
+    except (OSError, ValueError):
+        return None
+
+
+def guardar_matriz(huella, nombre, matriz, directorio=DIRECTORIO_CACHE):
+    """Guarda la matriz en formato .npy y la devuelve abierta como memoria mapeada."""
+    ruta = ruta_matriz(huella, nombre, directorio)
+
+    def escribir(temporal):
+        with open(temporal, 'wb') as f:
+            np.save(f, matriz)
+
+    _escritura_atomica(ruta, escribir)
+    return _abrir_mapeada(ruta)
@@ -0,0 +1,159 @@
+from collections import deque
+import numpy as np
+from vecindario import obtener_vecinos_cercanos
+
+# constructores disponibles para la solución inicial
+CONSTRUCTORES = ('vecino_mas_cercano', 'ahorros', 'barrido')
+
+# vecinos por tienda de los que se calculan ahorros en Clarke-Wright (ahorros granulares)
+K_VECINOS_AHORROS = 20
+
+
+def asignar_cd_mas_cercano(datos):
+    """
+    Asigna cada tienda a su CD más cercano con un solo argmin sobre la
+    submatriz CD x tienda. Devuelve {cd: arreglo de tiendas asignadas}.
+    """
+    indices_cds = np.asarray(datos['indices_cds'])
+    indices_tiendas = np.asarray(datos['indices_tiendas'])
+    sub_matriz = np.asarray(datos['matriz_distancia'][np.ix_(indices_cds, indices_tiendas)])
+    # en empate gana el primer CD, como en el recorrido original
+    mejor_cd = indices_cds[np.argmin(sub_matriz, axis=0)]
+    return {cd: indices_tiendas[mejor_cd == cd] for cd in indices_cds.tolist()}
+
+
+def secuenciar_vecino_mas_cercano(cd, tiendas, matriz_distancia):
+    """
+    Ordena las tiendas de un CD con la heurística del vecino más cercano: en cada
+    paso un argmin vectorizado sobre la fila del último nodo, restringida a las
+    tiendas pendientes. Devuelve la ruta [CD -> T1 -> ... -> CD].
+    """
+    pendientes = np.array(tiendas, dtype=np.int64)
+    ruta = [cd]
+    ultimo = cd
+    while len(pendientes):
+        k = int(np.argmin(matriz_distancia[ultimo, pendientes]))
+        ultimo = int(pendientes[k])
+        ruta.append(ultimo)
+        # se quita la tienda visitada moviendo la última a su lugar (O(1))
+        pendientes[k] = pendientes[-1]
+        pendientes = pendientes[:-1]
+    ruta.append(cd)
+    return ruta
+
+
+def _encadenar_fragmentos(cd, fragmentos, matriz_distancia):
+    """
+    Une los fragmentos de ruta en una sola ruta del CD: desde el último nodo se
+    agrega el fragmento con el extremo más cercano (invirtiéndolo si conviene).
+    """
+    ruta = [cd]
+    restantes = [list(f) for f in fragmentos]
+    while restantes:
+        primeros = np.array([f[0] for f in restantes])
+        ultimos = np.array([f[-1] for f in restantes])
+        d_primero = np.asarray(matriz_distancia[ruta[-1], primeros])
+        d_ultimo = np.asarray(matriz_distancia[ruta[-1], ultimos])
+        k = int(np.argmin(np.minimum(d_primero, d_ultimo)))
+        fragmento = restantes.pop(k)
+        ruta.extend(fragmento if d_primero[k] <= d_ultimo[k] else reversed(fragmento))
+    ruta.append(cd)
+    return ruta
+
+
+def secuenciar_ahorros(cd, tiendas, matriz_distancia, vecinos):
+    """
+    Clarke-Wright sin capacidad para las tiendas de un CD: los ahorros
+    s(i, j) = d(CD, i) + d(CD, j) - d(i, j) se calculan solo para pares de vecinos
+    cercanos (vectorizado) y se unen fragmentos en orden de ahorro decreciente
+    cuando i y j son extremos de fragmentos distintos. Los fragmentos que quedan se
+    encadenan al final por cercanía.
+    """
+    tiendas = np.asarray(tiendas, dtype=np.int64)
+    if len(tiendas) <= 2:
+        return [cd] + tiendas.tolist() + [cd]
+
+    # pares candidatos {i, j} con j vecino de i y ambos tiendas de este CD (sin repetir)
+    num_nodos = len(vecinos)
+    del_cd = np.zeros(num_nodos, dtype=bool)
+    del_cd[tiendas] = True
+    i = np.repeat(tiendas, vecinos.shape[1])
+    j = vecinos[tiendas].ravel().astype(np.int64)
+    validos = del_cd[j]
+    pares = np.unique(np.minimum(i, j)[validos] * num_nodos + np.maximum(i, j)[validos])
+    i, j = pares // num_nodos, pares % num_nodos
+
+    ahorros = (np.asarray(matriz_distancia[cd, i]) + np.asarray(matriz_distancia[cd, j])
+               - np.asarray(matriz_distancia[i, j]))
+    orden = np.argsort(-ahorros, kind='stable')
+    orden = orden[ahorros[orden] > 0]
+
+    # cada tienda empieza como un fragmento propio [CD -> t -> CD]
+    fragmento_de = {t: deque([t]) for t in tiendas.tolist()}
+    for a, b in zip(i[orden].tolist(), j[orden].tolist()):
+        fa, fb = fragmento_de[a], fragmento_de[b]
+        if fa is fb:
+            continue
+        # solo se unen extremos: un nodo interior ya tiene sus dos aristas
+        if (a != fa[0] and a != fa[-1]) or (b != fb[0] and b != fb[-1]):
+            continue
+
+        if len(fa) < len(fb): # se recorre siempre el fragmento más corto
+            a, b, fa, fb = b, a, fb, fa
+        if b != fb[0]:
+            fb.reverse() # ahora b está al inicio de fb
+        if a == fa[-1]:
+            fa.extend(fb)
+        else:
+            fa.extendleft(fb) # extendleft invierte: b queda junto a a
+        for t in fb:
+            fragmento_de[t] = fa
+
+    fragmentos = list({id(f): f for f in fragmento_de.values()}.values())
+    return _encadenar_fragmentos(cd, fragmentos, matriz_distancia)
+
+
+def secuenciar_barrido(cd, tiendas, coordenadas):
+    """
+    Barrido polar: ordena las tiendas por su ángulo alrededor del CD, empezando
+    justo después del mayor hueco angular para no cruzar la zona vacía.
+    """
+    tiendas = np.asarray(tiendas, dtype=np.int64)
+    if len(tiendas) <= 2:
+        return [cd] + tiendas.tolist() + [cd]
+
+    lat_cd, lon_cd = coordenadas[cd]
+    d_lat = coordenadas[tiendas, 0] - lat_cd
+    d_lon = (coordenadas[tiendas, 1] - lon_cd) * np.cos(np.radians(lat_cd))
+    angulos = np.arctan2(d_lat, d_lon)
+
+    orden = np.argsort(angulos, kind='stable')
+    huecos = np.diff(np.concatenate((angulos[orden], [angulos[orden[0]] + 2 * np.pi])))
+    inicio = (int(np.argmax(huecos)) + 1) % len(orden)
+    orden = np.roll(orden, -inicio)
+    return [cd] + tiendas[orden].tolist() + [cd]
+
+
+def construir_rutas(datos, metodo='vecino_mas_cercano'):
+    """
+    Rutas iniciales (una por CD) con el constructor 'metodo' (ver CONSTRUCTORES).
+    Todas las variantes asignan cada tienda a su CD más cercano.
+    """
+    if metodo not in CONSTRUCTORES:
+        raise ValueError(f"Constructor desconocido: {metodo}. Opciones: {', '.join(CONSTRUCTORES)}")
+
+    matriz_distancia = datos['matriz_distancia']
+    asignacion = asignar_cd_mas_cercano(datos)
+    if metodo == 'ahorros':
+        vecinos = obtener_vecinos_cercanos(datos, K_VECINOS_AHORROS)
+
+    rutas = []
+    for cd in datos['indices_cds']:
+        tiendas = asignacion[cd]
+        if metodo == 'vecino_mas_cercano':
+            rutas.append(secuenciar_vecino_mas_cercano(cd, tiendas, matriz_distancia))
+        elif metodo == 'ahorros':
+            rutas.append(secuenciar_ahorros(cd, tiendas, matriz_distancia, vecinos))
+        else:
+            rutas.append(secuenciar_barrido(cd, tiendas, datos['coordenadas']))
+    return rutas
@@ -1,18 +1,25 @@
 import pandas as pd
 import numpy as np
 import random
-from utils import haversine
+from utils import matriz_haversine
+import cache_instancias
+from distancias_dispersas import MatrizDistanciaDispersa, MatrizCostoDerivada, K_VECINOS_DISPERSOS
+from red_vial import GrafoVial, huella_archivo
 
 # archivo de coordenadas
 RUTA_EXCEL = 'datos_distribucion_tiendas.xlsx' 
 
 # Factor de Combustible: Costo asumido por kilómetro
 FACTOR_COMBUSTIBLE_POR_KM = 5.0 
-NUM_NODOS = 100
+
+# tamaño de los datos ficticios (solo se usan si no se puede leer el Excel)
 NUM_CDS = 10
 NUM_TIENDAS = 90
 
-def _generar_datos_ficticios():
+# a partir de este número de nodos el modo 'auto' no crea la matriz densa N x N
+UMBRAL_NODOS_DENSO = 15000
+
+def _generar_datos_ficticios(num_cds=NUM_CDS, num_tiendas=NUM_TIENDAS):
     "genera datos solo si el archivo no se encuentra"
     print("--- GENERANDO DATOS FICTICIOS (FALLÓ LECTURA DE EXCEL) ---")
     
@@ -21,14 +28,14 @@ def _generar_datos_ficticios():
     
     data = []
     
-    # Generar 10 Centros de Distribución (CD)
-    for i in range(NUM_CDS):
+    # Generar los Centros de Distribución (CD)
+    for i in range(num_cds):
         lat = lat_base + random.uniform(-0.01, 0.01)
         lon = lon_base + random.uniform(-0.01, 0.01)
         data.append({'Nombre': f'CD {i}', 'Tipo': 'CD', 'Latitud': lat, 'Longitud': lon})
 
-    # Generar 90 Tiendas
-    for i in range(NUM_TIENDAS):
+    # Generar las Tiendas
+    for i in range(num_tiendas):
         lat = lat_base + random.uniform(-0.08, 0.08)
         lon = lon_base + random.uniform(-0.08, 0.08)
         data.append({'Nombre': f'Tienda {i}', 'Tipo': 'Tienda', 'Latitud': lat, 'Longitud': lon})
@@ -37,25 +44,167 @@ def _generar_datos_ficticios():
     
     return df
 
-def cargar_y_procesar_datos():
+def generar_instancia(num_nodos, num_cds=NUM_CDS, distribucion='uniforme', semilla=0,
+                      num_grupos=None, extension_grados=0.08, dispersion_grupo=0.01):
     """
-    Carga el archivo de coordenadas, asigna IDs, y calcula las matrices.
+    Genera una instancia sintética reproducible (misma semilla -> mismos nodos) con
+    'num_nodos' nodos en total, de los cuales 'num_cds' son CDs. Devuelve una tabla
+    con el mismo formato del Excel (Nombre, Tipo, Latitud, Longitud).
+    'distribucion':
+      - 'uniforme': tiendas uniformes en un cuadrado de +-extension_grados alrededor de Culiacán
+      - 'agrupada': tiendas alrededor de 'num_grupos' centros (normal con desviación
+        'dispersion_grupo'), como colonias o zonas comerciales
+    Los CDs siempre se reparten de forma uniforme en el área.
+    """
+    if not 0 < num_cds < num_nodos:
+        raise ValueError("Se necesita al menos un CD y al menos una tienda.")
+    if distribucion not in ('uniforme', 'agrupada'):
+        raise ValueError(f"Distribución desconocida: {distribucion}")
+
+    rng = np.random.default_rng(semilla)
+    lat_base, lon_base = 24.80, -107.40
+    num_tiendas = num_nodos - num_cds
+
+    cds = rng.uniform(-extension_grados, extension_grados, size=(num_cds, 2))
+    if distribucion == 'uniforme':
+        tiendas = rng.uniform(-extension_grados, extension_grados, size=(num_tiendas, 2))
+    else:
+        if num_grupos is None:
+            num_grupos = max(1, int(np.sqrt(num_tiendas) / 2))
+        centros = rng.uniform(-extension_grados, extension_grados, size=(num_grupos, 2))
+        grupo = rng.integers(num_grupos, size=num_tiendas)
+        tiendas = centros[grupo] + rng.normal(0.0, dispersion_grupo, size=(num_tiendas, 2))
+
+    coordenadas = np.vstack((cds, tiendas)) + (lat_base, lon_base)
+    return pd.DataFrame({
+        'Nombre': [f'CD {i}' for i in range(num_cds)] + [f'Tienda {i}' for i in range(num_tiendas)],
+        'Tipo': ['CD'] * num_cds + ['Tienda'] * num_tiendas,
+        'Latitud': coordenadas[:, 0],
+        'Longitud': coordenadas[:, 1],
+    })
+
+def _ordenar_nodos(df_nodos):
+    """
+    Orden canónico de la tabla (tiendas y después CDs, orden estable) con ID_NUMERICO =
+    posición. Es idempotente: la huella de la instancia en la caché se calcula sobre
+    las coordenadas en este orden, tanto para la tabla como para sus matrices.
+    """
+    df_nodos = df_nodos.sort_values(by='Tipo', ascending=False, kind='stable').reset_index(drop=True)
+    df_nodos['ID_NUMERICO'] = df_nodos.index # ID de 0 a N-1
+    return df_nodos
+
+def _huella_instancia(df_nodos):
+    """Huella de una tabla ya en orden canónico (ver _ordenar_nodos)."""
+    return cache_instancias.huella_coordenadas(df_nodos[['Latitud', 'Longitud']].values)
+
+def _guardar_en_cache(huella, nombre, matriz, directorio_cache):
+    """
+    Guarda la matriz en la caché y la devuelve mapeada con la ruta de su archivo; si
+    la caché no se puede escribir devuelve la matriz en memoria y None (sin caché).
     """
-    df_nodos = None
     try:
-        df_nodos = pd.read_excel(RUTA_EXCEL)
-        if len(df_nodos) != NUM_NODOS:
-            raise ValueError(f"El archivo debe tener {NUM_NODOS} filas. Se encontraron {len(df_nodos)}.")
-            
-    except FileNotFoundError:
-        df_nodos = _generar_datos_ficticios()
-    except Exception as e:
-        print(f"Error al leer el archivo: {e}")
-        df_nodos = _generar_datos_ficticios()
-        
+        matriz = cache_instancias.guardar_matriz(huella, nombre, matriz, directorio_cache)
+    except OSError as e:
+        print(f"Aviso: no se pudo escribir la caché en '{directorio_cache}' ({e}); se continúa sin caché.")
+        return matriz, None
+    return matriz, cache_instancias.ruta_matriz(huella, nombre, directorio_cache)
+
+def _matriz_desde_cache(coordenadas, huella, dtype, directorio_cache):
+    """
+    Busca la matriz de distancias de la instancia 'huella' en la caché; si no está,
+    la calcula y la guarda. Devuelve (matriz, ruta_archivo).
+    """
+    nombre_distancia = f"distancia_{np.dtype(dtype).name}"
+
+    matriz_distancia = cache_instancias.cargar_matriz(huella, nombre_distancia, directorio_cache)
+    if matriz_distancia is not None:
+        print(f"Matriz de distancia cargada de la caché ({huella}).")
+        return matriz_distancia, cache_instancias.ruta_matriz(huella, nombre_distancia, directorio_cache)
+
+    print(f"Calculando Matriz de Distancia (Haversine) para {len(coordenadas)} nodos...")
+    return _guardar_en_cache(huella, nombre_distancia, matriz_haversine(coordenadas, dtype=dtype),
+                             directorio_cache)
+
+def _matriz_vial_desde_cache(coordenadas, huella, archivo_grafo, dtype, directorio_cache):
+    """
+    Matriz de distancias por calle (ver red_vial.py), siempre con caché en disco: la
+    llave combina la huella de la instancia y la del contenido del archivo del grafo,
+    así que cambiar cualquiera de los dos la recalcula. Devuelve (matriz, ruta_archivo).
+    """
+    nombre_distancia = f"distancia_vial_{huella_archivo(archivo_grafo)}_{np.dtype(dtype).name}"
+
+    matriz_distancia = cache_instancias.cargar_matriz(huella, nombre_distancia, directorio_cache)
+    if matriz_distancia is not None:
+        print(f"Matriz de distancia vial cargada de la caché ({huella}).")
+        return matriz_distancia, cache_instancias.ruta_matriz(huella, nombre_distancia, directorio_cache)
+
+    grafo = GrafoVial.desde_archivo(archivo_grafo)
+    print(f"Calculando Matriz de Distancia vial (Dijkstra, {grafo.num_vertices} vértices) "
+          f"para {len(coordenadas)} nodos...")
+    return _guardar_en_cache(huella, nombre_distancia, grafo.matriz_distancias(coordenadas, dtype=dtype),
+                             directorio_cache)
+
+def _armar_datos(df_nodos, matriz_distancia, archivo_matriz_distancia=None, archivo_grafo=None):
+    """Diccionario de datos de una tabla de nodos ya numerada (ID_NUMERICO = posición) y su matriz."""
+    # Matriz de Costos de Combustible (vista derivada de la de distancias)
+    matriz_costo = MatrizCostoDerivada(matriz_distancia, FACTOR_COMBUSTIBLE_POR_KM)
+
+    # columnas opcionales de restricciones (capacidad y ventanas de tiempo)
+    demandas = ventanas = tiempos_servicio = None
+    if 'Demanda' in df_nodos:
+        demandas = df_nodos['Demanda'].fillna(0.0).to_numpy(dtype=np.float64)
+    if 'Ventana_Inicio' in df_nodos or 'Ventana_Fin' in df_nodos:
+        vacia = pd.Series(np.nan, index=df_nodos.index)
+        ventanas = np.column_stack((
+            df_nodos.get('Ventana_Inicio', vacia).fillna(0.0).to_numpy(dtype=np.float64),
+            df_nodos.get('Ventana_Fin', vacia).fillna(np.inf).to_numpy(dtype=np.float64)))
+    if 'Tiempo_Servicio' in df_nodos:
+        tiempos_servicio = df_nodos['Tiempo_Servicio'].fillna(0.0).to_numpy(dtype=np.float64)
+
+    datos = {
+        'df_nodos': df_nodos,
+        'num_nodos': len(df_nodos),
+        'indices_cds': df_nodos[df_nodos['Tipo'] == 'CD']['ID_NUMERICO'].tolist(),
+        'indices_tiendas': df_nodos[df_nodos['Tipo'] == 'Tienda']['ID_NUMERICO'].tolist(),
+        'matriz_distancia': matriz_distancia,
+        'matriz_costo': matriz_costo,
+        'factor_combustible': FACTOR_COMBUSTIBLE_POR_KM,
+        # nombres indexados por ID, para formatear rutas sin consultar el DataFrame
+        'nombres_nodos': df_nodos['Nombre'].to_numpy(dtype=object),
+        # (latitud, longitud) por ID, para heurísticas geométricas (p. ej. barrido polar)
+        'coordenadas': df_nodos[['Latitud', 'Longitud']].to_numpy(dtype=np.float64),
+        # archivo .npy de la matriz (solo con caché); los procesos lo abren mapeado
+        'archivo_matriz_distancia': archivo_matriz_distancia,
+        # red de calles de la que salió la matriz (None: línea recta)
+        'archivo_grafo': archivo_grafo,
+        # restricciones opcionales por nodo (None si la tabla no trae esas columnas)
+        'demandas': demandas,
+        'ventanas': ventanas,
+        'tiempos_servicio': tiempos_servicio
+    }
+    return datos
+
+def procesar_nodos(df_nodos, dtype=np.float64, usar_cache=False,
+                   directorio_cache=cache_instancias.DIRECTORIO_CACHE,
+                   modo='auto', k_vecinos=K_VECINOS_DISPERSOS, archivo_grafo=None):
+    """
+    Asigna IDs a una tabla de nodos (columnas Nombre, Tipo, Latitud, Longitud)
+    y calcula las matrices. El número de nodos y de CDs se toma de la tabla.
+    Con 'usar_cache' las matrices se leen/guardan en disco como .npy mapeados en memoria.
+    'modo' elige la matriz de distancias: 'denso' (N x N), 'disperso' (coordenadas +
+    k vecinos + cálculo bajo demanda, para instancias grandes) o 'auto' (disperso
+    a partir de UMBRAL_NODOS_DENSO nodos). La matriz de costos siempre es una vista
+    derivada (distancia * factor), no una segunda matriz.
+    Con 'archivo_grafo' (lista de aristas de la red de calles, ver red_vial.py) las
+    distancias son por calle en lugar de en línea recta; esa matriz es densa y siempre
+    se guarda en la caché de 'directorio_cache'.
+    Columnas opcionales para las restricciones (ver restricciones.py): 'Demanda',
+    'Ventana_Inicio' y 'Ventana_Fin' (minutos desde el inicio de la jornada) y
+    'Tiempo_Servicio' (minutos); las celdas vacías no restringen.
+    """
     # preparación de datos: asignamos IDs
-    df_nodos = df_nodos.sort_values(by='Tipo', ascending=False).reset_index(drop=True)
-    df_nodos['ID_NUMERICO'] = df_nodos.index # ID de 0 a 99
+    df_nodos = _ordenar_nodos(df_nodos)
+    num_nodos = len(df_nodos)
     
     coordenadas = df_nodos[['Latitud', 'Longitud']].values
 
@@ -63,33 +212,142 @@ def cargar_y_procesar_datos():
     indices_cds = df_nodos[df_nodos['Tipo'] == 'CD']['ID_NUMERICO'].tolist()
     indices_tiendas = df_nodos[df_nodos['Tipo'] == 'Tienda']['ID_NUMERICO'].tolist()
     
-    if len(indices_cds) != NUM_CDS:
-        print("Error: No se detectaron 10 Centros de Distribución correctamente.")
+    if not indices_cds:
+        print("Error: No se detectó ningún Centro de Distribución.")
         return None
 
-    # creación de la matriz de distancias (Haversine)
-    matriz_distancia = np.zeros((NUM_NODOS, NUM_NODOS))
-    print("Calculando Matriz de Distancia (Haversine)...")
-    for i in range(NUM_NODOS):
-        for j in range(NUM_NODOS):
-            if i != j:
-                matriz_distancia[i, j] = haversine(
-                    coordenadas[i, 0], coordenadas[i, 1],
-                    coordenadas[j, 0], coordenadas[j, 1]
-                )
+    if archivo_grafo is not None and modo == 'disperso':
+        raise ValueError("La matriz de distancias por calle solo existe en modo denso.")
+    if modo == 'auto':
+        modo = 'disperso' if num_nodos >= UMBRAL_NODOS_DENSO and archivo_grafo is None else 'denso'
 
-    # creación de la Matriz de Costos de Combustible
-    matriz_costo = matriz_distancia * FACTOR_COMBUSTIBLE_POR_KM
+    archivo_matriz_distancia = None
+    if archivo_grafo is not None:
+        matriz_distancia, archivo_matriz_distancia = \
+            _matriz_vial_desde_cache(coordenadas, _huella_instancia(df_nodos), archivo_grafo,
+                                     dtype, directorio_cache)
+    elif modo == 'disperso':
+        print(f"Modo disperso: {k_vecinos} vecinos por nodo para {num_nodos} nodos...")
+        matriz_distancia = MatrizDistanciaDispersa(coordenadas, k=k_vecinos, dtype=dtype)
+    elif usar_cache:
+        matriz_distancia, archivo_matriz_distancia = \
+            _matriz_desde_cache(coordenadas, _huella_instancia(df_nodos), dtype, directorio_cache)
+    else:
+        # creación de la matriz de distancias (Haversine vectorizado por bloques)
+        print(f"Calculando Matriz de Distancia (Haversine) para {num_nodos} nodos...")
+        matriz_distancia = matriz_haversine(coordenadas, dtype=dtype)
 
     print("Matrices de Distancia y Costo creadas exitosamente.")
+    return _armar_datos(df_nodos, matriz_distancia, archivo_matriz_distancia, archivo_grafo)
 
-    datos = {
-        'df_nodos': df_nodos,
-        'num_nodos': NUM_NODOS,
-        'indices_cds': indices_cds,      
-        'indices_tiendas': indices_tiendas, 
-        'matriz_distancia': matriz_distancia,
-        'matriz_costo': matriz_costo,
-        'factor_combustible': FACTOR_COMBUSTIBLE_POR_KM
-    }
-    return datos
\ No newline at end of file
+def actualizar_nodos(datos, cambios):
+    """
+    Aplica a 'datos' un cambio de tiendas sin reprocesar la instancia completa.
+    'cambios' admite las llaves (todas opcionales):
+      - 'altas': tiendas nuevas (DataFrame o lista de dicts con Nombre, Latitud,
+        Longitud y, si se usan, las columnas de restricciones)
+      - 'bajas': nombres de las tiendas que cierran
+      - 'movidas': tiendas que cambian de lugar (Nombre, Latitud, Longitud)
+    Los nodos se renumeran con la misma convención (tiendas y después CDs). Las
+    distancias entre nodos que no cambiaron se copian de la matriz anterior y solo se
+    calculan las filas y columnas de los nodos nuevos o movidos (por calle si 'datos'
+    salió de una red vial). Devuelve (nuevos datos, ID anterior de cada nodo o -1 si es
+    nuevo, IDs nuevos de los nodos agregados o movidos).
+    """
+    df_previo = datos['df_nodos']
+    altas = pd.DataFrame(cambios.get('altas', []))
+    bajas = set(cambios.get('bajas', []))
+    movidas = pd.DataFrame(cambios.get('movidas', []))
+
+    tiendas_previas = set(df_previo.loc[df_previo['Tipo'] == 'Tienda', 'Nombre'])
+    desconocidas = (bajas | set(movidas.get('Nombre', []))) - tiendas_previas
+    if desconocidas:
+        raise ValueError(f"Tiendas inexistentes en los cambios: {', '.join(map(str, sorted(desconocidas)))}")
+    repetidas = set(altas.get('Nombre', [])) & set(df_previo['Nombre'])
+    if repetidas:
+        raise ValueError(f"Las altas repiten nombres existentes: {', '.join(map(str, sorted(repetidas)))}")
+
+    conservados = df_previo[~df_previo['Nombre'].isin(bajas)].copy()
+    movido = conservados['Nombre'].isin(set(movidas.get('Nombre', [])))
+    if movido.any():
+        nuevas_coordenadas = movidas.set_index('Nombre')[['Latitud', 'Longitud']]
+        conservados.loc[movido, ['Latitud', 'Longitud']] = \
+            nuevas_coordenadas.loc[conservados.loc[movido, 'Nombre']].to_numpy()
+    altas = altas.assign(Tipo='Tienda', ID_NUMERICO=-1)
+
+    es_tienda = conservados['Tipo'] == 'Tienda'
+    df_nodos = pd.concat([conservados[es_tienda], altas, conservados[~es_tienda]], ignore_index=True)
+    ids_previos = df_nodos['ID_NUMERICO'].to_numpy(dtype=np.int64)
+    movidos = np.concatenate((movido[es_tienda].to_numpy(), np.zeros(len(altas), dtype=bool),
+                              movido[~es_tienda].to_numpy()))
+    df_nodos['ID_NUMERICO'] = df_nodos.index
+    afectados = np.flatnonzero((ids_previos < 0) | movidos)
+    coordenadas = df_nodos[['Latitud', 'Longitud']].to_numpy(dtype=np.float64)
+
+    matriz_previa = datos['matriz_distancia']
+    archivo_grafo = datos.get('archivo_grafo')
+    if not isinstance(matriz_previa, np.ndarray):
+        # modo disperso: la estructura es O(N * k) y se reconstruye con las nuevas coordenadas
+        matriz_distancia = MatrizDistanciaDispersa(coordenadas, k=matriz_previa.vecinos.shape[1],
+                                                   dtype=matriz_previa.dtype)
+    else:
+        matriz_distancia = np.empty((len(df_nodos), len(df_nodos)), dtype=matriz_previa.dtype)
+        sin_cambio = np.flatnonzero(ids_previos >= 0)
+        sin_cambio = sin_cambio[~movidos[sin_cambio]]
+        matriz_distancia[np.ix_(sin_cambio, sin_cambio)] = \
+            matriz_previa[np.ix_(ids_previos[sin_cambio], ids_previos[sin_cambio])]
+        if len(afectados):
+            if archivo_grafo is not None:
+                filas = GrafoVial.desde_archivo(archivo_grafo).filas_distancias(
+                    afectados, coordenadas, dtype=matriz_previa.dtype)
+            else:
+                filas = matriz_haversine(coordenadas[afectados], coordenadas, dtype=matriz_previa.dtype)
+            matriz_distancia[afectados, :] = filas
+            matriz_distancia[:, afectados] = filas.T
+
+    print(f"Nodos actualizados: {len(altas)} altas, {len(bajas)} bajas, {int(movidos.sum())} movidas "
+          f"({len(afectados)} filas de la matriz recalculadas).")
+    return _armar_datos(df_nodos, matriz_distancia, None, archivo_grafo), ids_previos, afectados
+
+def cargar_y_procesar_datos(ruta_excel=RUTA_EXCEL, dtype=np.float64, usar_cache=True,
+                            directorio_cache=cache_instancias.DIRECTORIO_CACHE, modo='auto',
+                            archivo_grafo=None):
+    """
+    Carga el archivo de coordenadas, asigna IDs, y calcula las matrices.
+    'dtype' permite usar float32 para reducir a la mitad la memoria en redes grandes.
+    Con 'usar_cache' la tabla leída del Excel y las matrices se guardan en disco
+    y las siguientes ejecuciones las reutilizan sin leer el Excel ni recalcular.
+    Con 'archivo_grafo' las distancias se calculan sobre la red de calles.
+    """
+    df_nodos = None
+    if usar_cache:
+        df_nodos = cache_instancias.cargar_tabla_nodos(ruta_excel, directorio_cache)
+
+    if df_nodos is None:
+        try:
+            df_nodos = pd.read_excel(ruta_excel)
+            if df_nodos.empty:
+                raise ValueError("El archivo no contiene nodos.")
+        except FileNotFoundError:
+            # los datos ficticios cambian en cada ejecución: no se guardan en la caché
+            df_nodos = _generar_datos_ficticios()
+            usar_cache = False
+        except Exception as e:
+            print(f"Error al leer el archivo: {e}")
+            df_nodos = _generar_datos_ficticios()
+            usar_cache = False
+        else:
+            if usar_cache:
+                # se guarda ya ordenada: la tabla y sus matrices comparten la misma huella.
+                # un error de la caché solo la desactiva; nunca cambia la instancia
+                df_nodos = _ordenar_nodos(df_nodos)
+                try:
+                    cache_instancias.guardar_tabla_nodos(ruta_excel, df_nodos, directorio_cache,
+                                                         huella=_huella_instancia(df_nodos))
+                except OSError as e:
+                    print(f"Aviso: no se pudo escribir la caché en '{directorio_cache}' ({e}); "
+                          f"se continúa sin caché.")
+                    usar_cache = False
+
+    return procesar_nodos(df_nodos, dtype=dtype, usar_cache=usar_cache,
+                          directorio_cache=directorio_cache, modo=modo, archivo_grafo=archivo_grafo)
@@ -0,0 +1,194 @@
+import math
+import os
+import random
+import time
+import numpy as np
+from multiprocessing import Pool
+from model import Solucion
+from data_loader import _armar_datos
+from utils import matriz_haversine
+from construccion import asignar_cd_mas_cercano
+from metaheuristica import recocido_simulado
+from alns import busqueda_alns
+from busqueda_local import BusquedaLocal
+from restricciones import crear_restricciones
+from vecindario import obtener_vecinos_cercanos, K_VECINOS
+
+# formas de partir las tiendas: por CD más cercano (Voronoi de los CDs) o por k-means
+PARTICIONES = ('cd', 'kmeans')
+
+# tamaño objetivo de cada partición en k-means (número de regiones = tiendas / este valor)
+TIENDAS_POR_PARTICION = 2000
+
+# iteraciones de Lloyd del k-means
+ITERACIONES_KMEANS = 20
+
+# una tienda es de frontera si alguno de sus K_FRONTERA vecinos cae en otra partición
+K_FRONTERA = K_VECINOS
+
+# solucionadores que pueden correr en cada partición
+SOLUCIONADORES = {'recocido': recocido_simulado, 'alns': busqueda_alns}
+
+
+def _kmeans(puntos, num_grupos, rng, iteraciones=ITERACIONES_KMEANS):
+    """k-means (Lloyd) con inicio k-means++; devuelve la etiqueta de cada punto."""
+    centros = [puntos[rng.integers(len(puntos))]]
+    distancia_2 = ((puntos - centros[0]) ** 2).sum(axis=1)
+    for _ in range(1, num_grupos):
+        centros.append(puntos[rng.choice(len(puntos), p=distancia_2 / distancia_2.sum())])
+        distancia_2 = np.minimum(distancia_2, ((puntos - centros[-1]) ** 2).sum(axis=1))
+    centros = np.array(centros)
+
+    etiquetas = None
+    for _ in range(iteraciones):
+        # |p - c|^2 = |p|^2 - 2 p.c + |c|^2 (|p|^2 no cambia el argmin)
+        nuevas = np.argmin((centros ** 2).sum(axis=1) - 2 * puntos @ centros.T, axis=1)
+        if etiquetas is not None and np.array_equal(nuevas, etiquetas):
+            break
+        etiquetas = nuevas
+        conteo = np.bincount(etiquetas, minlength=num_grupos)
+        sumas = np.zeros_like(centros)
+        np.add.at(sumas, etiquetas, puntos)
+        con_puntos = conteo > 0
+        centros[con_puntos] = sumas[con_puntos] / conteo[con_puntos, np.newaxis]
+    return etiquetas
+
+
+def particionar(datos, metodo='kmeans', tiendas_por_particion=TIENDAS_POR_PARTICION, semilla=0):
+    """
+    Parte las tiendas en regiones (ver PARTICIONES). Devuelve la etiqueta de partición
+    de cada nodo (-1 para los CDs) y, por partición, los CDs que participan: en 'cd' el
+    propio CD; en 'kmeans' los CDs más cercanos a alguna de sus tiendas (un CD en el
+    borde de dos regiones saca una ruta en cada una).
+    """
+    if metodo not in PARTICIONES:
+        raise ValueError(f"Partición desconocida: {metodo}. Opciones: {', '.join(PARTICIONES)}")
+    tiendas = np.asarray(datos['indices_tiendas'], dtype=np.int64)
+    etiquetas = np.full(datos['num_nodos'], -1, dtype=np.int64)
+
+    asignacion = asignar_cd_mas_cercano(datos)
+    cd_de_tienda = np.empty(datos['num_nodos'], dtype=np.int64)
+    for cd, suyas in asignacion.items():
+        cd_de_tienda[suyas] = cd
+
+    if metodo == 'cd':
+        cds = [cd for cd in datos['indices_cds'] if len(asignacion[cd])]
+        for p, cd in enumerate(cds):
+            etiquetas[asignacion[cd]] = p
+        return etiquetas, [[cd] for cd in cds]
+
+    # coordenadas proyectadas (equirectangular): basta para agrupar una ciudad o región
+    coordenadas = datos['coordenadas'][tiendas]
+    puntos = np.column_stack((coordenadas[:, 1] * np.cos(np.radians(coordenadas[:, 0].mean())),
+                              coordenadas[:, 0]))
+    num_grupos = max(1, min(len(tiendas), math.ceil(len(tiendas) / tiendas_por_particion)))
+    grupos = _kmeans(puntos, num_grupos, np.random.default_rng(semilla))
+    # regiones vacías fuera: las etiquetas quedan consecutivas
+    _, grupos = np.unique(grupos, return_inverse=True)
+    etiquetas[tiendas] = grupos.ravel()
+    cds_por_particion = [np.unique(cd_de_tienda[tiendas[grupos.ravel() == p]]).tolist()
+                         for p in range(int(grupos.max()) + 1)]
+    return etiquetas, cds_por_particion
+
+
+def _subinstancia(datos, tiendas, cds):
+    """
+    Tabla de nodos (tiendas y luego CDs, renumerados) de una partición y su submatriz si
+    la matriz global es densa (p. ej. por calle); si no, el trabajador usa Haversine.
+    """
+    nodos = np.concatenate((tiendas, cds)).astype(np.int64)
+    df_nodos = datos['df_nodos'].iloc[nodos].reset_index(drop=True)
+    df_nodos['ID_NUMERICO'] = df_nodos.index
+    submatriz = None
+    if isinstance(datos['matriz_distancia'], np.ndarray):
+        submatriz = np.asarray(datos['matriz_distancia'][np.ix_(nodos, nodos)])
+    return nodos, df_nodos, submatriz
+
+
+def _tarea_particion(args):
+    """Resuelve una partición dentro de un proceso trabajador; devuelve sus rutas con IDs globales."""
+    indice, nodos, df_nodos, submatriz, params, semilla, solucionador = args
+    inicio = time.perf_counter()
+    if submatriz is None:
+        submatriz = matriz_haversine(df_nodos[['Latitud', 'Longitud']].to_numpy(dtype=np.float64))
+    datos_particion = _armar_datos(df_nodos, submatriz)
+
+    estadisticas = {'particion': indice, 'tiendas': len(datos_particion['indices_tiendas']),
+                    'semilla': semilla}
+    solucion = SOLUCIONADORES[solucionador](datos_particion, params, rng=random.Random(semilla),
+                                            estadisticas=estadisticas)
+    estadisticas['tiempo_s'] = time.perf_counter() - inicio
+    rutas = [nodos[ruta].tolist() for ruta in solucion.rutas if len(ruta) > 2]
+    return rutas, estadisticas
+
+
+def tiendas_frontera(datos, etiquetas, k=K_FRONTERA):
+    """Tiendas con alguno de sus k vecinos más cercanos (tiendas) en otra partición."""
+    tiendas = np.asarray(datos['indices_tiendas'], dtype=np.int64)
+    vecinos = obtener_vecinos_cercanos(datos, k)[tiendas]
+    etiqueta_vecinos = etiquetas[vecinos]
+    otra = (etiqueta_vecinos >= 0) & (etiqueta_vecinos != etiquetas[tiendas][:, np.newaxis])
+    return tiendas[otra.any(axis=1)]
+
+
+def resolver_por_particiones(datos, params, metodo='kmeans', tiendas_por_particion=TIENDAS_POR_PARTICION,
+                             num_procesos=None, semilla=0, solucionador='recocido'):
+    """
+    Descomposición para instancias muy grandes:
+      1. parte las tiendas por CD o por regiones k-means (ver particionar)
+      2. resuelve cada partición como una instancia independiente (con su propia
+         matriz densa) en un pool de procesos, con 'solucionador' ('recocido' o 'alns')
+         y los mismos 'params' (p. ej. 'tiempo_limite_s' por partición)
+      3. junta las rutas en una sola Solucion sobre 'datos'
+      4. reparación de fronteras: búsqueda local que parte de las tiendas de frontera;
+         sus movimientos entre rutas dejan que esas tiendas pasen a una partición vecina
+    Las particiones se reparten de la más grande a la más chica para equilibrar los
+    procesos. Con capacidad o ventanas de tiempo la reparación se omite (la búsqueda
+    local no las considera). Devuelve la solución y un diccionario de estadísticas
+    (con las de cada partición en 'particiones').
+    """
+    if solucionador not in SOLUCIONADORES:
+        raise ValueError(f"Solucionador desconocido: {solucionador}. Opciones: {', '.join(SOLUCIONADORES)}")
+    inicio = time.perf_counter()
+    etiquetas, cds_por_particion = particionar(datos, metodo, tiendas_por_particion, semilla)
+    num_particiones = len(cds_por_particion)
+
+    tareas = []
+    for p in range(num_particiones):
+        nodos, df_nodos, submatriz = _subinstancia(datos, np.flatnonzero(etiquetas == p), cds_por_particion[p])
+        tareas.append((p, nodos, df_nodos, submatriz, params, semilla + p, solucionador))
+    tareas.sort(key=lambda tarea: -len(tarea[1]))
+
+    print(f"\n--- DESCOMPOSICIÓN ({num_particiones} particiones por '{metodo}', "
+          f"{len(datos['indices_tiendas'])} tiendas) ---")
+    with Pool(processes=min(num_procesos or os.cpu_count(), num_particiones)) as pool:
+        resultados = list(pool.imap_unordered(_tarea_particion, tareas))
+    segundos_particiones = time.perf_counter() - inicio
+
+    resultados.sort(key=lambda resultado: resultado[1]['particion'])
+    rutas = [ruta for rutas_particion, _ in resultados for ruta in rutas_particion]
+    solucion = Solucion(rutas, datos['matriz_distancia'])
+    costo_fusion = solucion.costo_global
+
+    frontera = tiendas_frontera(datos, etiquetas)
+    restricciones = crear_restricciones(datos, params)
+    if restricciones is None:
+        BusquedaLocal(datos, params.get('k_busqueda_local', K_VECINOS)).mejorar(solucion, nodos=frontera)
+        solucion.evaluar_costo_global(datos['matriz_distancia'])
+    else:
+        restricciones.preparar(solucion)
+
+    estadisticas = {
+        'particiones': [est for _, est in resultados],
+        'costo_fusion': costo_fusion,
+        'tiendas_frontera': len(frontera),
+        'mejor_costo': solucion.costo_global,
+        'segundos_particiones': segundos_particiones,
+        'segundos': time.perf_counter() - inicio,
+    }
+    for est in estadisticas['particiones']:
+        print(f"Partición {est['particion']} ({est['tiendas']} tiendas): "
+              f"Mejor Costo {est['mejor_costo']:.2f} km en {est['tiempo_s']:.2f} s")
+    print(f"Fusión: {costo_fusion:.2f} km; tras reparar {len(frontera)} tiendas de frontera: "
+          f"{solucion.costo_global:.2f} km")
+    return solucion, estadisticas
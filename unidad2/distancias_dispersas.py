@@ -0,0 +1,121 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from scipy.spatial import cKDTree
+from utils import R_TIERRA, _haversine_radianes
+
+# vecinos cercanos que se guardan por nodo en la estructura dispersa
+K_VECINOS_DISPERSOS = 20
+
+# pares (i, j) que se recuerdan en la caché LRU de distancias sueltas
+TAM_CACHE_LRU = 1_000_000
+
+
+class MatrizDistanciaDispersa:
+    """
+    Sustituto de la matriz de distancias densa para instancias grandes.
+    Guarda solo las coordenadas y el índice de los k vecinos más cercanos de cada
+    nodo (para el vecindario granular); las distancias se calculan al pedirlas.
+    Se indexa igual que la matriz densa:
+      - matriz[i, j] con enteros: distancia Haversine (con caché LRU acotada)
+      - matriz[filas, columnas] con arreglos: cálculo vectorizado con broadcasting
+    La memoria es O(N * k) en lugar de O(N^2).
+    """
+
+    def __init__(self, coordenadas, k=K_VECINOS_DISPERSOS, tam_cache=TAM_CACHE_LRU, dtype=np.float64):
+        radianes = np.radians(np.asarray(coordenadas, dtype=np.float64))
+        self.num_nodos = radianes.shape[0]
+        self.shape = (self.num_nodos, self.num_nodos)
+        self.dtype = np.dtype(dtype)
+        self.tam_cache = tam_cache
+
+        self._lat = np.ascontiguousarray(radianes[:, 0])
+        self._lon = np.ascontiguousarray(radianes[:, 1])
+        self._cos_lat = np.cos(self._lat)
+        # copias como listas de Python: el acceso por elemento es más rápido en el caso escalar
+        self._lat_lista = self._lat.tolist()
+        self._lon_lista = self._lon.tolist()
+        self._cos_lista = self._cos_lat.tolist()
+        self._cache = OrderedDict()
+
+        self.vecinos = self._calcular_vecinos(min(k, self.num_nodos - 1))
+
+    def _calcular_vecinos(self, k):
+        """k vecinos más cercanos con un KD-tree sobre la esfera unitaria (la cuerda es monótona con el arco)."""
+        puntos = np.column_stack((self._cos_lat * np.cos(self._lon),
+                                  self._cos_lat * np.sin(self._lon),
+                                  np.sin(self._lat)))
+        _, indices = cKDTree(puntos).query(puntos, k=k + 1)
+        indices = indices.reshape(self.num_nodos, k + 1)
+
+        # quitar al propio nodo (normalmente en la columna 0, salvo coordenadas repetidas)
+        no_propio = indices != np.arange(self.num_nodos)[:, np.newaxis]
+        orden = np.argsort(~no_propio, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(indices, orden, axis=1).astype(np.int32)
+
+    def vecinos_cercanos(self, k):
+        """Índice (N, k) de vecinos más cercanos ordenados por distancia."""
+        if k > self.vecinos.shape[1]:
+            self.vecinos = self._calcular_vecinos(min(k, self.num_nodos - 1))
+        return self.vecinos[:, :k]
+
+    def _distancia(self, i, j):
+        lat, lon, cos_lat = self._lat_lista, self._lon_lista, self._cos_lista
+        a = math.sin((lat[j] - lat[i]) / 2)**2 + \
+            cos_lat[i] * cos_lat[j] * math.sin((lon[j] - lon[i]) / 2)**2
+        return 2 * R_TIERRA * math.asin(math.sqrt(min(1.0, a)))
+
+    def __getitem__(self, clave):
+        if not isinstance(clave, tuple):
+            clave = (clave, slice(None)) # matriz[filas] equivale a matriz[filas, :]
+        i, j = clave
+        if isinstance(i, (int, np.integer)) and isinstance(j, (int, np.integer)):
+            # par suelto: caché LRU con llave simétrica
+            i, j = int(i), int(j)
+            llave = i * self.num_nodos + j if i <= j else j * self.num_nodos + i
+            cache = self._cache
+            distancia = cache.get(llave)
+            if distancia is None:
+                distancia = self._distancia(i, j)
+                cache[llave] = distancia
+                if len(cache) > self.tam_cache:
+                    cache.popitem(last=False)
+            else:
+                cache.move_to_end(llave)
+            return distancia
+
+        # filas/columnas como arreglos (o slices): cálculo vectorizado; un slice
+        # recorre un eje completo como en NumPy (p. ej. matriz[i, :] es una fila)
+        todos = np.arange(self.num_nodos)
+        if isinstance(j, slice):
+            j = todos[j]
+            i = todos[i][:, np.newaxis] if isinstance(i, slice) else np.asarray(i)[..., np.newaxis]
+        elif isinstance(i, slice):
+            j = np.asarray(j)
+            i = todos[i].reshape((-1,) + (1,) * j.ndim)
+        else:
+            i, j = np.asarray(i), np.asarray(j)
+        distancias = _haversine_radianes(self._lat[i], self._lon[i], self._cos_lat[i],
+                                         self._lat[j], self._lon[j], self._cos_lat[j])
+        return distancias.astype(self.dtype, copy=False)
+
+    def __getstate__(self):
+        # la caché LRU no se envía a otros procesos
+        estado = self.__dict__.copy()
+        estado['_cache'] = OrderedDict()
+        return estado
+
+
+class MatrizCostoDerivada:
+    """
+    Vista de la matriz de costos de combustible: costo = distancia * factor,
+    calculado al indexar, sin guardar una segunda matriz N x N.
+    """
+
+    def __init__(self, matriz_distancia, factor):
+        self.matriz_distancia = matriz_distancia
+        self.factor = factor
+        self.shape = matriz_distancia.shape
+
+    def __getitem__(self, clave):
+        return self.matriz_distancia[clave] * self.factor
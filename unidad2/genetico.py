@@ -0,0 +1,250 @@
+import random
+import time
+import numpy as np
+from model import Solucion
+from construccion import construir_rutas, CONSTRUCTORES
+from busqueda_local import BusquedaLocal
+from restricciones import crear_restricciones
+from observadores import Notificador
+from vecindario import K_VECINOS
+
+# individuos de la población
+TAMANO_POBLACION = 30
+
+# participantes de cada torneo de selección
+TAMANO_TORNEO = 2
+
+# probabilidad de mutar al hijo (inversión de un tramo del tour) y de educarlo con búsqueda local
+PROB_MUTACION = 0.2
+PROB_BUSQUEDA_LOCAL = 1.0
+
+# inversiones aleatorias con que se diversifican las copias de la población inicial
+MUTACIONES_INICIALES = 3
+
+# dos individuos con costos a menos de esta distancia se consideran el mismo (diversidad)
+TOLERANCIA_DUPLICADO = 1e-6
+
+# hijos por defecto (sin tiempo límite) y cada cuántos se reporta el progreso
+HIJOS_GENETICO = 2000
+HIJOS_PROGRESO = 50
+
+
+def tour_gigante(solucion, es_cd):
+    """Codificación del individuo: las tiendas de todas las rutas en orden, sin los CDs."""
+    return solucion.tour[~es_cd[solucion.tour]].astype(np.int64)
+
+
+def adyacencias(solucion, es_cd):
+    """Predecesor y sucesor de cada tienda en las rutas (-1 en filas de CDs)."""
+    tour = solucion.tour
+    posiciones = np.flatnonzero(~es_cd[tour]) # nunca en los extremos: las rutas empiezan y terminan en CD
+    ady = np.full((len(es_cd), 2), -1, dtype=np.int64)
+    ady[tour[posiciones], 0] = tour[posiciones - 1]
+    ady[tour[posiciones], 1] = tour[posiciones + 1]
+    return ady
+
+
+def aristas_nuevas(ady_hijo, ady_padres, tiendas):
+    """Tiendas del hijo con alguna arista que no está en ninguno de los padres."""
+    nuevas = np.zeros(len(tiendas), dtype=bool)
+    for lado in range(2):
+        vecino = ady_hijo[tiendas, lado][:, np.newaxis]
+        en_padres = np.zeros(len(tiendas), dtype=bool)
+        for ady in ady_padres:
+            en_padres |= (ady[tiendas] == vecino).any(axis=1)
+        nuevas |= ~en_padres
+    return tiendas[nuevas]
+
+
+def dividir_tour(tour, matriz_distancia, indices_cds):
+    """
+    Decodificación (split) del tour gigante en rutas de CDs. Cada tramo consecutivo de
+    tiendas sale de su mejor CD; la programación dinámica
+        V[j] = P[j-1] + min_d (D[t_(j-1), d] + M_d),
+        M_d = min_(i<j) (V[i] - P[i] + D[d, t_i])
+    (P: distancia acumulada sobre el tour) lleva el mínimo M_d por CD, así que cuesta
+    O(n * CDs) en lugar del O(n^2) del split clásico. Los tramos de un mismo CD se
+    encadenan en una sola ruta (con la desigualdad del triángulo no empeora).
+    Devuelve una ruta por CD (vacía si ninguno de sus tramos quedó en el tour).
+    """
+    tour = np.asarray(tour, dtype=np.int64)
+    cds = np.asarray(indices_cds, dtype=np.int64)
+    n = len(tour)
+    if n == 0:
+        return [[cd, cd] for cd in cds.tolist()]
+    desde_cd = np.asarray(matriz_distancia[cds[:, np.newaxis], tour[np.newaxis, :]], dtype=np.float64)
+    hacia_cd = np.asarray(matriz_distancia[tour[np.newaxis, :], cds[:, np.newaxis]], dtype=np.float64)
+    P = np.zeros(n)
+    np.cumsum(np.asarray(matriz_distancia[tour[:-1], tour[1:]], dtype=np.float64), out=P[1:])
+
+    V = np.zeros(n + 1)
+    inicio_tramo = np.zeros(n + 1, dtype=np.int64)
+    cd_tramo = np.zeros(n + 1, dtype=np.int64)
+    M = np.full(len(cds), np.inf)
+    arg_M = np.zeros(len(cds), dtype=np.int64)
+    for j in range(1, n + 1):
+        candidato = V[j - 1] - P[j - 1] + desde_cd[:, j - 1]
+        mejor = candidato < M
+        M[mejor] = candidato[mejor]
+        arg_M[mejor] = j - 1
+        valores = hacia_cd[:, j - 1] + M
+        d = int(np.argmin(valores))
+        V[j] = P[j - 1] + valores[d]
+        inicio_tramo[j], cd_tramo[j] = arg_M[d], d
+
+    tramos = [[] for _ in cds]
+    j = n
+    while j > 0:
+        i, d = int(inicio_tramo[j]), int(cd_tramo[j])
+        tramos[d].append(tour[i:j])
+        j = i
+    rutas = []
+    for d, cd in enumerate(cds.tolist()):
+        tiendas = np.concatenate(tramos[d][::-1]).tolist() if tramos[d] else []
+        rutas.append([cd] + tiendas + [cd])
+    return rutas
+
+
+def cruce_ox(padre_1, padre_2, rng=random):
+    """Cruce de orden (OX): un tramo de padre_1 y el resto en el orden de padre_2 (tras el tramo)."""
+    n = len(padre_1)
+    a, b = sorted(rng.sample(range(n + 1), 2))
+    hijo = np.empty(n, dtype=padre_1.dtype)
+    hijo[a:b] = padre_1[a:b]
+    usados = np.zeros(int(max(padre_1.max(), padre_2.max())) + 1, dtype=bool)
+    usados[padre_1[a:b]] = True
+    resto = np.roll(padre_2, -b)
+    hijo[np.r_[b:n, 0:a]] = resto[~usados[resto]]
+    return hijo
+
+
+def mutar_inversion(tour, rng=random):
+    """Invierte un tramo aleatorio del tour (en su lugar)."""
+    a, b = sorted(rng.sample(range(len(tour) + 1), 2))
+    tour[a:b] = tour[a:b][::-1].copy()
+    return tour
+
+
+def algoritmo_genetico(datos, params, rng=random, observadores=None, estadisticas=None):
+    """
+    Algoritmo genético de estado estacionario con tour gigante (Prins): cada individuo
+    es una permutación de las tiendas que se decodifica en rutas de CDs con
+    dividir_tour. Por cada hijo: dos torneos, cruce OX, mutación por inversión con
+    PROB_MUTACION, decodificación y (con PROB_BUSQUEDA_LOCAL) educación con la búsqueda
+    local; el tour del hijo educado vuelve a la población (lamarckiano) en lugar de un
+    individuo de la peor mitad si su costo no repite el de otro. Los padres ya son
+    óptimos locales, así que la educación del hijo solo parte de las tiendas con
+    aristas que no vienen de ningún padre (ver aristas_nuevas).
+    La población inicial parte de los constructores (CONSTRUCTORES) y de copias mutadas.
+
+    'params' admite 'tamano_poblacion', 'max_hijos' (por defecto HIJOS_GENETICO si no
+    hay tiempo límite), 'tiempo_limite_s', 'prob_mutacion', 'prob_busqueda_local' y
+    'k_busqueda_local'. Usa los mismos datos y devuelve una Solucion como
+    recocido_simulado. No considera capacidad ni ventanas de tiempo.
+    En 'estadisticas', 'costo_inicial' es el de la mejor solución de CONSTRUCTORES antes
+    de educarla (como en recocido_simulado, que parte de un solo constructor) y
+    'costo_poblacion_inicial' el del mejor individuo de la población inicial ya educada.
+    """
+    inicio = time.perf_counter()
+    if crear_restricciones(datos, params) is not None:
+        raise ValueError("El algoritmo genético no considera capacidad ni ventanas de tiempo.")
+
+    matriz_distancia = datos['matriz_distancia']
+    indices_cds = datos['indices_cds']
+    es_cd = np.zeros(datos['num_nodos'], dtype=bool)
+    es_cd[indices_cds] = True
+    tamano_poblacion = params.get('tamano_poblacion', TAMANO_POBLACION)
+    prob_mutacion = params.get('prob_mutacion', PROB_MUTACION)
+    prob_busqueda_local = params.get('prob_busqueda_local', PROB_BUSQUEDA_LOCAL)
+    busqueda_local = BusquedaLocal(datos, params.get('k_busqueda_local', K_VECINOS))
+    notificador = Notificador(observadores, datos.get('nombres_nodos'),
+                              params.get('intervalo_reporte_s', 0.5),
+                              params.get('iteraciones_progreso', HIJOS_PROGRESO))
+
+    tiendas = np.asarray(datos['indices_tiendas'], dtype=np.int64)
+
+    def evaluar(tour, educar, ady_padres=None):
+        solucion = Solucion(dividir_tour(tour, matriz_distancia, indices_cds), matriz_distancia)
+        if educar:
+            nodos = None
+            if ady_padres is not None:
+                nodos = aristas_nuevas(adyacencias(solucion, es_cd), ady_padres, tiendas)
+            busqueda_local.mejorar(solucion, nodos=nodos)
+        return solucion
+
+    # población inicial: los constructores educados y copias de ellos con
+    # MUTACIONES_INICIALES inversiones (educadas a partir de las aristas nuevas)
+    construidas = [Solucion(construir_rutas(datos, metodo), matriz_distancia) for metodo in CONSTRUCTORES]
+    semillas = [tour_gigante(solucion, es_cd) for solucion in construidas]
+    costo_inicial = min(solucion.costo_global for solucion in construidas)
+    poblacion, costos, ady_poblacion = [], [], []
+    mejor_solucion = None
+    while len(poblacion) < tamano_poblacion:
+        if len(poblacion) < len(semillas):
+            tour, ady_padres = semillas[len(poblacion)], None
+        else:
+            base = len(poblacion) % len(semillas)
+            tour, ady_padres = poblacion[base].copy(), [ady_poblacion[base]]
+            for _ in range(MUTACIONES_INICIALES if len(tour) > 1 else 0):
+                mutar_inversion(tour, rng)
+        solucion = evaluar(tour, rng.random() < prob_busqueda_local, ady_padres)
+        poblacion.append(tour_gigante(solucion, es_cd))
+        costos.append(solucion.costo_global)
+        ady_poblacion.append(adyacencias(solucion, es_cd))
+        if mejor_solucion is None or solucion.costo_global < mejor_solucion.costo_global:
+            mejor_solucion = solucion
+    costo_poblacion_inicial = min(costos)
+
+    tiempo_limite = params.get('tiempo_limite_s')
+    max_hijos = params.get('max_hijos', None if tiempo_limite else HIJOS_GENETICO)
+    hijos = reemplazos = 0
+    motivo_fin = None if len(poblacion[0]) > 1 else 'sin_tiendas'
+
+    notificador.inicio(hijos, 0.0, mejor_solucion)
+
+    while motivo_fin is None:
+        if tiempo_limite and time.perf_counter() - inicio >= tiempo_limite:
+            motivo_fin = 'tiempo'
+            break
+        if max_hijos is not None and hijos >= max_hijos:
+            motivo_fin = 'hijos'
+            break
+        hijos += 1
+
+        padres = [min(rng.sample(range(len(poblacion)), TAMANO_TORNEO), key=costos.__getitem__)
+                  for _ in range(2)]
+        hijo = cruce_ox(poblacion[padres[0]], poblacion[padres[1]], rng)
+        if rng.random() < prob_mutacion:
+            mutar_inversion(hijo, rng)
+        solucion = evaluar(hijo, rng.random() < prob_busqueda_local, [ady_poblacion[p] for p in padres])
+        costo = solucion.costo_global
+
+        if any(abs(costo - otro) < TOLERANCIA_DUPLICADO for otro in costos):
+            continue # clon: no aporta diversidad
+        # reemplazo: un individuo al azar de la peor mitad
+        peor_mitad = sorted(range(len(poblacion)), key=costos.__getitem__)[len(poblacion) // 2:]
+        reemplazado = rng.choice(peor_mitad)
+        poblacion[reemplazado], costos[reemplazado] = tour_gigante(solucion, es_cd), costo
+        ady_poblacion[reemplazado] = adyacencias(solucion, es_cd)
+        reemplazos += 1
+
+        if costo < mejor_solucion.costo_global:
+            mejor_solucion = solucion
+            notificador.nuevo_mejor(hijos, 0.0, mejor_solucion)
+        if notificador.activo and hijos % notificador.cada_iteraciones == 0:
+            notificador.progreso(hijos, 0.0, min(costos), mejor_solucion)
+
+    mejor_solucion.evaluar_costo_global(matriz_distancia)
+    notificador.fin(hijos, 0.0, mejor_solucion)
+
+    if estadisticas is not None:
+        estadisticas.update({
+            'iteraciones': hijos,
+            'reemplazos': reemplazos,
+            'costo_inicial': float(costo_inicial),
+            'costo_poblacion_inicial': float(costo_poblacion_inicial),
+            'mejor_costo': mejor_solucion.costo_global,
+            'segundos': time.perf_counter() - inicio,
+            'motivo_fin': motivo_fin,
+        })
+    return mejor_solucion
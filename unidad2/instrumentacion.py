@@ -0,0 +1,124 @@
+import csv
+import json
+import time
+
+# fases cuyo tiempo se mide durante el recocido simulado
+FASES = (
+    'solucion_inicial',  # construcción (o copia) de la solución inicial
+    'calibracion',       # muestreo de deltas para la temperatura inicial
+    'generacion',        # proponer movimientos (o muestrear un lote)
+    'evaluacion',        # deltas de distancia y de penalización
+    'aceptacion',        # criterio de Metropolis y aplicar los movimientos aceptados
+    'mejor',             # copiar la solución actual al snapshot de la mejor
+    'busqueda_local',    # intensificación periódica y pulido final
+    'reporte',           # eventos a los observadores
+    'punto_control',     # escritura de puntos de control
+)
+
+
+class Instrumentacion:
+    """
+    Contadores y tiempos del ciclo del SA: movimientos propuestos/aceptados por tipo
+    y nanosegundos acumulados por fase (ver FASES). Es opcional: el SA solo mide
+    si recibe una instancia, y sin ella el ciclo no llama al reloj.
+    """
+
+    def __init__(self):
+        self.nanosegundos = dict.fromkeys(FASES, 0)
+        self.llamadas = dict.fromkeys(FASES, 0)
+        self.propuestos = {}
+        self.aceptados = {}
+        self.nulos = 0 # propuestas que no dieron un movimiento válido
+        self.iteraciones = 0
+        self._inicio = time.perf_counter_ns()
+        self._fin = None
+
+    def sumar(self, fase, nanosegundos, llamadas=1):
+        self.nanosegundos[fase] += nanosegundos
+        self.llamadas[fase] += llamadas
+
+    def medir(self, fase, funcion, *args):
+        """Llama a funcion(*args) sumando su tiempo a 'fase'; devuelve su resultado."""
+        t = time.perf_counter_ns()
+        resultado = funcion(*args)
+        self.sumar(fase, time.perf_counter_ns() - t)
+        return resultado
+
+    def contar(self, tipo, propuestos=1, aceptados=0):
+        self.propuestos[tipo] = self.propuestos.get(tipo, 0) + propuestos
+        self.aceptados[tipo] = self.aceptados.get(tipo, 0) + aceptados
+
+    def registrar_paso(self, tipo, aceptado, t_inicio, t_generado, t_evaluado, t_fin):
+        """Un paso del ciclo de un movimiento: tiempos de generación, evaluación y aceptación."""
+        self.nanosegundos['generacion'] += t_generado - t_inicio
+        self.nanosegundos['evaluacion'] += t_evaluado - t_generado
+        self.nanosegundos['aceptacion'] += t_fin - t_evaluado
+        self.llamadas['generacion'] += 1
+        self.llamadas['evaluacion'] += 1
+        self.llamadas['aceptacion'] += 1
+        self.contar(tipo, 1, 1 if aceptado else 0)
+
+    def registrar_nulo(self, nanosegundos):
+        self.nanosegundos['generacion'] += nanosegundos
+        self.llamadas['generacion'] += 1
+        self.nulos += 1
+
+    def terminar(self, iteraciones):
+        self.iteraciones = iteraciones
+        self._fin = time.perf_counter_ns()
+
+    def resumen(self):
+        """Diccionario serializable con el total, cada fase (con su porcentaje) y cada tipo de movimiento."""
+        total_ns = (self._fin or time.perf_counter_ns()) - self._inicio
+        fases = {}
+        for fase in FASES:
+            ns, llamadas = self.nanosegundos[fase], self.llamadas[fase]
+            fases[fase] = {
+                'llamadas': llamadas,
+                'segundos': ns / 1e9,
+                'porcentaje': 100.0 * ns / total_ns if total_ns else 0.0,
+                'ns_por_llamada': ns / llamadas if llamadas else 0.0,
+            }
+        medido = sum(self.nanosegundos.values())
+        movimientos = {
+            tipo: {
+                'propuestos': propuestos,
+                'aceptados': self.aceptados[tipo],
+                'tasa_aceptacion': self.aceptados[tipo] / propuestos if propuestos else 0.0,
+            }
+            for tipo, propuestos in sorted(self.propuestos.items())
+        }
+        return {
+            'segundos_totales': total_ns / 1e9,
+            'segundos_sin_medir': (total_ns - medido) / 1e9, # control del ciclo y fases no listadas
+            'iteraciones': self.iteraciones,
+            'propuestas_nulas': self.nulos,
+            'fases': fases,
+            'movimientos': movimientos,
+        }
+
+    def exportar_json(self, archivo):
+        with open(archivo, 'w') as f:
+            json.dump(self.resumen(), f, indent=2)
+        return archivo
+
+    def exportar_csv(self, archivo):
+        """Una fila por fase y una por tipo de movimiento (formato largo, apto para hojas de cálculo)."""
+        resumen = self.resumen()
+        with open(archivo, 'w', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['categoria', 'nombre', 'llamadas', 'segundos', 'porcentaje',
+                               'aceptados', 'tasa_aceptacion'])
+            for fase, valores in resumen['fases'].items():
+                escritor.writerow(['fase', fase, valores['llamadas'], valores['segundos'],
+                                   valores['porcentaje'], '', ''])
+            for tipo, valores in resumen['movimientos'].items():
+                escritor.writerow(['movimiento', tipo, valores['propuestos'], '', '',
+                                   valores['aceptados'], valores['tasa_aceptacion']])
+        return archivo
+
+    def exportar(self, archivo):
+        """Exporta según la extensión: .csv o (cualquier otra) JSON."""
+        if str(archivo).lower().endswith('.csv'):
+            return self.exportar_csv(archivo)
+        return self.exportar_json(archivo)
@@ -0,0 +1,193 @@
+import time
+import numpy as np
+from movimientos import Reubicacion, Intercambio
+
+# movimientos candidatos que se muestrean y evalúan juntos en cada lote
+TAMANO_LOTE = 256
+
+# fracción de reubicaciones en el lote (el resto son intercambios intra-ruta)
+FRACCION_REUBICACION = 0.5
+
+
+class EvaluadorLotes:
+    """
+    Evaluación por lotes para el SA: muestrea muchos movimientos candidatos a la vez
+    (reubicaciones e intercambios intra-ruta), calcula todos sus deltas con un solo
+    indexado vectorizado de la matriz de distancias, decide la aceptación de cada uno
+    con Metropolis y aplica los aceptados que no comparten rutas (del mejor delta al
+    peor). Como las rutas que tocan los movimientos aplicados son disjuntas, los deltas
+    calculados sobre el estado al inicio del lote siguen siendo exactos.
+
+    Con 'vecinos' (índice de vecinos cercanos) la reubicación inserta la tienda antes o
+    después de uno de sus vecinos, como VecindarioGranular; sin él, en una arista
+    cualquiera de las rutas. Los candidatos se eligen por tienda, así que las rutas
+    largas reciben más intercambios que con proponer_movimiento.
+    """
+
+    def __init__(self, datos, tamano=TAMANO_LOTE, vecinos=None, semilla=None):
+        self.matriz_distancia = datos['matriz_distancia']
+        self.tiendas = np.asarray(datos['indices_tiendas'], dtype=np.int64)
+        self.vecinos = vecinos
+        self.es_cd = np.zeros(datos['num_nodos'], dtype=bool)
+        self.es_cd[datos['indices_cds']] = True
+        self.tamano = tamano
+        self.rng = np.random.default_rng(semilla)
+        self.instrumentacion = None # ver instrumentacion.py
+
+    # --------------------------------------------------------------------------
+    # muestreo (posiciones globales dentro del tour)
+    # --------------------------------------------------------------------------
+
+    def _aristas_de_cds(self, solucion, cds, al_inicio):
+        """Arista al inicio o al final de una ruta al azar de cada CD de 'cds'."""
+        inicios = solucion.inicios
+        cd_ruta = solucion.tour[inicios[:-1]]
+        orden = np.argsort(cd_ruta, kind='stable')
+        primeras = np.searchsorted(cd_ruta[orden], cds, side='left')
+        cuantas = np.searchsorted(cd_ruta[orden], cds, side='right') - primeras
+        r = orden[primeras + (self.rng.random(len(cds)) * cuantas).astype(np.int64)]
+        return np.where(al_inicio, inicios[r], inicios[r + 1] - 2)
+
+    def _muestrear_reubicaciones(self, solucion, n):
+        """Posición de la tienda a mover (g) y arista (h, h + 1) donde se inserta."""
+        tiendas = self.tiendas[self.rng.integers(len(self.tiendas), size=n)]
+        g = solucion.posicion[tiendas]
+
+        if self.vecinos is None:
+            # arista uniforme entre las aristas internas de las rutas: la ruta r aporta
+            # largo - 1 aristas y la arista e (global) empieza en la posición e + r
+            inicios = solucion.inicios
+            aristas_acumuladas = inicios[1:] - np.arange(1, len(inicios))
+            e = self.rng.integers(aristas_acumuladas[-1], size=n)
+            h = e + np.searchsorted(aristas_acumuladas, e, side='right')
+        else:
+            vecino = self.vecinos[tiendas, self.rng.integers(self.vecinos.shape[1], size=n)]
+            antes = self.rng.random(n) < 0.5
+            h = np.where(antes, solucion.posicion[vecino] - 1, solucion.posicion[vecino])
+            cds = self.es_cd[vecino]
+            if cds.any():
+                h[cds] = self._aristas_de_cds(solucion, vecino[cds], antes[cds])
+
+        # insertar junto a sí misma no cambia nada
+        validos = (h != g) & (h != g - 1)
+        return g, h, validos
+
+    def _muestrear_intercambios(self, solucion, n):
+        """Dos posiciones gi < gj de la misma ruta (la de una tienda al azar)."""
+        inicios = solucion.inicios
+        g = solucion.posicion[self.tiendas[self.rng.integers(len(self.tiendas), size=n)]]
+        r = np.searchsorted(inicios, g, side='right') - 1
+        largo = inicios[r + 1] - inicios[r]
+        validos = largo >= 4 # mínimo 2 tiendas + 2 CDs
+
+        # otra posición entre 1 y largo - 2, distinta de la de la tienda
+        otra = 1 + (self.rng.random(n) * np.maximum(largo - 3, 1)).astype(np.int64)
+        otra += otra >= g - inicios[r]
+        h = np.where(validos, inicios[r] + otra, g)
+        return np.minimum(g, h), np.maximum(g, h), validos
+
+    # --------------------------------------------------------------------------
+    # deltas vectorizados
+    # --------------------------------------------------------------------------
+
+    def _deltas(self, tour, g, h, gi, gj):
+        """
+        Deltas de todas las reubicaciones (g -> arista h) y de todos los intercambios
+        (gi, gj) con una sola consulta a la matriz de distancias.
+        """
+        # reubicación: (a, x) + (x, b) -> (a, b) en el origen y (u, v) -> (u, x) + (x, v) en el destino
+        a, x, b = tour[g - 1], tour[g], tour[g + 1]
+        u, v = tour[h], tour[h + 1]
+
+        # intercambio: aristas alrededor de las dos posiciones; si son contiguas
+        # (gj = gi + 1) se corrigen los pares para que el cálculo general sea exacto
+        p, xi, ni = tour[gi - 1], tour[gi], tour[gi + 1]
+        pj, xj, nj = tour[gj - 1], tour[gj], tour[gj + 1]
+        contiguas = gj == gi + 1
+        ni_nuevo = np.where(contiguas, xi, ni)
+        pj_viejo = np.where(contiguas, xj, pj)
+
+        filas = np.concatenate((a, a, x, u, x, u, p, xj, pj, xi, p, xi, pj_viejo, xj))
+        columnas = np.concatenate((b, x, b, x, v, v, xj, ni_nuevo, xi, nj, xi, ni, xj, nj))
+        d = np.asarray(self.matriz_distancia[filas, columnas], dtype=np.float64)
+
+        n_r = len(g)
+        d_r = d[:6 * n_r].reshape(6, n_r)
+        d_i = d[6 * n_r:].reshape(8, len(gi))
+        delta_origen = d_r[0] - d_r[1] - d_r[2]
+        delta_destino = d_r[3] + d_r[4] - d_r[5]
+        delta_intercambio = d_i[:4].sum(axis=0) - d_i[4:].sum(axis=0)
+        return delta_origen, delta_destino, delta_intercambio
+
+    # --------------------------------------------------------------------------
+    # paso del SA
+    # --------------------------------------------------------------------------
+
+    def paso(self, solucion, T, n=None):
+        """
+        Evalúa un lote de 'n' candidatos (por defecto 'tamano') a temperatura T y
+        aplica sobre 'solucion' los aceptados compatibles. Devuelve cuántos aplicó.
+        """
+        n = n or self.tamano
+        medir = self.instrumentacion is not None
+        t_inicio = time.perf_counter_ns() if medir else 0
+        n_r = int(self.rng.binomial(n, FRACCION_REUBICACION))
+        inicios = solucion.inicios
+
+        g, h, validos_r = self._muestrear_reubicaciones(solucion, n_r)
+        gi, gj, validos_i = self._muestrear_intercambios(solucion, n - n_r)
+        t_generado = time.perf_counter_ns() if medir else 0
+        delta_origen, delta_destino, delta_intercambio = self._deltas(solucion.tour, g, h, gi, gj)
+        t_evaluado = time.perf_counter_ns() if medir else 0
+
+        delta = np.concatenate((delta_origen + delta_destino, delta_intercambio))
+        validos = np.concatenate((validos_r, validos_i))
+        aceptados = validos & ((delta < 0) | (self.rng.random(n) < np.exp(-np.maximum(delta, 0.0) / T)))
+        candidatos = np.flatnonzero(aceptados)
+        if candidatos.size == 0:
+            if medir:
+                self._registrar(n_r, n, 0, 0, t_inicio, t_generado, t_evaluado)
+            return 0
+        candidatos = candidatos[np.argsort(delta[candidatos], kind='stable')]
+
+        # rutas y posiciones relativas (las posiciones globales cambian al aplicar)
+        posiciones = np.concatenate((g, gi))
+        destinos = np.concatenate((h, gj))
+        rutas_origen = np.searchsorted(inicios, posiciones, side='right') - 1
+        rutas_destino = np.searchsorted(inicios, destinos, side='right') - 1
+        pos_origen = posiciones - inicios[rutas_origen]
+        pos_destino = destinos - inicios[rutas_destino]
+        # reubicación: 'pos_destino' es sobre la ruta destino sin la tienda (ver Reubicacion)
+        pos_destino[:n_r] += ~((rutas_destino[:n_r] == rutas_origen[:n_r]) & (g < h))
+
+        ocupadas = set()
+        aplicados = aplicadas_reubicacion = 0
+        for c, ro, po, rd, pd in zip(candidatos.tolist(), rutas_origen[candidatos].tolist(),
+                                     pos_origen[candidatos].tolist(), rutas_destino[candidatos].tolist(),
+                                     pos_destino[candidatos].tolist()):
+            if ro in ocupadas or rd in ocupadas:
+                continue
+            ocupadas.add(ro)
+            ocupadas.add(rd)
+            if c < n_r:
+                movimiento = Reubicacion(ro, po, rd, pd)
+                movimiento.delta_origen = float(delta_origen[c])
+                movimiento.delta_destino = float(delta_destino[c])
+                movimiento.aplicar(solucion, None)
+                aplicadas_reubicacion += 1
+            else:
+                Intercambio(ro, po, pd).aplicar(solucion, float(delta[c]))
+            aplicados += 1
+        if medir:
+            self._registrar(n_r, n, aplicadas_reubicacion, aplicados - aplicadas_reubicacion,
+                            t_inicio, t_generado, t_evaluado)
+        return aplicados
+
+    def _registrar(self, n_r, n, aplicadas_reubicacion, aplicados_intercambio, t_inicio, t_generado,
+                   t_evaluado):
+        instrumentacion = self.instrumentacion
+        instrumentacion.sumar('generacion', t_generado - t_inicio)
+        instrumentacion.sumar('evaluacion', t_evaluado - t_generado)
+        instrumentacion.sumar('aceptacion', time.perf_counter_ns() - t_evaluado)
+        instrumentacion.contar('Reubicacion', n_r, aplicadas_reubicacion)
+        instrumentacion.contar('Intercambio', n - n_r, aplicados_intercambio)
@@ -1,6 +1,10 @@
+import argparse
 from data_loader import cargar_y_procesar_datos
 from metaheuristica import recocido_simulado
+from alns import busqueda_alns
+from genetico import algoritmo_genetico
 from visualizer import dibujar_mapa_rutas 
+from observadores import ReporteConsola
 
 def prueba_1_ejecucion_sa(datos):
     """
@@ -18,15 +22,55 @@ def prueba_1_ejecucion_sa(datos):
         'iteraciones_por_temp': 100     # iteraciones en cada nivel de temperatura
     }
 
-    mejor_solucion_final = recocido_simulado(datos, params_sa)
+    mejor_solucion_final = recocido_simulado(datos, params_sa, observadores=[ReporteConsola()])
+    mostrar_resultado(mejor_solucion_final, datos)
 
+
+def prueba_2_ejecucion_alns(datos):
+    """
+    Ejecución de la Búsqueda Adaptativa de Grandes Vecindarios (ALNS).
+    """
+    print("===================================================")
+    print("INICIANDO PRUEBA DE ALNS ===========")
+    print("===================================================")
+
+    # parámetros de la ALNS
+    params_alns = {
+        'tiempo_limite_s': 30.0,        # presupuesto de tiempo
+        'pulido_final': True            # búsqueda local sobre la mejor al terminar
+    }
+
+    mejor_solucion_final = busqueda_alns(datos, params_alns, observadores=[ReporteConsola(algoritmo='ALGORITMO ALNS')])
+    mostrar_resultado(mejor_solucion_final, datos)
+
+
+def prueba_3_ejecucion_genetico(datos):
+    """
+    Ejecución del Algoritmo Genético con tour gigante y split.
+    """
+    print("===================================================")
+    print("INICIANDO PRUEBA DE ALGORITMO GENÉTICO ===========")
+    print("===================================================")
+
+    # parámetros del algoritmo genético
+    params_ga = {
+        'tiempo_limite_s': 30.0,        # mismo presupuesto que la ALNS para comparar
+        'tamano_poblacion': 30          # individuos (tours gigantes)
+    }
+
+    mejor_solucion_final = algoritmo_genetico(datos, params_ga,
+                                              observadores=[ReporteConsola(algoritmo='ALGORITMO GENÉTICO')])
+    mostrar_resultado(mejor_solucion_final, datos)
+
+
+def mostrar_resultado(mejor_solucion_final, datos):
     # mostrar la mejor ruta global al final
     print("\n===================================================")
     print(" MEJOR RUTA GLOBAL FINAL ENCONTRADA")
     print(f"Costo Global Final (Distancia Total): {mejor_solucion_final.costo_global:.2f} km")
     print("===================================================")
 
-    detalles_finales = mejor_solucion_final.obtener_detalles_ruta(datos['df_nodos'])
+    detalles_finales = mejor_solucion_final.obtener_detalles_ruta(datos['nombres_nodos'])
     detalles_finales.sort(key=lambda x: x['id_cd'])
     
     for i, detalle in enumerate(detalles_finales):
@@ -42,10 +86,19 @@ def prueba_1_ejecucion_sa(datos):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MDVRP de tiendas en Culiacán.")
+    parser.add_argument('--metodo', choices=('recocido', 'alns', 'genetico'), default='recocido',
+                        help="metaheurística: recocido simulado, ALNS o algoritmo genético")
+    args = parser.parse_args()
     
     # cargar datos
     datos_proyecto = cargar_y_procesar_datos()
     
     if datos_proyecto:
         # ejecutar prueba de implementación
-        prueba_1_ejecucion_sa(datos_proyecto)
\ No newline at end of file
+        if args.metodo == 'alns':
+            prueba_2_ejecucion_alns(datos_proyecto)
+        elif args.metodo == 'genetico':
+            prueba_3_ejecucion_genetico(datos_proyecto)
+        else:
+            prueba_1_ejecucion_sa(datos_proyecto)
\ No newline at end of file
@@ -1,155 +1,478 @@
 import random
-import numpy as np
-import copy
+import math
+import time
 from model import Solucion
-from data_loader import FACTOR_COMBUSTIBLE_POR_KM
+from construccion import construir_rutas
+from movimientos import proponer_movimiento
+from vecindario import VecindarioGranular, K_VECINOS, obtener_vecinos_cercanos
+from lotes import EvaluadorLotes
+from busqueda_local import BusquedaLocal
+from restricciones import crear_restricciones
+from observadores import Notificador
+from puntos_control import guardar_punto_control, cargar_punto_control, INTERVALO_PUNTO_CONTROL_S
+from instrumentacion import Instrumentacion
 
+# modo con presupuesto (tiempo o evaluaciones): tasa de aceptación objetivo al inicio
+# y al final del presupuesto; entre ambas decrece de forma geométrica
+ACEPTACION_INICIAL = 0.5
+ACEPTACION_FINAL = 0.001
 
-def generar_solucion_inicial(datos):
-    """
-    Genera una solución inicial utilizando la Heurística del Vecino Más Cercano (Nearest Neighbor)
-    para asignar cada tienda a su Centro de Distribución (CD) más cercano, y luego ordena la secuencia.
-    """
-    indices_cds = datos['indices_cds']
-    indices_tiendas = datos['indices_tiendas']
-    matriz_distancia = datos['matriz_distancia']
-    num_cds = len(indices_cds)
-    
-    tiendas_por_cd = {cd_id: [] for cd_id in indices_cds}
-    
-    # asignación de tiendas al CD más cercano (Proximidad)
-    for tienda_id in indices_tiendas:
-        mejor_cd = -1
-        distancia_minima = float('inf')
-        
-        for cd_id in indices_cds:
-            distancia_actual = matriz_distancia[cd_id, tienda_id]
-            if distancia_actual < distancia_minima:
-                distancia_minima = distancia_actual
-                mejor_cd = cd_id
-        
-        tiendas_por_cd[mejor_cd].append(tienda_id)
+# iteraciones entre revisiones del reloj y ajustes de temperatura en el modo con presupuesto
+ITERACIONES_POR_BLOQUE = 200
 
-    # optimizacion interna (secuencia de visitas usando Nearest Neighbor)
-    rutas_iniciales = []
-    for cd_id in indices_cds:
-        tiendas_asignadas = tiendas_por_cd[cd_id]
-        ruta_optimizada = [cd_id]
-        
-        if tiendas_asignadas:
-            ruta_actual = [cd_id] 
-            nodos_pendientes = set(tiendas_asignadas)
-            
-            while nodos_pendientes:
-                ultimo_nodo = ruta_actual[-1]
-                siguiente_nodo = -1
-                distancia_minima_local = float('inf')
-                
-                for nodo_pendiente in nodos_pendientes:
-                    distancia = matriz_distancia[ultimo_nodo, nodo_pendiente]
-                    if distancia < distancia_minima_local:
-                        distancia_minima_local = distancia
-                        siguiente_nodo = nodo_pendiente
-                
-                ruta_actual.append(siguiente_nodo)
-                nodos_pendientes.remove(siguiente_nodo)
+# multiplicador de temperatura por bloque cuando la aceptación se aleja del objetivo
+FACTOR_AJUSTE = 0.95
 
-            # formato de la ruta: [CD -> T1 -> T2 -> ... -> CD]
-            ruta_optimizada = ruta_actual + [cd_id]
+# movimientos propuestos (sin aplicar) para calibrar la temperatura inicial
+MUESTRAS_CALIBRACION = 500
+
+# estancamiento: iteraciones sin nuevo mejor (por tienda, con un mínimo) contadas desde que
+# la búsqueda está fría (ver _temperatura_fria) y con la aceptación del bloque por debajo
+# de ACEPTACION_CONGELADA
+ESTANCAMIENTO_POR_TIENDA = 100
+ESTANCAMIENTO_MINIMO = 50000
+ACEPTACION_CONGELADA = 0.02
 
-        rutas_iniciales.append(ruta_optimizada)
-        
-    return Solucion(rutas_iniciales, datos['matriz_distancia'], datos['matriz_costo'])
+
+def generar_solucion_inicial(datos, metodo='vecino_mas_cercano', restricciones=None):
+    """
+    Genera una solución inicial asignando cada tienda a su Centro de Distribución (CD)
+    más cercano y ordenando la secuencia de cada ruta con el constructor 'metodo':
+    'vecino_mas_cercano' (Nearest Neighbor), 'ahorros' (Clarke-Wright) o 'barrido' (polar).
+    Las heurísticas están vectorizadas con NumPy (ver construccion.py).
+    Con 'restricciones' cada ruta se parte en vehículos según la capacidad y la
+    solución queda preparada (con su penalización) para la búsqueda.
+    """
+    rutas = construir_rutas(datos, metodo)
+    if restricciones is not None:
+        rutas = restricciones.dividir_rutas(rutas)
+    solucion = Solucion(rutas, datos['matriz_distancia'])
+    if restricciones is not None:
+        restricciones.preparar(solucion)
+    return solucion
 
 
 def generar_vecino(solucion_actual, datos):
     """
     Genera una solución vecina mediante un movimiento aleatorio (Intercambio o Reubicación).
+    Copia la solución; el recocido simulado usa los movimientos directamente.
     """
-    nueva_solucion_rutas = copy.deepcopy(solucion_actual.rutas)
-    
-    movimiento = random.choice(['reubicacion', 'intercambio'])
+    nueva_solucion = solucion_actual.copia()
 
-    if movimiento == 'reubicacion':
-        # movimiento de reubicación (entre rutas)
-        rutas_no_vacias = [i for i, r in enumerate(nueva_solucion_rutas) if len(r) > 2]
-        if not rutas_no_vacias: return generar_solucion_inicial(datos)
-        
-        idx_ruta_origen = random.choice(rutas_no_vacias)
-        ruta_origen = nueva_solucion_rutas[idx_ruta_origen]
-        
-        # seleccionar la tienda a mover (índices 1 al penúltimo)
-        idx_tienda_a_mover = random.randint(1, len(ruta_origen) - 2)
-        tienda_a_mover = ruta_origen.pop(idx_tienda_a_mover)
-        
-        idx_ruta_destino = random.choice(range(len(nueva_solucion_rutas)))
-        ruta_destino = nueva_solucion_rutas[idx_ruta_destino]
+    movimiento = proponer_movimiento(nueva_solucion)
+    if movimiento is not None:
+        delta = movimiento.delta(nueva_solucion, datos['matriz_distancia'])
+        movimiento.aplicar(nueva_solucion, delta)
 
-        # insertar la tienda en una posición aleatoria en la ruta de destino 
-        pos_destino = random.randint(1, len(ruta_destino) - 1)
-        ruta_destino.insert(pos_destino, tienda_a_mover)
+    return nueva_solucion
 
-    elif movimiento == 'intercambio':
-        # movimiento de intercambio (intra-ruta / TSP)
-        idx_ruta = random.choice(range(len(nueva_solucion_rutas)))
-        ruta = nueva_solucion_rutas[idx_ruta]
-        
-        if len(ruta) >= 4: # minimo 2 tiendas + 2 CDs
-            i, j = random.sample(range(1, len(ruta) - 1), 2)
-            ruta[i], ruta[j] = ruta[j], ruta[i]
+def crear_generador_movimientos(datos, params):
+    """
+    Devuelve la función que propone movimientos para el SA: si 'params' trae
+    'k_vecinos' se usa el vecindario granular (vecinos cercanos); si no, el aleatorio.
+    """
+    k_vecinos = params.get('k_vecinos')
+    if k_vecinos:
+        return VecindarioGranular(datos, k_vecinos).proponer
+    return proponer_movimiento
 
-    # crear y devolver la nueva solución
-    return Solucion(nueva_solucion_rutas, datos['matriz_distancia'], datos['matriz_costo'])
+def ciclo_metropolis(solucion, mejor_solucion, matriz_distancia, T, iteraciones, rng=random,
+                     proponer=proponer_movimiento, restricciones=None):
+    """
+    Ejecuta 'iteraciones' pasos de Metropolis a temperatura fija T sobre 'solucion'
+    y actualiza el snapshot 'mejor_solucion'. Devuelve el número de movimientos aceptados.
+    Con 'restricciones' la energía incluye la penalización (se prepara la caché al inicio).
+    """
+    if restricciones is not None:
+        restricciones.preparar(solucion)
+    aceptados = 0
+    for _ in range(iteraciones):
+        movimiento = proponer(solucion, rng)
+        if movimiento is None:
+            continue
+
+        delta_E = movimiento.delta(solucion, matriz_distancia)
+        delta_penalizacion = 0.0
+        if restricciones is not None:
+            delta_penalizacion = restricciones.delta(movimiento, solucion)
+        delta_total = delta_E + delta_penalizacion
+        if delta_total < 0 or rng.random() < math.exp(-delta_total / T):
+            movimiento.aplicar(solucion, delta_E)
+            if restricciones is not None:
+                restricciones.aplicar(movimiento, solucion)
+            aceptados += 1
 
-def recocido_simulado(datos, params):
+            if solucion.objetivo < mejor_solucion.objetivo:
+                mejor_solucion.copiar_de(solucion)
+    return aceptados
+
+def calibrar_temperatura_inicial(solucion, matriz_distancia, proponer, rng=random,
+                                 aceptacion=ACEPTACION_INICIAL, muestras=MUESTRAS_CALIBRACION):
     """
-    Implementación del algoritmo de Recocido Simulado
+    Temperatura con la que un movimiento que empeora se aceptaría con probabilidad
+    'aceptacion' en promedio: T0 = -media(deltas positivos) / ln(aceptacion), con
+    los deltas de 'muestras' movimientos propuestos (no se aplican).
     """
-    # inicialización
-    solucion_actual = generar_solucion_inicial(datos)
-    mejor_solucion = copy.deepcopy(solucion_actual)
-    
-    T = params['temperatura_inicial']
-    
-    print("\n--- INICIO DEL ALGORITMO DE RECOCIDO SIMULADO ---")
+    positivos = []
+    for _ in range(muestras):
+        movimiento = proponer(solucion, rng)
+        if movimiento is not None:
+            delta_E = movimiento.delta(solucion, matriz_distancia)
+            if delta_E > 0:
+                positivos.append(delta_E)
+    if not positivos:
+        return 1.0
+    return float(-(sum(positivos) / len(positivos)) / math.log(aceptacion))
+
+def _ajustar_temperatura(T, tasa_aceptacion, avance, params):
+    """
+    Enfriamiento adaptativo: la aceptación objetivo baja de forma geométrica con el
+    avance del presupuesto (0 a 1); si la aceptación del bloque está por encima se
+    enfría más rápido y si está por debajo se recalienta un poco.
+    """
+    inicial = params.get('aceptacion_inicial', ACEPTACION_INICIAL)
+    final = params.get('aceptacion_final', ACEPTACION_FINAL)
+    objetivo = inicial * (final / inicial)**avance
+    factor = params.get('factor_ajuste', FACTOR_AJUSTE)
+    return T * factor if tasa_aceptacion > objetivo else T / factor
+
+def _temperatura_fria(temperatura_inicial, params):
+    """
+    Temperatura a partir de la cual la búsqueda se considera fría: la que, con la
+    calibración de calibrar_temperatura_inicial, acepta el empeoramiento promedio con
+    probabilidad 'aceptacion_final' (el final del esquema adaptativo):
+    T_fria = T0 * ln(aceptacion_inicial) / ln(aceptacion_final).
+    """
+    inicial = params.get('aceptacion_inicial', ACEPTACION_INICIAL)
+    final = params.get('aceptacion_final', ACEPTACION_FINAL)
+    return temperatura_inicial * math.log(inicial) / math.log(final)
+
+def _sin_medir(fase, funcion, *args):
+    """Sustituto de Instrumentacion.medir cuando no hay instrumentación."""
+    return funcion(*args)
+
+def _solucion_de_partida(datos, params, restricciones, solucion_inicial):
+    """Solución inicial construida o copia de 'solucion_inicial', preparada para las restricciones."""
+    if solucion_inicial is None:
+        return generar_solucion_inicial(datos, params.get('constructor', 'vecino_mas_cercano'), restricciones)
+    solucion = solucion_inicial.copia()
+    if restricciones is not None:
+        restricciones.preparar(solucion)
+    return solucion
+
+def recocido_simulado(datos, params, rng=random, observadores=None, estadisticas=None,
+                      reanudar=None, solucion_inicial=None, instrumentacion=None):
+    """
+    Implementación del algoritmo de Recocido Simulado.
+    Cada iteración evalúa solo el delta de costo del movimiento propuesto (O(1))
+    y lo aplica sobre la solución actual únicamente si es aceptado.
+    Con 'k_vecinos' en 'params' los movimientos se restringen a vecinos cercanos.
+    'constructor' elige la heurística de la solución inicial (ver generar_solucion_inicial);
+    con 'solucion_inicial' se parte de una copia de esa solución (arranque en caliente).
+    Búsqueda local (busqueda_local.py) opcional con 'busqueda_local_inicial' (sobre la
+    solución inicial), 'busqueda_local_cada' (cada N iteraciones sobre la actual) y
+    'pulido_final' (sobre la mejor al terminar); 'k_busqueda_local' fija sus vecinos.
+    'rng' permite ejecuciones con semilla propia (p. ej. en procesos paralelos) y,
+    si se pasa un diccionario en 'estadisticas', se llena con los contadores de la ejecución.
+    El avance se reporta a 'observadores' (ver observadores.py) con frecuencia
+    limitada; sin observadores el ciclo no imprime ni formatea nada.
+
+    Modo con presupuesto (anytime): con 'tiempo_limite_s' y/o 'max_evaluaciones' no se
+    usa el esquema geométrico; la temperatura se ajusta cada 'iteraciones_por_bloque'
+    según la tasa de aceptación (ver _ajustar_temperatura), se para al agotar el
+    presupuesto o por estancamiento, y se devuelve la mejor solución encontrada hasta
+    ese momento. Estancamiento (también disponible en el modo geométrico):
+    'iteraciones_sin_mejora' sin nuevo mejor contadas desde que la búsqueda se enfrió
+    (T <= _temperatura_fria, nunca durante la fase caliente) y con la aceptación ya
+    congelada; con presupuesto además solo si se mejoró la solución de partida (si no,
+    se usa el presupuesto completo). Sin 'temperatura_inicial' (o con None)
+    la temperatura inicial se calibra con deltas muestreados. El tiempo límite cuenta
+    desde la llamada (incluye la solución inicial y la calibración). Un presupuesto
+    <= 0 se considera agotado: se devuelve la solución de partida sin iterar.
+
+    Restricciones (restricciones.py): con 'capacidad_vehiculo' en 'params' y/o ventanas
+    de tiempo en 'datos' cada CD opera varios vehículos y se minimiza distancia +
+    penalización ('peso_capacidad', 'peso_ventanas'); el mejor se elige por
+    Solucion.objetivo. La búsqueda local solo mide distancia y no se combina con ellas.
+
+    Evaluación por lotes (lotes.py): con 'tamano_lote' cada paso muestrea y evalúa
+    vectorizados ese número de candidatos y aplica los aceptados que no comparten
+    ruta; cada candidato cuenta como una iteración. No se combina con restricciones.
+
+    Puntos de control (puntos_control.py): con 'archivo_punto_control' se guarda el
+    estado completo al final de un bloque cada 'intervalo_punto_control_s' segundos
+    (y al terminar el ciclo); 'reanudar' recibe un punto de control cargado y sigue
+    desde él (ver reanudar_recocido_simulado).
+
+    Instrumentación (instrumentacion.py): con un objeto Instrumentacion en
+    'instrumentacion' (o con 'archivo_instrumentacion' en 'params', que lo crea y al
+    final exporta a JSON o CSV según la extensión) se cuentan los movimientos por tipo
+    y se mide el tiempo de cada fase; el resumen queda en estadisticas['instrumentacion'].
+    Sin ella el ciclo solo revisa una bandera por paso.
+    """
+    inicio = time.perf_counter()
+    archivo_instrumentacion = params.get('archivo_instrumentacion')
+    if instrumentacion is None and archivo_instrumentacion:
+        instrumentacion = Instrumentacion()
+    medir = instrumentacion is not None
+    reloj = time.perf_counter_ns
+    # las fases fuera del paso de un movimiento se miden con fase(nombre, funcion, *args)
+    fase = instrumentacion.medir if medir else _sin_medir
+    matriz_distancia = datos['matriz_distancia']
+    proponer = crear_generador_movimientos(datos, params)
+    notificador = Notificador(observadores, datos.get('nombres_nodos'),
+                              params.get('intervalo_reporte_s', 0.5),
+                              params.get('iteraciones_progreso', 500))
+    notificar = notificador.activo
+    iteraciones_progreso = notificador.cada_iteraciones
+
+    restricciones = crear_restricciones(datos, params)
+
+    busqueda_local = None
+    busqueda_local_cada = params.get('busqueda_local_cada')
+    if params.get('busqueda_local_inicial') or busqueda_local_cada or params.get('pulido_final'):
+        if restricciones is not None:
+            raise ValueError("La búsqueda local no considera capacidad ni ventanas de tiempo.")
+        busqueda_local = BusquedaLocal(datos, params.get('k_busqueda_local', K_VECINOS))
+
+    lotes = None
+    tamano_lote = params.get('tamano_lote')
+    if tamano_lote:
+        if restricciones is not None:
+            raise ValueError("La evaluación por lotes no considera capacidad ni ventanas de tiempo.")
+        vecinos = obtener_vecinos_cercanos(datos, params['k_vecinos']) if params.get('k_vecinos') else None
+        lotes = EvaluadorLotes(datos, tamano_lote, vecinos, semilla=rng.getrandbits(64))
+        lotes.instrumentacion = instrumentacion
+
+    if reanudar is None:
+        # inicialización
+        solucion_actual = fase('solucion_inicial', _solucion_de_partida, datos, params, restricciones,
+                               solucion_inicial)
+        costo_inicial = solucion_actual.costo_global
+        if params.get('busqueda_local_inicial'):
+            fase('busqueda_local', busqueda_local.mejorar, solucion_actual)
+        # la mejor solución es un snapshot que se sobrescribe en su lugar (sin deepcopy)
+        mejor_solucion = solucion_actual.copia()
+
+        T = params.get('temperatura_inicial')
+        if T is None:
+            T = fase('calibracion', calibrar_temperatura_inicial, solucion_actual, matriz_distancia,
+                     proponer, rng, params.get('aceptacion_inicial', ACEPTACION_INICIAL))
+        temperatura_inicial = T
+        objetivo_partida = mejor_solucion.objetivo
+        iteracion = aceptados = ultima_mejora = 0
+        iteracion_fria = None # iteración en que la búsqueda se enfrió (None: sigue caliente)
+    else:
+        # continuar desde un punto de control: soluciones, contadores y generadores aleatorios
+        contadores = reanudar['contadores']
+        solucion_actual, mejor_solucion = reanudar['solucion_actual'], reanudar['mejor_solucion']
+        if restricciones is not None:
+            # la caché se reconstruye; las penalizaciones acumuladas se conservan tal cual
+            penalizaciones = (mejor_solucion.penalizacion, solucion_actual.penalizacion)
+            restricciones.preparar(mejor_solucion)
+            restricciones.preparar(solucion_actual)
+            mejor_solucion.penalizacion, solucion_actual.penalizacion = penalizaciones
+        rng.setstate(reanudar['estado_rng'])
+        if lotes is not None and reanudar['estado_rng_lotes'] is not None:
+            lotes.rng.bit_generator.state = reanudar['estado_rng_lotes']
+        costo_inicial = contadores['costo_inicial']
+        T = contadores['temperatura']
+        temperatura_inicial = contadores['temperatura_inicial']
+        iteracion = contadores['iteracion']
+        aceptados = contadores['aceptados']
+        ultima_mejora = contadores['ultima_mejora']
+        objetivo_partida = contadores.get('objetivo_partida', costo_inicial)
+        iteracion_fria = contadores.get('iteracion_fria')
+        inicio -= contadores['segundos'] # el tiempo límite cuenta desde la llamada original
+
+    tiempo_limite = params.get('tiempo_limite_s')
+    max_evaluaciones = params.get('max_evaluaciones')
+    con_presupuesto = tiempo_limite is not None or max_evaluaciones is not None
+    if con_presupuesto:
+        iteraciones_bloque = params.get('iteraciones_por_bloque',
+                                        max(ITERACIONES_POR_BLOQUE, tamano_lote or 0))
+        sin_mejora_max = params.get('iteraciones_sin_mejora', max(
+            ESTANCAMIENTO_MINIMO, ESTANCAMIENTO_POR_TIENDA * len(datos['indices_tiendas'])))
+        # un presupuesto <= 0 (o ya agotado) no entra al ciclo: se devuelve la solución de partida
+        motivo_fin = None
+        if tiempo_limite is not None and tiempo_limite <= 0:
+            motivo_fin = 'tiempo'
+        elif max_evaluaciones is not None and iteracion >= max_evaluaciones:
+            motivo_fin = 'evaluaciones'
+    else:
+        iteraciones_bloque = params['iteraciones_por_temp']
+        sin_mejora_max = params.get('iteraciones_sin_mejora')
+        motivo_fin = None if T > params['temperatura_final'] else 'temperatura'
+    temperatura_fria = _temperatura_fria(temperatura_inicial, params)
+    if reanudar is not None:
+        motivo_fin = contadores['motivo_fin']
+
+    archivo_punto_control = params.get('archivo_punto_control')
+    intervalo_punto_control = params.get('intervalo_punto_control_s', INTERVALO_PUNTO_CONTROL_S)
+    ultimo_punto_control = time.perf_counter()
+
+    def tras_avanzar(anterior, iteracion, T):
+        """
+        Revisiones tras avanzar de la iteración 'anterior' a 'iteracion' (un movimiento
+        o un lote): búsqueda local periódica, nuevo mejor y reporte de progreso; las
+        periódicas se hacen al cruzar cada múltiplo de su intervalo.
+        """
+        nonlocal ultima_mejora
+        # intensificación periódica: llevar la solución actual a un óptimo local
+        if busqueda_local_cada and iteracion // busqueda_local_cada > anterior // busqueda_local_cada:
+            fase('busqueda_local', busqueda_local.mejorar, solucion_actual)
+
+        # actualizar mejor solución global y notificar
+        if solucion_actual.objetivo < mejor_solucion.objetivo:
+            fase('mejor', mejor_solucion.copiar_de, solucion_actual)
+            ultima_mejora = iteracion
+            if notificar:
+                fase('reporte', notificador.nuevo_mejor, iteracion, T, mejor_solucion)
+
+        if notificar and iteracion // iteraciones_progreso > anterior // iteraciones_progreso:
+            fase('reporte', notificador.progreso, iteracion, T, solucion_actual.costo_global, mejor_solucion)
+
+    notificador.inicio(iteracion, T, solucion_actual)
     
-    iteracion = 0
-    while T > params['temperatura_final']:
+    while motivo_fin is None:
         
-        for _ in range(params['iteraciones_por_temp']):
-            iteracion += 1
-            
-            # generar una solución vecina
-            solucion_vecina = generar_vecino(solucion_actual, datos)
+        bloque = iteraciones_bloque
+        if max_evaluaciones is not None:
+            bloque = min(bloque, max_evaluaciones - iteracion)
+        aceptados_bloque = 0
+
+        if lotes is not None:
+            # lotes de candidatos: cada lote avanza n iteraciones
+            evaluados = 0
+            while evaluados < bloque:
+                n = min(lotes.tamano, bloque - evaluados)
+                aceptados_bloque += lotes.paso(solucion_actual, T, n)
+                iteracion += n
+                evaluados += n
+                tras_avanzar(iteracion - n, iteracion, T)
+        else:
+            for _ in range(bloque):
+                iteracion += 1
+                if medir:
+                    t_inicio = reloj()
             
-            # calcular la diferencia de costo (delta E)
-            delta_E = solucion_vecina.costo_global - solucion_actual.costo_global
+                # proponer un movimiento vecino (sin construir la solución candidata)
+                movimiento = proponer(solucion_actual, rng)
             
-            # decisión de aceptación
-            if delta_E < 0:
-                solucion_actual = solucion_vecina
-            else:
-                probabilidad_aceptacion = np.exp(-delta_E / T)
-                if random.random() < probabilidad_aceptacion:
-                    solucion_actual = solucion_vecina
-
-            # actualizar mejor solución global y mostrar Resultado
-            if solucion_actual.costo_global < mejor_solucion.costo_global:
-                mejor_solucion = copy.deepcopy(solucion_actual)
+                if movimiento is not None:
+                    if medir:
+                        t_generado = reloj()
+                    # calcular la diferencia de costo (delta E) con las aristas afectadas
+                    delta_E = movimiento.delta(solucion_actual, matriz_distancia)
+                    delta_total = delta_E
+                    if restricciones is not None:
+                        delta_total += restricciones.delta(movimiento, solucion_actual)
+                    if medir:
+                        t_evaluado = reloj()
                 
-                detalles = mejor_solucion.obtener_detalles_ruta(datos['df_nodos'])
-                
-                print(f"--- ITERACIÓN {iteracion} - NUEVO MEJOR GLOBAL ENCONTRADO ---")
-                print(f"Costo Global (Distancia Total): {mejor_solucion.costo_global:.2f} km\n")
-                
-                for detalle in detalles:
-                    print(f"| Ruta Combustible: {detalle['costo_combustible']:.2f} | Ruta Distancia: {detalle['distancia']:.2f} km | Ruta: {detalle['ruta_descriptiva']}")
-                print("-" * 50)
-            
-            if iteracion % 500 == 0:
-                 print(f"Progreso: Iteración {iteracion}, Temperatura: {T:.4f}, Mejor Costo: {mejor_solucion.costo_global:.2f}")
+                    # decisión de aceptación
+                    aceptado = delta_total < 0 or rng.random() < math.exp(-delta_total / T)
+                    if aceptado:
+                        movimiento.aplicar(solucion_actual, delta_E)
+                        if restricciones is not None:
+                            restricciones.aplicar(movimiento, solucion_actual)
+                        aceptados_bloque += 1
+                    if medir:
+                        instrumentacion.registrar_paso(type(movimiento).__name__, aceptado, t_inicio,
+                                                       t_generado, t_evaluado, reloj())
+                elif medir:
+                    instrumentacion.registrar_nulo(reloj() - t_inicio)
+
+                tras_avanzar(iteracion - 1, iteracion, T)
 
-        # enfriamiento
-        T *= params['tasa_enfriamiento']
+        aceptados += aceptados_bloque
+
+        # criterios de paro y enfriamiento (geométrico o adaptativo)
+        if T > temperatura_fria:
+            iteracion_fria = None
+        elif iteracion_fria is None:
+            iteracion_fria = iteracion
+        congelado = aceptados_bloque < ACEPTACION_CONGELADA * max(bloque, 1)
+        estancado = (sin_mejora_max and congelado and iteracion_fria is not None and
+                     iteracion - max(ultima_mejora, iteracion_fria) >= sin_mejora_max)
+        if estancado and con_presupuesto and not mejor_solucion.objetivo < objetivo_partida:
+            estancado = False # con presupuesto: se usa completo si aún no se mejoró la partida
+        if estancado:
+            motivo_fin = 'estancamiento'
+        elif con_presupuesto:
+            avance_tiempo = (time.perf_counter() - inicio) / tiempo_limite if tiempo_limite is not None else 0.0
+            avance_evaluaciones = iteracion / max_evaluaciones if max_evaluaciones is not None else 0.0
+            if avance_tiempo >= 1:
+                motivo_fin = 'tiempo'
+            elif avance_evaluaciones >= 1:
+                motivo_fin = 'evaluaciones'
+            else:
+                T = _ajustar_temperatura(T, aceptados_bloque / max(bloque, 1),
+                                         max(avance_tiempo, avance_evaluaciones), params)
+        else:
+            T *= params['tasa_enfriamiento']
+            if T <= params['temperatura_final']:
+                motivo_fin = 'temperatura'
+
+        # punto de control entre bloques (el estado queda listo para el siguiente bloque)
+        if archivo_punto_control and (motivo_fin is not None or
+                                      time.perf_counter() - ultimo_punto_control >= intervalo_punto_control):
+            fase('punto_control', guardar_punto_control, archivo_punto_control, solucion_actual,
+                 mejor_solucion, rng, params, {
+                'temperatura': T,
+                'temperatura_inicial': temperatura_inicial,
+                'costo_inicial': costo_inicial,
+                'iteracion': iteracion,
+                'aceptados': aceptados,
+                'ultima_mejora': ultima_mejora,
+                'objetivo_partida': objetivo_partida,
+                'iteracion_fria': iteracion_fria,
+                'segundos': time.perf_counter() - inicio,
+                'motivo_fin': motivo_fin,
+            }, lotes.rng if lotes is not None else None)
+            ultimo_punto_control = time.perf_counter()
         
-    return mejor_solucion
\ No newline at end of file
+    if params.get('pulido_final'):
+        fase('busqueda_local', busqueda_local.mejorar, mejor_solucion)
+
+    # el costo se acumuló por deltas: se recalcula una vez para eliminar el error de redondeo
+    mejor_solucion.evaluar_costo_global(matriz_distancia)
+    if restricciones is not None:
+        resumen_restricciones = restricciones.resumen(mejor_solucion)
+    notificador.fin(iteracion, T, mejor_solucion)
+
+    if estadisticas is not None:
+        estadisticas.update({
+            'iteraciones': iteracion,
+            'aceptados': aceptados,
+            'costo_inicial': costo_inicial,
+            'mejor_costo': mejor_solucion.costo_global,
+            'temperatura_inicial': temperatura_inicial,
+            'temperatura_final': T,
+            'segundos': time.perf_counter() - inicio,
+            'motivo_fin': motivo_fin,
+        })
+        if restricciones is not None:
+            estadisticas.update(resumen_restricciones)
+
+    if medir:
+        instrumentacion.terminar(iteracion)
+        if archivo_instrumentacion:
+            instrumentacion.exportar(archivo_instrumentacion)
+        if estadisticas is not None:
+            estadisticas['instrumentacion'] = instrumentacion.resumen()
+    return mejor_solucion
+
+def reanudar_recocido_simulado(datos, archivo, params=None, observadores=None, estadisticas=None):
+    """
+    Continúa un recocido simulado desde el punto de control 'archivo' con los mismos
+    parámetros guardados (o con 'params' si se dan, p. ej. para alargar el tiempo
+    límite) y los generadores aleatorios en el mismo estado: sin presupuesto de tiempo
+    la ejecución reanudada sigue exactamente la misma trayectoria que la original.
+    Los nuevos puntos de control se siguen escribiendo en 'archivo'.
+    """
+    estado = cargar_punto_control(archivo)
+    params = dict(estado['params'] if params is None else params)
+    params.setdefault('archivo_punto_control', archivo)
+    return recocido_simulado(datos, params, random.Random(), observadores, estadisticas,
+                             reanudar=estado)
@@ -1,45 +1,195 @@
-from utils import calcular_distancia_ruta
+import numpy as np
 from data_loader import FACTOR_COMBUSTIBLE_POR_KM
 
 class Solucion:
-    """Representa un conjunto completo de rutas para el MDVRP."""
-    def __init__(self, rutas, matriz_distancia, matriz_costo):
+    """
+    Representa un conjunto completo de rutas para el MDVRP.
+    Las rutas se guardan concatenadas en un solo arreglo int32 ('tour') y
+    'inicios' indica dónde empieza cada una: la ruta r es
+    tour[inicios[r]:inicios[r + 1]]. La distancia de cada ruta queda en caché y
+    'posicion[tienda]' guarda el índice de cada tienda dentro del tour
+    (para los CDs, que aparecen varias veces, no se mantiene).
+    'costo_global' es siempre la distancia total; con capacidad o ventanas de
+    tiempo (restricciones.py) la penalización va aparte y 'objetivo' suma ambas.
+    """
+    __slots__ = ('tour', 'inicios', 'distancias_ruta', 'costo_global', 'posicion', 'penalizacion')
+
+    def __init__(self, rutas, matriz_distancia):
         # rutas es una lista donde cada elemento es una lista de IDs de nodos:
         # [[CD_ID, T1_ID, T2_ID, ..., CD_ID], [CD_ID, T3_ID, ..., CD_ID], ...]
-        self.rutas = rutas 
-        self.matriz_distancia = matriz_distancia
-        self.matriz_costo = matriz_costo
-        self.costo_global = self.evaluar_costo_global()
+        largos = [len(ruta) for ruta in rutas]
+        self.tour = np.fromiter((nodo for ruta in rutas for nodo in ruta),
+                                dtype=np.int32, count=sum(largos))
+        self.inicios = np.zeros(len(rutas) + 1, dtype=np.int64)
+        np.cumsum(largos, out=self.inicios[1:])
+        self.posicion = np.zeros(int(self.tour.max(initial=-1)) + 1, dtype=np.int64)
+        self.posicion[self.tour] = np.arange(len(self.tour))
+        self.distancias_ruta = np.zeros(len(rutas))
+        self.costo_global = self.evaluar_costo_global(matriz_distancia)
+        self.penalizacion = 0.0
+
+    @property
+    def objetivo(self):
+        """Valor que minimiza la búsqueda: distancia total + penalización por restricciones."""
+        return self.costo_global + self.penalizacion
+
+    @property
+    def num_rutas(self):
+        return len(self.inicios) - 1
+
+    @property
+    def rutas(self):
+        """Rutas como listas de IDs (para reportes y visualización)."""
+        return [self.ruta(r).tolist() for r in range(self.num_rutas)]
 
-    def evaluar_costo_global(self):
+    def ruta(self, r):
+        """Vista (sin copia) de la ruta r dentro del tour."""
+        return self.tour[self.inicios[r]:self.inicios[r + 1]]
+
+    def evaluar_costo_global(self, matriz_distancia):
         """
-        Calcula el costo global de la solución (minimiza la Distancia Total en km).
+        Calcula el costo global de la solución (minimiza la Distancia Total en km)
+        y actualiza la caché de distancias por ruta.
         """
-        costo_total = 0
-        for ruta in self.rutas:
-            # el costo que minimizamos es la distancia total en km.
-            costo_total += calcular_distancia_ruta(ruta, self.matriz_distancia)
-            
-        return costo_total
+        # distancia de cada arista del tour; se anulan las que unen dos rutas
+        aristas = np.asarray(matriz_distancia[self.tour[:-1], self.tour[1:]], dtype=np.float64)
+        aristas[self.inicios[1:-1] - 1] = 0.0
+        acumulado = np.concatenate(([0.0], np.cumsum(aristas)))
+
+        # la ruta r usa las aristas inicios[r] .. inicios[r + 1] - 2
+        finales = np.maximum(self.inicios[1:] - 1, self.inicios[:-1])
+        self.distancias_ruta = acumulado[finales] - acumulado[self.inicios[:-1]]
+        self.costo_global = float(self.distancias_ruta.sum())
+        return self.costo_global
+
+    def reubicar(self, ruta_origen, pos_origen, ruta_destino, pos_destino,
+                 delta_origen, delta_destino):
+        """
+        Mueve una tienda entre posiciones/rutas ('pos_destino' es relativo a la
+        ruta destino sin la tienda) y actualiza las distancias con los deltas.
+        """
+        inicios = self.inicios
+        g_origen = inicios[ruta_origen] + pos_origen
+        g_destino = inicios[ruta_destino] + pos_destino
+        if ruta_origen < ruta_destino:
+            g_destino -= 1
+
+        # desplazar el tramo intermedio una posición (memmove) y colocar la tienda
+        tour = self.tour
+        tienda = tour[g_origen]
+        if g_origen < g_destino:
+            tour[g_origen:g_destino] = tour[g_origen + 1:g_destino + 1]
+            inicios[ruta_origen + 1:ruta_destino + 1] -= 1
+            desde, hasta = g_origen, g_destino + 1
+        else:
+            tour[g_destino + 1:g_origen + 1] = tour[g_destino:g_origen]
+            inicios[ruta_destino + 1:ruta_origen + 1] += 1
+            desde, hasta = g_destino, g_origen + 1
+        tour[g_destino] = tienda
+        self.posicion[tour[desde:hasta]] = np.arange(desde, hasta)
+
+        self.distancias_ruta[ruta_origen] += delta_origen
+        self.distancias_ruta[ruta_destino] += delta_destino
+        self.costo_global += delta_origen + delta_destino
+
+    def invertir_tramo(self, ruta, i, j, delta):
+        """Invierte las posiciones i..j (inclusive) de una ruta (movimiento 2-opt)."""
+        inicio = self.inicios[ruta]
+        desde, hasta = inicio + i, inicio + j + 1
+        self.tour[desde:hasta] = self.tour[desde:hasta][::-1]
+        self.posicion[self.tour[desde:hasta]] = np.arange(desde, hasta)
+        self.distancias_ruta[ruta] += delta
+        self.costo_global += delta
+
+    def reemplazar_rutas(self, nuevas_rutas, deltas):
+        """
+        Sustituye rutas completas: 'nuevas_rutas' y 'deltas' son diccionarios
+        {indice_ruta: ruta} y {indice_ruta: cambio de distancia}. Si cambian los
+        largos se reconstruye el tour desde la primera ruta afectada.
+        """
+        rutas = sorted(nuevas_rutas)
+        largos_iguales = all(len(nuevas_rutas[r]) == self.inicios[r + 1] - self.inicios[r]
+                             for r in rutas)
+        if largos_iguales:
+            for r in rutas:
+                self.tour[self.inicios[r]:self.inicios[r + 1]] = nuevas_rutas[r]
+            desde, hasta = self.inicios[rutas[0]], self.inicios[rutas[-1] + 1]
+        else:
+            primera = rutas[0]
+            piezas = [nuevas_rutas.get(r, self.ruta(r)) for r in range(primera, self.num_rutas)]
+            largos = np.array([len(pieza) for pieza in piezas])
+            desde = self.inicios[primera]
+            self.tour[desde:] = np.concatenate(piezas)
+            np.cumsum(largos, out=self.inicios[primera + 1:])
+            self.inicios[primera + 1:] += desde
+            hasta = len(self.tour)
+        self.posicion[self.tour[desde:hasta]] = np.arange(desde, hasta)
+
+        for r in rutas:
+            self.distancias_ruta[r] += deltas[r]
+            self.costo_global += deltas[r]
+
+    def intercambiar(self, ruta, i, j, delta):
+        """Intercambia las posiciones i y j de una ruta y actualiza el costo con 'delta'."""
+        inicio = self.inicios[ruta]
+        tour = self.tour
+        tour[inicio + i], tour[inicio + j] = tour[inicio + j], tour[inicio + i]
+        self.posicion[tour[inicio + i]] = inicio + i
+        self.posicion[tour[inicio + j]] = inicio + j
+        self.distancias_ruta[ruta] += delta
+        self.costo_global += delta
+
+    def copia(self):
+        """Copia independiente de la solución (copia de arreglos, sin deepcopy)."""
+        nueva = Solucion.__new__(Solucion)
+        nueva.tour = self.tour.copy()
+        nueva.inicios = self.inicios.copy()
+        nueva.distancias_ruta = self.distancias_ruta.copy()
+        nueva.posicion = self.posicion.copy()
+        nueva.costo_global = self.costo_global
+        nueva.penalizacion = self.penalizacion
+        return nueva
+
+    def copiar_de(self, otra):
+        """Sobrescribe esta solución con 'otra' reutilizando los arreglos (snapshot/restore)."""
+        if self.tour.shape != otra.tour.shape or self.inicios.shape != otra.inicios.shape:
+            self.tour = otra.tour.copy()
+            self.inicios = otra.inicios.copy()
+            self.distancias_ruta = otra.distancias_ruta.copy()
+            self.posicion = otra.posicion.copy()
+        else:
+            np.copyto(self.tour, otra.tour)
+            np.copyto(self.inicios, otra.inicios)
+            np.copyto(self.distancias_ruta, otra.distancias_ruta)
+            np.copyto(self.posicion, otra.posicion)
+        self.costo_global = otra.costo_global
+        self.penalizacion = otra.penalizacion
+
+    def obtener_detalles_ruta(self, nombres_nodos):
+        """
+        Devuelve una lista de diccionarios con los detalles de cada ruta.
+        'nombres_nodos' es el arreglo de nombres indexado por ID (datos['nombres_nodos']);
+        también se acepta el DataFrame de nodos.
+        """
+        if hasattr(nombres_nodos, 'set_index'):
+            nombres_nodos = nombres_nodos.sort_values('ID_NUMERICO')['Nombre'].to_numpy(dtype=object)
 
-    def obtener_detalles_ruta(self, df_nodos):
-        """Devuelve una lista de diccionarios con los detalles de cada ruta."""
         detalles = []
-        for i, ruta_ids in enumerate(self.rutas):
-            if len(ruta_ids) < 2: # ruta vacía o solo un nodo
+        for r in range(self.num_rutas):
+            ruta_ids = self.ruta(r)
+            if len(ruta_ids) < 3: # ruta sin tiendas
                 continue
-                
-            distancia = calcular_distancia_ruta(ruta_ids, self.matriz_distancia)
+
+            distancia = float(self.distancias_ruta[r])
             costo_combustible = distancia * FACTOR_COMBUSTIBLE_POR_KM
-            
+
             # obtener los nombres descriptivos
-            nombres = df_nodos.set_index('ID_NUMERICO').loc[ruta_ids]['Nombre'].tolist()
-            ruta_descriptiva = " -> ".join(nombres)
-            
+            ruta_descriptiva = " -> ".join(nombres_nodos[ruta_ids])
+
             detalles.append({
-                'id_cd': ruta_ids[0],
+                'id_cd': int(ruta_ids[0]),
                 'ruta_descriptiva': ruta_descriptiva,
                 'distancia': distancia,
                 'costo_combustible': costo_combustible
             })
-        return detalles
\ No newline at end of file
+        return detalles
@@ -0,0 +1,159 @@
+import random
+import numpy as np
+
+
+class Reubicacion:
+    """
+    Movimiento de reubicación: saca la tienda en 'pos_origen' de la ruta
+    'ruta_origen' y la inserta en 'pos_destino' de la ruta 'ruta_destino'.
+    'pos_destino' se interpreta sobre la ruta destino ya sin la tienda (igual
+    que hacía generar_vecino con pop() + insert()).
+    """
+    __slots__ = ('ruta_origen', 'pos_origen', 'ruta_destino', 'pos_destino',
+                 'delta_origen', 'delta_destino')
+
+    def __init__(self, ruta_origen, pos_origen, ruta_destino, pos_destino):
+        self.ruta_origen = ruta_origen
+        self.pos_origen = pos_origen
+        self.ruta_destino = ruta_destino
+        self.pos_destino = pos_destino
+        self.delta_origen = self.delta_destino = 0.0
+
+    def delta(self, solucion, matriz_distancia):
+        """Cambio de costo del movimiento, usando solo las aristas afectadas."""
+        tour = solucion.tour
+        i = self.pos_origen
+        g = solucion.inicios[self.ruta_origen] + i
+        a, x, b = tour[g - 1], tour[g], tour[g + 1]
+
+        # quitar la tienda: (a, x) + (x, b) se reemplazan por (a, b)
+        self.delta_origen = matriz_distancia[a, b] - matriz_distancia[a, x] - matriz_distancia[x, b]
+
+        # vecinos (u, v) del punto de inserción en la ruta destino sin la tienda
+        inicio = solucion.inicios[self.ruta_destino]
+        p = self.pos_destino
+        if self.ruta_origen == self.ruta_destino:
+            u = tour[inicio + p - 1] if p - 1 < i else tour[inicio + p]
+            v = tour[inicio + p] if p < i else tour[inicio + p + 1]
+        else:
+            u, v = tour[inicio + p - 1], tour[inicio + p]
+
+        # insertar la tienda: (u, v) se reemplaza por (u, x) + (x, v)
+        self.delta_destino = matriz_distancia[u, x] + matriz_distancia[x, v] - matriz_distancia[u, v]
+        return self.delta_origen + self.delta_destino
+
+    def aplicar(self, solucion, delta):
+        """Aplica el movimiento sobre la solución (sin copiarla)."""
+        solucion.reubicar(self.ruta_origen, self.pos_origen,
+                          self.ruta_destino, self.pos_destino,
+                          self.delta_origen, self.delta_destino)
+
+    def inverso(self):
+        """Movimiento que deshace este movimiento una vez aplicado."""
+        return Reubicacion(self.ruta_destino, self.pos_destino,
+                           self.ruta_origen, self.pos_origen)
+
+
+class Intercambio:
+    """Movimiento de intercambio (intra-ruta / TSP) de las posiciones i y j de una ruta."""
+    __slots__ = ('ruta', 'i', 'j')
+
+    def __init__(self, ruta, i, j):
+        self.ruta = ruta
+        self.i = min(i, j)
+        self.j = max(i, j)
+
+    def delta(self, solucion, matriz_distancia):
+        """Cambio de costo del movimiento, usando solo las aristas afectadas."""
+        inicio = solucion.inicios[self.ruta]
+        ruta = solucion.tour[inicio:solucion.inicios[self.ruta + 1]]
+        i, j = self.i, self.j
+        nodo_i, nodo_j = ruta[i], ruta[j]
+
+        # aristas (k, k+1) que tocan las posiciones i y j (se unen si son contiguas)
+        delta = 0.0
+        for k in {i - 1, i, j - 1, j}:
+            origen, destino = ruta[k], ruta[k + 1]
+            delta -= matriz_distancia[origen, destino]
+
+            # nodos en las posiciones k y k+1 después del intercambio
+            if k == i:
+                origen = nodo_j
+            elif k == j:
+                origen = nodo_i
+            if k + 1 == i:
+                destino = nodo_j
+            elif k + 1 == j:
+                destino = nodo_i
+            delta += matriz_distancia[origen, destino]
+        return delta
+
+    def aplicar(self, solucion, delta):
+        """Aplica el movimiento sobre la solución (sin copiarla)."""
+        solucion.intercambiar(self.ruta, self.i, self.j, delta)
+
+    def inverso(self):
+        """El intercambio es su propio inverso."""
+        return Intercambio(self.ruta, self.i, self.j)
+
+
+def _largo_ruta(inicios, r):
+    return int(inicios[r + 1] - inicios[r])
+
+def _entero(rng, n):
+    """Entero uniforme en [0, n); más barato que rng.randrange en el ciclo del SA."""
+    return int(rng.random() * n)
+
+def proponer_movimiento(solucion, rng=random):
+    """
+    Elige un movimiento aleatorio (Intercambio o Reubicación) sobre la solución.
+    Devuelve None si el movimiento elegido no es posible.
+    """
+    if rng.random() < 0.5:
+        return proponer_reubicacion(solucion, rng)
+    return proponer_intercambio(solucion, rng)
+
+def proponer_reubicacion(solucion, rng=random):
+    """Reubicación aleatoria de una tienda (entre rutas); None si todas las rutas están vacías."""
+    inicios = solucion.inicios
+    num_rutas = len(inicios) - 1
+
+    # se elige una ruta no vacía por rechazo, que es uniforme y evita recorrer todas las rutas
+    for _ in range(num_rutas):
+        idx_ruta_origen = _entero(rng, num_rutas)
+        largo_origen = _largo_ruta(inicios, idx_ruta_origen)
+        if largo_origen > 2:
+            break
+    else:
+        rutas_no_vacias = np.flatnonzero(np.diff(inicios) > 2)
+        if rutas_no_vacias.size == 0:
+            return None
+        idx_ruta_origen = int(rutas_no_vacias[_entero(rng, rutas_no_vacias.size)])
+        largo_origen = _largo_ruta(inicios, idx_ruta_origen)
+
+    # seleccionar la tienda a mover (índices 1 al penúltimo)
+    idx_tienda = 1 + _entero(rng, largo_origen - 2)
+
+    idx_ruta_destino = _entero(rng, num_rutas)
+    # la ruta destino pierde un nodo si es la misma ruta de origen
+    largo_destino = _largo_ruta(inicios, idx_ruta_destino)
+    if idx_ruta_destino == idx_ruta_origen:
+        largo_destino -= 1
+    pos_destino = 1 + _entero(rng, largo_destino - 1)
+
+    return Reubicacion(idx_ruta_origen, idx_tienda, idx_ruta_destino, pos_destino)
+
+def proponer_intercambio(solucion, rng=random):
+    """Intercambio aleatorio intra-ruta (TSP); None si la ruta elegida tiene menos de 2 tiendas."""
+    inicios = solucion.inicios
+    idx_ruta = _entero(rng, len(inicios) - 1)
+    largo = _largo_ruta(inicios, idx_ruta)
+    if largo < 4: # minimo 2 tiendas + 2 CDs
+        return None
+
+    # dos posiciones distintas entre 1 y largo - 2
+    i = 1 + _entero(rng, largo - 2)
+    j = 1 + _entero(rng, largo - 3)
+    if j >= i:
+        j += 1
+    return Intercambio(idx_ruta, i, j)
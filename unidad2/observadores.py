@@ -0,0 +1,123 @@
+import time
+
+
+class EventoBusqueda:
+    """
+    Estado de la búsqueda que se entrega a los observadores. Los detalles de las
+    rutas se calculan solo si el observador los pide (formato perezoso).
+    'solucion' es el snapshot de la mejor solución, que el algoritmo sobrescribe
+    después: un observador que quiera conservarla debe usar solucion.copia().
+    """
+    __slots__ = ('iteracion', 'temperatura', 'costo_actual', 'solucion', 'nombres_nodos')
+
+    def __init__(self, iteracion, temperatura, costo_actual, solucion, nombres_nodos):
+        self.iteracion = iteracion
+        self.temperatura = temperatura
+        self.costo_actual = costo_actual
+        self.solucion = solucion
+        self.nombres_nodos = nombres_nodos
+
+    @property
+    def mejor_costo(self):
+        return self.solucion.costo_global
+
+    def detalles_ruta(self):
+        """Detalles de cada ruta de la mejor solución (con nombres de los nodos)."""
+        return self.solucion.obtener_detalles_ruta(self.nombres_nodos)
+
+
+class Observador:
+    """Interfaz base de los observadores; las subclases sobrescriben los eventos que les interesan."""
+
+    def inicio(self, evento):
+        pass
+
+    def nuevo_mejor(self, evento):
+        pass
+
+    def progreso(self, evento):
+        pass
+
+    def fin(self, evento):
+        pass
+
+
+class ReporteConsola(Observador):
+    """Imprime en consola el avance del recocido simulado o de la ALNS (mismo formato que antes)."""
+
+    def __init__(self, mostrar_rutas=True, algoritmo='ALGORITMO DE RECOCIDO SIMULADO'):
+        self.mostrar_rutas = mostrar_rutas
+        self.algoritmo = algoritmo
+
+    def inicio(self, evento):
+        print(f"\n--- INICIO DEL {self.algoritmo} ---")
+
+    def nuevo_mejor(self, evento):
+        print(f"--- ITERACIÓN {evento.iteracion} - NUEVO MEJOR GLOBAL ENCONTRADO ---")
+        print(f"Costo Global (Distancia Total): {evento.mejor_costo:.2f} km\n")
+
+        if self.mostrar_rutas:
+            for detalle in evento.detalles_ruta():
+                print(f"| Ruta Combustible: {detalle['costo_combustible']:.2f} | Ruta Distancia: {detalle['distancia']:.2f} km | Ruta: {detalle['ruta_descriptiva']}")
+        print("-" * 50)
+
+    def progreso(self, evento):
+        print(f"Progreso: Iteración {evento.iteracion}, Temperatura: {evento.temperatura:.4f}, Mejor Costo: {evento.mejor_costo:.2f}")
+
+
+class Notificador:
+    """
+    Reparte los eventos a los observadores con límite de frecuencia: un nuevo
+    mejor se entrega como máximo una vez cada 'intervalo_s' segundos (las mejoras
+    intermedias se acumulan y se entrega la última), y el progreso cada
+    'cada_iteraciones' iteraciones. Sin observadores no hace nada.
+    """
+
+    def __init__(self, observadores, nombres_nodos=None, intervalo_s=0.5, cada_iteraciones=500):
+        self.observadores = list(observadores or [])
+        self.activo = bool(self.observadores)
+        self.nombres_nodos = nombres_nodos
+        self.intervalo_s = intervalo_s
+        self.cada_iteraciones = cada_iteraciones
+        self._ultimo_envio = float('-inf')
+        self._mejor_pendiente = None
+
+    def _evento(self, iteracion, temperatura, costo_actual, solucion):
+        return EventoBusqueda(iteracion, temperatura, costo_actual, solucion, self.nombres_nodos)
+
+    def _emitir(self, nombre, evento):
+        for observador in self.observadores:
+            getattr(observador, nombre)(evento)
+
+    def inicio(self, iteracion, temperatura, solucion):
+        if self.activo:
+            self._emitir('inicio', self._evento(iteracion, temperatura, solucion.costo_global, solucion))
+
+    def nuevo_mejor(self, iteracion, temperatura, mejor_solucion):
+        """Llamado en cada mejora; solo notifica si pasó el intervalo mínimo."""
+        ahora = time.perf_counter()
+        if ahora - self._ultimo_envio >= self.intervalo_s:
+            self._ultimo_envio = ahora
+            self._mejor_pendiente = None
+            self._emitir('nuevo_mejor', self._evento(iteracion, temperatura,
+                                                     mejor_solucion.costo_global, mejor_solucion))
+        else:
+            self._mejor_pendiente = (iteracion, temperatura)
+
+    def _vaciar_pendiente(self, mejor_solucion):
+        if self._mejor_pendiente is not None:
+            iteracion, temperatura = self._mejor_pendiente
+            self._mejor_pendiente = None
+            self._ultimo_envio = time.perf_counter()
+            self._emitir('nuevo_mejor', self._evento(iteracion, temperatura,
+                                                     mejor_solucion.costo_global, mejor_solucion))
+
+    def progreso(self, iteracion, temperatura, costo_actual, mejor_solucion):
+        self._vaciar_pendiente(mejor_solucion)
+        self._emitir('progreso', self._evento(iteracion, temperatura, costo_actual, mejor_solucion))
+
+    def fin(self, iteracion, temperatura, mejor_solucion):
+        if self.activo:
+            self._vaciar_pendiente(mejor_solucion)
+            self._emitir('fin', self._evento(iteracion, temperatura,
+                                             mejor_solucion.costo_global, mejor_solucion))
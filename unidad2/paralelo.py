@@ -0,0 +1,201 @@
+import math
+import os
+import random
+import time
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from metaheuristica import (recocido_simulado, generar_solucion_inicial, ciclo_metropolis,
+                            crear_generador_movimientos)
+from restricciones import crear_restricciones
+from vecindario import obtener_vecinos_cercanos
+
+# llaves del diccionario de datos que necesitan los procesos trabajadores
+# (el DataFrame y la matriz de costos no se envían)
+LLAVES_TRABAJADOR = ('num_nodos', 'indices_cds', 'indices_tiendas', 'factor_combustible',
+                     'vecinos_cercanos', 'coordenadas', 'demandas', 'ventanas', 'tiempos_servicio')
+
+# estado global de cada proceso trabajador (se llena en _inicializar_trabajador)
+_DATOS_TRABAJADOR = None
+_MEMORIA_TRABAJADOR = None
+_PROPONER_TRABAJADOR = None
+_RESTRICCIONES_TRABAJADOR = None
+
+
+def _publicar_matriz(matriz):
+    """Copia la matriz a un bloque de memoria compartida y devuelve (bloque, descriptor)."""
+    memoria = SharedMemory(create=True, size=max(matriz.nbytes, 1))
+    compartida = np.ndarray(matriz.shape, dtype=matriz.dtype, buffer=memoria.buf)
+    compartida[:] = matriz
+    descriptor = ('memoria', memoria.name, matriz.shape, matriz.dtype.str)
+    return memoria, descriptor
+
+
+def _inicializar_trabajador(descriptor, datos_ligeros):
+    """Conecta el proceso trabajador a la matriz compartida (se lee sin copiarla)."""
+    global _DATOS_TRABAJADOR, _MEMORIA_TRABAJADOR
+    if descriptor[0] == 'archivo':
+        # matriz de la caché en disco: se mapea y comparte las páginas del sistema
+        matriz = np.asarray(np.load(descriptor[1], mmap_mode='r'))
+    elif descriptor[0] == 'objeto':
+        matriz = descriptor[1]
+    else:
+        _, nombre, forma, dtype = descriptor
+        _MEMORIA_TRABAJADOR = SharedMemory(name=nombre)
+        matriz = np.ndarray(forma, dtype=np.dtype(dtype), buffer=_MEMORIA_TRABAJADOR.buf)
+        matriz.flags.writeable = False
+    _DATOS_TRABAJADOR = dict(datos_ligeros, matriz_distancia=matriz)
+
+
+def _crear_pool(datos, params, num_procesos):
+    """
+    Crea el pool de procesos. Si la matriz viene de la caché en disco los trabajadores
+    la abren mapeada; si no, se copia una vez a memoria compartida.
+    """
+    if params.get('k_vecinos'):
+        # el índice de vecinos se calcula una vez aquí y se envía a los trabajadores
+        obtener_vecinos_cercanos(datos, params['k_vecinos'])
+
+    memoria = None
+    if datos.get('archivo_matriz_distancia'):
+        descriptor = ('archivo', datos['archivo_matriz_distancia'])
+    elif not isinstance(datos['matriz_distancia'], np.ndarray):
+        # modo disperso: el objeto es O(N * k) y se envía una vez a cada trabajador
+        descriptor = ('objeto', datos['matriz_distancia'])
+    else:
+        memoria, descriptor = _publicar_matriz(np.ascontiguousarray(datos['matriz_distancia']))
+    datos_ligeros = {llave: datos[llave] for llave in LLAVES_TRABAJADOR if llave in datos}
+    pool = Pool(processes=num_procesos or os.cpu_count(),
+                initializer=_inicializar_trabajador,
+                initargs=(descriptor, datos_ligeros))
+    return pool, memoria
+
+
+def _cerrar_pool(pool, memoria):
+    pool.close()
+    pool.join()
+    if memoria is not None:
+        memoria.close()
+        memoria.unlink()
+
+
+# ==============================================================================
+# multi-arranque: reinicios independientes con semilla propia
+# ==============================================================================
+
+def _tarea_reinicio(args):
+    """Ejecuta un recocido simulado completo dentro de un proceso trabajador."""
+    indice, semilla, params = args
+    estadisticas = {'replica': indice, 'semilla': semilla}
+    inicio = time.perf_counter()
+    solucion = recocido_simulado(_DATOS_TRABAJADOR, params, rng=random.Random(semilla),
+                                 estadisticas=estadisticas)
+    estadisticas['tiempo_s'] = time.perf_counter() - inicio
+    return solucion, estadisticas
+
+
+def recocido_simulado_multiarranque(datos, params, num_reinicios=None, num_procesos=None, semilla=0):
+    """
+    Ejecuta 'num_reinicios' recocidos simulados independientes (cada uno con su
+    semilla) en un pool de procesos. Devuelve la mejor solución y una lista con
+    las estadísticas de cada reinicio.
+    """
+    num_reinicios = num_reinicios or num_procesos or os.cpu_count()
+    tareas = [(i, semilla + i, params) for i in range(num_reinicios)]
+
+    print(f"\n--- RECOCIDO SIMULADO MULTI-ARRANQUE ({num_reinicios} reinicios) ---")
+    pool, memoria = _crear_pool(datos, params, num_procesos)
+    try:
+        resultados = pool.map(_tarea_reinicio, tareas)
+    finally:
+        _cerrar_pool(pool, memoria)
+
+    mejor_solucion = min((solucion for solucion, _ in resultados), key=lambda s: s.objetivo)
+    estadisticas = [est for _, est in resultados]
+    for est in estadisticas:
+        print(f"Reinicio {est['replica']} (semilla {est['semilla']}): "
+              f"Mejor Costo {est['mejor_costo']:.2f} km en {est['tiempo_s']:.2f} s")
+    return mejor_solucion, estadisticas
+
+
+# ==============================================================================
+# templado paralelo (replica exchange): una temperatura fija por réplica
+# ==============================================================================
+
+def _tarea_segmento(args):
+    """Avanza una réplica 'iteraciones' pasos a su temperatura dentro de un trabajador."""
+    global _PROPONER_TRABAJADOR, _RESTRICCIONES_TRABAJADOR
+    solucion, mejor_solucion, T, iteraciones, semilla, params = args
+    if _PROPONER_TRABAJADOR is None:
+        _PROPONER_TRABAJADOR = crear_generador_movimientos(_DATOS_TRABAJADOR, params)
+        _RESTRICCIONES_TRABAJADOR = crear_restricciones(_DATOS_TRABAJADOR, params)
+    aceptados = ciclo_metropolis(solucion, mejor_solucion, _DATOS_TRABAJADOR['matriz_distancia'],
+                                 T, iteraciones, random.Random(semilla), _PROPONER_TRABAJADOR,
+                                 _RESTRICCIONES_TRABAJADOR)
+    return solucion, mejor_solucion, aceptados
+
+
+def templado_paralelo(datos, params, num_replicas=None, num_procesos=None, semilla=0):
+    """
+    Templado paralelo (replica exchange): cada réplica corre Metropolis a una
+    temperatura fija de una escalera geométrica entre 'temperatura_inicial' y
+    'temperatura_final'; tras cada segmento de 'iteraciones_por_intercambio'
+    pasos se proponen intercambios de soluciones entre temperaturas vecinas.
+    Se repite 'rondas_intercambio' veces. Devuelve la mejor solución y las
+    estadísticas por réplica.
+    """
+    num_replicas = num_replicas or num_procesos or os.cpu_count()
+    iteraciones = params.get('iteraciones_por_intercambio', 1000)
+    rondas = params.get('rondas_intercambio', 100)
+    rng = random.Random(semilla)
+
+    # escalera de temperaturas (de la más caliente a la más fría)
+    temperaturas = np.geomspace(params['temperatura_inicial'], params['temperatura_final'],
+                                num_replicas).tolist()
+
+    restricciones = crear_restricciones(datos, params)
+    solucion_inicial = generar_solucion_inicial(datos, params.get('constructor', 'vecino_mas_cercano'),
+                                                restricciones)
+    soluciones = [solucion_inicial.copia() for _ in range(num_replicas)]
+    mejores = [solucion_inicial.copia() for _ in range(num_replicas)]
+    estadisticas = [{'replica': r, 'temperatura': temperaturas[r], 'aceptados': 0,
+                     'iteraciones': 0, 'intercambios_propuestos': 0,
+                     'intercambios_aceptados': 0} for r in range(num_replicas)]
+
+    print(f"\n--- TEMPLADO PARALELO ({num_replicas} réplicas, {rondas} rondas) ---")
+    pool, memoria = _crear_pool(datos, params, num_procesos)
+    try:
+        for ronda in range(rondas):
+            tareas = [(soluciones[r], mejores[r], temperaturas[r], iteraciones,
+                       semilla * 1_000_003 + ronda * num_replicas + r, params)
+                      for r in range(num_replicas)]
+            resultados = pool.map(_tarea_segmento, tareas)
+
+            for r, (solucion, mejor, aceptados) in enumerate(resultados):
+                soluciones[r], mejores[r] = solucion, mejor
+                estadisticas[r]['aceptados'] += aceptados
+                estadisticas[r]['iteraciones'] += iteraciones
+
+            # intercambios entre temperaturas vecinas (pares e impares alternados)
+            for r in range(ronda % 2, num_replicas - 1, 2):
+                caliente, fria = r, r + 1
+                estadisticas[caliente]['intercambios_propuestos'] += 1
+                exponente = (1.0 / temperaturas[fria] - 1.0 / temperaturas[caliente]) * \
+                            (soluciones[fria].objetivo - soluciones[caliente].objetivo)
+                if exponente >= 0 or rng.random() < math.exp(exponente):
+                    soluciones[caliente], soluciones[fria] = soluciones[fria], soluciones[caliente]
+                    estadisticas[caliente]['intercambios_aceptados'] += 1
+
+            mejor_ronda = min(s.objetivo for s in mejores)
+            if (ronda + 1) % 10 == 0:
+                print(f"Ronda {ronda + 1}/{rondas}, Mejor Costo: {mejor_ronda:.2f}")
+    finally:
+        _cerrar_pool(pool, memoria)
+
+    mejor_solucion = min(mejores, key=lambda s: s.objetivo)
+    mejor_solucion.evaluar_costo_global(datos['matriz_distancia'])
+    if restricciones is not None:
+        restricciones.preparar(mejor_solucion)
+    for r, est in enumerate(estadisticas):
+        est['mejor_costo'] = float(mejores[r].costo_global)
+    return mejor_solucion, estadisticas
@@ -0,0 +1,92 @@
+import json
+import os
+import numpy as np
+from model import Solucion
+
+# segundos mínimos entre dos puntos de control durante el recocido simulado
+INTERVALO_PUNTO_CONTROL_S = 60.0
+
+
+def _arreglos_solucion(prefijo, solucion):
+    return {
+        f'{prefijo}_tour': solucion.tour,
+        f'{prefijo}_inicios': solucion.inicios,
+        f'{prefijo}_distancias': solucion.distancias_ruta,
+        f'{prefijo}_escalares': np.array([solucion.costo_global, solucion.penalizacion]),
+    }
+
+
+def _a_json(valor):
+    """
+    Conversión para json.dumps de los valores que no son JSON: los escalares y
+    arreglos de NumPy pasan a sus tipos de Python; cualquier otro tipo es un error
+    (convertirlo a texto rompería la reanudación con otro tipo de parámetro).
+    """
+    if isinstance(valor, (np.generic, np.ndarray)):
+        return valor.tolist()
+    raise TypeError(f"Valor no serializable en el punto de control: {valor!r} ({type(valor).__name__})")
+
+
+def _solucion_de_arreglos(prefijo, archivo_npz):
+    """Reconstruye la solución con sus costos acumulados tal cual (sin reevaluar)."""
+    solucion = Solucion.__new__(Solucion)
+    solucion.tour = archivo_npz[f'{prefijo}_tour'].copy()
+    solucion.inicios = archivo_npz[f'{prefijo}_inicios'].copy()
+    solucion.distancias_ruta = archivo_npz[f'{prefijo}_distancias'].copy()
+    solucion.costo_global, solucion.penalizacion = archivo_npz[f'{prefijo}_escalares'].tolist()
+    solucion.posicion = np.zeros(int(solucion.tour.max(initial=-1)) + 1, dtype=np.int64)
+    solucion.posicion[solucion.tour] = np.arange(len(solucion.tour))
+    return solucion
+
+
+def guardar_punto_control(archivo, solucion_actual, mejor_solucion, rng, params, contadores,
+                          rng_lotes=None):
+    """
+    Guarda el estado del recocido simulado en 'archivo' (.npz sin comprimir): las dos
+    soluciones como arreglos, el estado del generador aleatorio ('rng', y el de NumPy de
+    la evaluación por lotes si hay), los parámetros y los 'contadores' (temperatura,
+    iteración, etc.; deben ser JSON o escalares de NumPy). La escritura es atómica: se escribe un temporal, se fuerza a
+    disco y se renombra, así que un corte a medias deja el punto de control anterior.
+    """
+    version, interno, gauss = rng.getstate()
+    arreglos = _arreglos_solucion('actual', solucion_actual)
+    arreglos.update(_arreglos_solucion('mejor', mejor_solucion))
+    arreglos['rng_interno'] = np.array(interno, dtype=np.uint32)
+    metadatos = {
+        'rng_version': version,
+        'rng_gauss': gauss,
+        'rng_lotes': rng_lotes.bit_generator.state if rng_lotes is not None else None,
+        'params': params,
+        'contadores': contadores,
+    }
+    arreglos['metadatos'] = np.array(json.dumps(metadatos, default=_a_json))
+
+    temporal = f"{archivo}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, 'wb') as f:
+            np.savez(f, **arreglos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, archivo)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def cargar_punto_control(archivo):
+    """
+    Lee un punto de control. Devuelve un diccionario con 'solucion_actual',
+    'mejor_solucion', 'estado_rng' (para random.Random.setstate), 'estado_rng_lotes',
+    'params' y 'contadores'.
+    """
+    with np.load(archivo) as datos_npz:
+        metadatos = json.loads(str(datos_npz['metadatos']))
+        return {
+            'solucion_actual': _solucion_de_arreglos('actual', datos_npz),
+            'mejor_solucion': _solucion_de_arreglos('mejor', datos_npz),
+            'estado_rng': (metadatos['rng_version'], tuple(datos_npz['rng_interno'].tolist()),
+                           metadatos['rng_gauss']),
+            'estado_rng_lotes': metadatos['rng_lotes'],
+            'params': metadatos['params'],
+            'contadores': metadatos['contadores'],
+        }
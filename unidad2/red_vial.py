@@ -0,0 +1,176 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from utils import R_TIERRA, _haversine_radianes
+
+# columnas obligatorias del archivo de aristas (una fila por tramo de calle)
+COLUMNAS_ARISTAS = ('Latitud_Origen', 'Longitud_Origen', 'Latitud_Destino', 'Longitud_Destino')
+
+# decimales con que se identifican los vértices: extremos iguales a ~1 cm son el mismo cruce
+DECIMALES_VERTICE = 7
+
+# nodos fuente por bloque del Dijkstra multi-fuente (la memoria temporal es bloque x vértices)
+FUENTES_POR_BLOQUE = 64
+
+# pares sin camino en el grafo (componentes desconectadas): línea recta por este factor de rodeo
+FACTOR_RODEO_SIN_CAMINO = 1.4
+
+
+def _puntos_esfera(coordenadas):
+    """(lat, lon) en grados a puntos de la esfera unitaria: la cuerda es monótona con el arco."""
+    radianes = np.radians(np.asarray(coordenadas, dtype=np.float64))
+    cos_lat = np.cos(radianes[:, 0])
+    return np.column_stack((cos_lat * np.cos(radianes[:, 1]), cos_lat * np.sin(radianes[:, 1]),
+                            np.sin(radianes[:, 0])))
+
+
+def _haversine_pares(coordenadas, i, j):
+    """Distancia en línea recta (km) de cada par (i[k], j[k])."""
+    radianes = np.radians(np.asarray(coordenadas, dtype=np.float64))
+    cos_lat = np.cos(radianes[:, 0])
+    return _haversine_radianes(radianes[i, 0], radianes[i, 1], cos_lat[i],
+                               radianes[j, 0], radianes[j, 1], cos_lat[j])
+
+
+def _sustituir_sin_camino(matriz, coordenadas, filas):
+    """Reemplaza (en su lugar) los pares sin camino de 'matriz' (filas = nodos 'filas')."""
+    sin_camino = ~np.isfinite(matriz)
+    if sin_camino.any():
+        print(f"Aviso: {int(sin_camino.sum())} pares sin camino en la red vial; "
+              f"se usa la línea recta x {FACTOR_RODEO_SIN_CAMINO}.")
+        i, j = np.nonzero(sin_camino)
+        matriz[i, j] = _haversine_pares(coordenadas, filas[i], j) * FACTOR_RODEO_SIN_CAMINO
+
+
+def huella_archivo(ruta_archivo):
+    """Huella (sha256) del contenido de un archivo; identifica la versión del grafo."""
+    h = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+class GrafoVial:
+    """
+    Red de calles leída de una lista de aristas (CSV o Excel) con las columnas
+    COLUMNAS_ARISTAS y, opcionales, 'Distancia_km' (si falta, la línea recta del tramo)
+    y 'Sentido_Unico' (verdadero: solo de origen a destino; por defecto doble sentido).
+    Los vértices son los extremos distintos de las aristas; el grafo se guarda como
+    matriz dispersa CSR (dirigida) para scipy.sparse.csgraph.
+    """
+
+    def __init__(self, aristas):
+        faltantes = [c for c in COLUMNAS_ARISTAS if c not in aristas]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el archivo de aristas: {', '.join(faltantes)}")
+
+        extremos = np.vstack((aristas[list(COLUMNAS_ARISTAS[:2])].to_numpy(dtype=np.float64),
+                              aristas[list(COLUMNAS_ARISTAS[2:])].to_numpy(dtype=np.float64)))
+        self.vertices, indices = np.unique(np.round(extremos, DECIMALES_VERTICE), axis=0,
+                                           return_inverse=True)
+        indices = indices.ravel()
+        num_aristas = len(aristas)
+        origen, destino = indices[:num_aristas], indices[num_aristas:]
+
+        if 'Distancia_km' in aristas:
+            peso = aristas['Distancia_km'].to_numpy(dtype=np.float64)
+        else:
+            peso = _haversine_pares(self.vertices, origen, destino)
+
+        doble = np.ones(num_aristas, dtype=bool)
+        if 'Sentido_Unico' in aristas:
+            doble = ~aristas['Sentido_Unico'].fillna(False).astype(bool).to_numpy()
+        origen, destino, peso = (np.concatenate((origen, destino[doble])),
+                                 np.concatenate((destino, origen[doble])),
+                                 np.concatenate((peso, peso[doble])))
+
+        # aristas repetidas entre los mismos vértices: se queda la más corta
+        # (csr_matrix sumaría los duplicados)
+        orden = np.lexsort((peso, destino, origen))
+        origen, destino, peso = origen[orden], destino[orden], peso[orden]
+        primeras = np.ones(len(orden), dtype=bool)
+        primeras[1:] = (origen[1:] != origen[:-1]) | (destino[1:] != destino[:-1])
+        num_vertices = len(self.vertices)
+        self.grafo = csr_matrix((peso[primeras], (origen[primeras], destino[primeras])),
+                                shape=(num_vertices, num_vertices))
+        self._arbol = cKDTree(_puntos_esfera(self.vertices))
+
+    @classmethod
+    def desde_archivo(cls, ruta_archivo):
+        if str(ruta_archivo).lower().endswith(('.xlsx', '.xls')):
+            return cls(pd.read_excel(ruta_archivo))
+        return cls(pd.read_csv(ruta_archivo))
+
+    @property
+    def num_vertices(self):
+        return len(self.vertices)
+
+    def ajustar(self, coordenadas):
+        """
+        Vértice más cercano de cada punto (KD-tree) y la distancia de acceso en línea
+        recta (km) del punto a ese vértice.
+        """
+        cuerdas, vertices = self._arbol.query(_puntos_esfera(coordenadas))
+        acceso = 2 * R_TIERRA * np.arcsin(np.clip(cuerdas / 2, 0.0, 1.0))
+        return vertices, acceso
+
+    def matriz_distancias(self, coordenadas, dtype=np.float64, simetrica=True,
+                          fuentes_por_bloque=FUENTES_POR_BLOQUE):
+        """
+        Matriz N x N de distancias por calle entre los puntos: acceso al vértice de
+        origen + camino más corto en el grafo + acceso desde el vértice destino.
+        El Dijkstra corre una vez por vértice distinto (varios nodos pueden caer en el
+        mismo), por bloques de fuentes. Con 'simetrica' se promedia d(i, j) con d(j, i):
+        las calles de un solo sentido hacen la matriz asimétrica y el 2-opt de la
+        búsqueda local supone distancias simétricas.
+        """
+        vertices, acceso = self.ajustar(coordenadas)
+        distintos, vertice_de_nodo = np.unique(vertices, return_inverse=True)
+        vertice_de_nodo = vertice_de_nodo.ravel()
+
+        caminos = np.empty((len(distintos), len(distintos)))
+        for inicio in range(0, len(distintos), fuentes_por_bloque):
+            fuentes = distintos[inicio:inicio + fuentes_por_bloque]
+            caminos[inicio:inicio + len(fuentes)] = dijkstra(self.grafo, directed=True,
+                                                             indices=fuentes)[:, distintos]
+
+        matriz = caminos[np.ix_(vertice_de_nodo, vertice_de_nodo)]
+        matriz += acceso[:, np.newaxis]
+        matriz += acceso[np.newaxis, :]
+
+        _sustituir_sin_camino(matriz, coordenadas, np.arange(len(coordenadas)))
+
+        if simetrica:
+            matriz = (matriz + matriz.T) / 2
+        np.fill_diagonal(matriz, 0.0)
+        return matriz.astype(dtype, copy=False)
+
+    def filas_distancias(self, filas, coordenadas, dtype=np.float64, simetrica=True,
+                         fuentes_por_bloque=FUENTES_POR_BLOQUE):
+        """
+        Solo las filas 'filas' de matriz_distancias(coordenadas) (p. ej. para nodos
+        nuevos o movidos). Con 'simetrica' el camino de regreso sale de un Dijkstra
+        sobre el grafo transpuesto desde los mismos vértices.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        vertices, acceso = self.ajustar(coordenadas)
+        sentidos = [self.grafo, self.grafo.T.tocsr()] if simetrica else [self.grafo]
+
+        resultado = np.zeros((len(filas), len(coordenadas)))
+        for grafo in sentidos:
+            caminos = np.empty((len(filas), len(coordenadas)))
+            for inicio in range(0, len(filas), fuentes_por_bloque):
+                fuentes = vertices[filas[inicio:inicio + fuentes_por_bloque]]
+                caminos[inicio:inicio + len(fuentes)] = dijkstra(grafo, directed=True,
+                                                                 indices=fuentes)[:, vertices]
+            caminos += acceso[filas][:, np.newaxis]
+            caminos += acceso[np.newaxis, :]
+            _sustituir_sin_camino(caminos, coordenadas, filas)
+            resultado += caminos / len(sentidos)
+
+        resultado[np.arange(len(filas)), filas] = 0.0
+        return resultado.astype(dtype, copy=False)
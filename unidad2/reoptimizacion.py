@@ -0,0 +1,109 @@
+import random
+import time
+import numpy as np
+from model import Solucion
+from data_loader import actualizar_nodos
+from metaheuristica import recocido_simulado
+from busqueda_local import BusquedaLocal
+from restricciones import crear_restricciones
+from vecindario import K_VECINOS
+from lotes import TAMANO_LOTE
+
+# presupuesto del SA corto que pule la solución reparada
+TIEMPO_REOPTIMIZACION_S = 5.0
+
+# aceptación inicial baja: el SA arranca frío para no deshacer la solución previa
+ACEPTACION_REOPTIMIZACION = 0.05
+
+
+def insertar_mas_barato(rutas, tienda, matriz_distancia):
+    """
+    Inserta 'tienda' (en su lugar, en la lista 'rutas') en la arista de cualquier
+    ruta donde menos aumenta la distancia, con todas las aristas evaluadas de una vez.
+    Devuelve el aumento de distancia.
+    """
+    largos = np.array([len(ruta) for ruta in rutas])
+    inicios = np.concatenate(([0], np.cumsum(largos)))
+    tour = np.concatenate(rutas)
+    u, v = tour[:-1], tour[1:]
+    aumento = np.asarray(matriz_distancia[u, tienda] + matriz_distancia[tienda, v]
+                         - matriz_distancia[u, v], dtype=np.float64)
+    aumento[inicios[1:-1] - 1] = np.inf # aristas entre el final de una ruta y la siguiente
+
+    h = int(np.argmin(aumento))
+    r = int(np.searchsorted(inicios, h, side='right')) - 1
+    rutas[r].insert(h - inicios[r] + 1, tienda)
+    return float(aumento[h])
+
+
+def reparar_solucion(solucion_previa, ids_previos, reinsertar, matriz_distancia):
+    """
+    Lleva las rutas de 'solucion_previa' a los IDs nuevos: quita las tiendas que ya no
+    existen y las de 'reinsertar' (nuevas o movidas), que luego se insertan con
+    inserción más barata. Devuelve la solución reparada y las tiendas vecinas de
+    los huecos que dejaron las tiendas quitadas (para revisarlas en la búsqueda local).
+    """
+    nuevo_de_previo = np.full(len(solucion_previa.posicion), -1, dtype=np.int64)
+    conservados = np.flatnonzero(ids_previos >= 0)
+    nuevo_de_previo[ids_previos[conservados]] = conservados
+    quitar = np.zeros(len(ids_previos) + 1, dtype=bool) # el último índice representa a "-1"
+    quitar[-1] = True
+    quitar[reinsertar] = True
+
+    rutas, junto_a_hueco = [], []
+    for r in range(solucion_previa.num_rutas):
+        ruta = nuevo_de_previo[solucion_previa.ruta(r)]
+        quitadas = quitar[ruta]
+        if quitadas.any():
+            # nodos que quedan a los lados de cada tramo quitado
+            bordes = np.flatnonzero(np.diff(quitadas.astype(np.int8)))
+            junto_a_hueco.extend(ruta[bordes + quitadas[bordes]].tolist())
+        rutas.append(ruta[~quitadas].tolist())
+
+    for tienda in np.asarray(reinsertar).tolist():
+        insertar_mas_barato(rutas, tienda, matriz_distancia)
+    return Solucion(rutas, matriz_distancia), junto_a_hueco
+
+
+def reoptimizar(datos, solucion_previa, cambios, params=None, rng=random, observadores=None,
+                estadisticas=None):
+    """
+    Re-optimización en caliente cuando abren, cierran o se mueven tiendas:
+      1. actualiza los datos y solo las filas/columnas afectadas de la matriz
+         (data_loader.actualizar_nodos)
+      2. repara las rutas previas quitando las tiendas cerradas o movidas y
+         reinsertando las nuevas o movidas con inserción más barata
+      3. búsqueda local alrededor de los cambios (sin restricciones activas)
+      4. SA corto y frío: temperatura calibrada a ACEPTACION_REOPTIMIZACION y
+         TIEMPO_REOPTIMIZACION_S segundos, partiendo de la solución reparada (con
+         evaluación por lotes si no hay restricciones)
+    'params' se combina con esos valores (los de 'params' mandan). Devuelve los nuevos
+    datos y la nueva mejor solución.
+    """
+    inicio = time.perf_counter()
+    nuevos_datos, ids_previos, afectados = actualizar_nodos(datos, cambios)
+
+    matriz_distancia = nuevos_datos['matriz_distancia']
+    solucion, junto_a_hueco = reparar_solucion(solucion_previa, ids_previos, afectados, matriz_distancia)
+    costo_reparado = solucion.costo_global
+
+    params = dict({
+        'k_vecinos': K_VECINOS,
+        'temperatura_inicial': None,
+        'aceptacion_inicial': ACEPTACION_REOPTIMIZACION,
+        'tiempo_limite_s': TIEMPO_REOPTIMIZACION_S,
+    }, **(params or {}))
+    if crear_restricciones(nuevos_datos, params) is None:
+        params.setdefault('tamano_lote', TAMANO_LOTE)
+        BusquedaLocal(nuevos_datos, params['k_vecinos']).mejorar(
+            solucion, nodos=np.concatenate((afectados, junto_a_hueco)).astype(np.int64))
+
+    mejor_solucion = recocido_simulado(nuevos_datos, params, rng, observadores, estadisticas,
+                                       solucion_inicial=solucion)
+    if estadisticas is not None:
+        estadisticas.update({
+            'nodos_afectados': len(afectados),
+            'costo_reparado': costo_reparado,
+            'segundos_reoptimizacion': time.perf_counter() - inicio,
+        })
+    return nuevos_datos, mejor_solucion
@@ -0,0 +1,267 @@
+import numpy as np
+from movimientos import Reubicacion
+
+# penalizaciones (en km equivalentes) que se suman a la distancia en la función objetivo
+PESO_CAPACIDAD = 10.0   # por unidad de demanda que excede la capacidad del vehículo
+PESO_VENTANAS = 1.0     # por minuto de retraso respecto al fin de una ventana de tiempo
+
+# velocidad promedio para convertir km en minutos de viaje
+VELOCIDAD_PROMEDIO_KMH = 30.0
+
+# vehículos vacíos adicionales por CD en la solución inicial (la búsqueda puede usarlos)
+VEHICULOS_EXTRA_POR_CD = 1
+
+
+def crear_restricciones(datos, params):
+    """
+    Crea el evaluador de restricciones a partir de 'params' ('capacidad_vehiculo',
+    'peso_capacidad', 'peso_ventanas', 'velocidad_kmh', 'vehiculos_extra_por_cd') y
+    de las columnas opcionales cargadas en 'datos' ('demandas', 'ventanas',
+    'tiempos_servicio'). Devuelve None si no hay ninguna restricción activa.
+    """
+    capacidad = params.get('capacidad_vehiculo')
+    con_ventanas = datos.get('ventanas') is not None and params.get('usar_ventanas', True)
+    if capacidad is None and not con_ventanas:
+        return None
+    return Restricciones(datos, capacidad, con_ventanas,
+                         params.get('peso_capacidad', PESO_CAPACIDAD),
+                         params.get('peso_ventanas', PESO_VENTANAS),
+                         params.get('velocidad_kmh', VELOCIDAD_PROMEDIO_KMH),
+                         params.get('vehiculos_extra_por_cd', VEHICULOS_EXTRA_POR_CD))
+
+
+class Restricciones:
+    """
+    Capacidad de los vehículos y ventanas de tiempo de las tiendas como
+    restricciones suaves: la búsqueda minimiza distancia + penalización.
+
+    Para la solución sobre la que se trabaja (ver preparar) se guarda por ruta:
+      - la carga total, con la que el cambio de exceso de capacidad de una
+        reubicación se calcula en O(1)
+      - los datos de concatenación de cada prefijo y sufijo de la ruta
+        (duración, retraso acumulado, inicio más temprano y más tardío: la
+        holgura hacia adelante de la ruta), con los que el retraso de una ruta
+        que pierde o gana una tienda se obtiene uniendo 2 o 3 segmentos en O(1).
+    Costos: el delta de una reubicación entre rutas es O(1); el de un movimiento
+    dentro de una misma ruta es O(largo del tramo que cambia). Al aplicar un
+    movimiento aceptado la carga se actualiza en O(1) y de los prefijos y sufijos
+    solo se recalculan los que cambian (los prefijos desde la primera posición
+    modificada y los sufijos hasta la última): O(largo de la ruta) por ruta tocada.
+    Los tiempos van en minutos desde el inicio de la jornada.
+    """
+
+    def __init__(self, datos, capacidad=None, con_ventanas=True, peso_capacidad=PESO_CAPACIDAD,
+                 peso_ventanas=PESO_VENTANAS, velocidad_kmh=VELOCIDAD_PROMEDIO_KMH,
+                 vehiculos_extra_por_cd=VEHICULOS_EXTRA_POR_CD):
+        self.matriz_distancia = datos['matriz_distancia']
+        num_nodos = datos['num_nodos']
+
+        self.capacidad = capacidad
+        if capacidad is not None:
+            demandas = datos.get('demandas')
+            if demandas is None:
+                # sin columna de demanda cada tienda cuenta como una unidad
+                demandas = np.zeros(num_nodos)
+                demandas[datos['indices_tiendas']] = 1.0
+            self.demandas = np.asarray(demandas, dtype=np.float64).tolist()
+
+        self.con_ventanas = con_ventanas
+        if con_ventanas:
+            ventanas = np.asarray(datos['ventanas'], dtype=np.float64)
+            servicio = datos.get('tiempos_servicio')
+            servicio = np.zeros(num_nodos) if servicio is None else np.asarray(servicio, dtype=np.float64)
+            # segmento de un solo nodo: (duración, retraso, inicio más temprano, inicio más tardío, primero, último)
+            self._segmento_nodo = [(float(servicio[n]), 0.0, float(ventanas[n, 0]), float(ventanas[n, 1]), n, n)
+                                   for n in range(num_nodos)]
+            self.minutos_por_km = 60.0 / velocidad_kmh
+
+        self.peso_capacidad = peso_capacidad
+        self.peso_ventanas = peso_ventanas
+        self.vehiculos_extra_por_cd = vehiculos_extra_por_cd
+
+        # caché por ruta de la solución preparada
+        self.cargas = []
+        self.prefijos = []
+        self.sufijos = []
+        self.penalizacion_ruta = []
+
+    # --------------------------------------------------------------------------
+    # construcción
+    # --------------------------------------------------------------------------
+
+    def dividir_rutas(self, rutas):
+        """
+        Parte cada ruta [CD -> ... -> CD] en vehículos que respetan la capacidad
+        (cortando la secuencia cuando el siguiente no cabe) y agrega
+        'vehiculos_extra_por_cd' rutas vacías por CD.
+        """
+        nuevas = []
+        for ruta in rutas:
+            cd = ruta[0]
+            actual, carga = [cd], 0.0
+            for tienda in ruta[1:-1]:
+                demanda = self.demandas[tienda] if self.capacidad is not None else 0.0
+                if self.capacidad is not None and len(actual) > 1 and carga + demanda > self.capacidad:
+                    nuevas.append(actual + [cd])
+                    actual, carga = [cd], 0.0
+                actual.append(tienda)
+                carga += demanda
+            nuevas.append(actual + [cd])
+            nuevas.extend([cd, cd] for _ in range(self.vehiculos_extra_por_cd))
+        return nuevas
+
+    # --------------------------------------------------------------------------
+    # datos de concatenación (ventanas de tiempo)
+    # --------------------------------------------------------------------------
+
+    def _concatenar(self, a, b):
+        """Une dos segmentos de ruta; el viaje entre ellos va del último de 'a' al primero de 'b'."""
+        duracion_a, retraso_a, temprano_a, tardio_a, primero, ultimo_a = a
+        duracion_b, retraso_b, temprano_b, tardio_b, primero_b, ultimo = b
+        viaje = self.matriz_distancia[ultimo_a, primero_b] * self.minutos_por_km
+        delta = duracion_a - retraso_a + viaje
+        espera = max(temprano_b - delta - tardio_a, 0.0)
+        retraso = max(temprano_a + delta - tardio_b, 0.0)
+        return (duracion_a + duracion_b + viaje + espera,
+                retraso_a + retraso_b + retraso,
+                max(temprano_b - delta, temprano_a) - espera,
+                min(tardio_b - delta, tardio_a) + retraso,
+                primero, ultimo)
+
+    def _retraso_con_tramo(self, r, a, b, tramo):
+        """Retraso total de la ruta r si sus posiciones a..b se sustituyen por 'tramo'."""
+        segmento = self.prefijos[r][a - 1]
+        for nodo in tramo:
+            segmento = self._concatenar(segmento, self._segmento_nodo[nodo])
+        return self._concatenar(segmento, self.sufijos[r][b + 1])[1]
+
+    # --------------------------------------------------------------------------
+    # caché de la solución
+    # --------------------------------------------------------------------------
+
+    def _exceso(self, carga):
+        return max(carga - self.capacidad, 0.0)
+
+    def _calcular_ruta(self, solucion, r, desde=None, hasta=None, cambio_carga=0.0):
+        """
+        Recalcula la caché de la ruta r y devuelve el cambio de su penalización. Sin
+        'desde' se recalcula completa; con 'desde'..'hasta' (posiciones de la ruta ya
+        modificada que cambiaron; hasta = desde - 1 si solo se quitó una tienda) la carga
+        se actualiza con 'cambio_carga', se conservan los prefijos antes de 'desde' y los
+        sufijos después de 'hasta', y solo se recalculan los demás.
+        """
+        ruta = solucion.ruta(r)
+        penalizacion = 0.0
+        if self.capacidad is not None:
+            if desde is None:
+                self.cargas[r] = sum(self.demandas[n] for n in ruta.tolist())
+            else:
+                self.cargas[r] += cambio_carga
+            penalizacion += self.peso_capacidad * self._exceso(self.cargas[r])
+        if self.con_ventanas:
+            segmento_nodo, concatenar = self._segmento_nodo, self._concatenar
+            if desde is None:
+                desde, hasta = 1, len(ruta) - 2
+                prefijos = [segmento_nodo[int(ruta[0])]]
+                sufijos = [segmento_nodo[int(ruta[-1])]]
+            else:
+                prefijos, sufijos = self.prefijos[r], self.sufijos[r]
+                # los sufijos conservados se recorren si la ruta cambió de largo
+                hasta_previo = hasta + len(sufijos) - len(ruta)
+                del prefijos[desde:]
+                del sufijos[:hasta_previo + 1]
+                sufijos.reverse()
+            for n in ruta[desde:].tolist():
+                prefijos.append(concatenar(prefijos[-1], segmento_nodo[n]))
+            for n in reversed(ruta[:hasta + 1].tolist()):
+                sufijos.append(concatenar(segmento_nodo[n], sufijos[-1]))
+            sufijos.reverse()
+            self.prefijos[r], self.sufijos[r] = prefijos, sufijos
+            penalizacion += self.peso_ventanas * prefijos[-1][1]
+        anterior = self.penalizacion_ruta[r]
+        self.penalizacion_ruta[r] = penalizacion
+        return penalizacion - anterior
+
+    def preparar(self, solucion):
+        """Calcula la caché de todas las rutas de 'solucion' y su penalización total."""
+        num_rutas = solucion.num_rutas
+        self.cargas = [0.0] * num_rutas
+        self.prefijos = [None] * num_rutas
+        self.sufijos = [None] * num_rutas
+        self.penalizacion_ruta = [0.0] * num_rutas
+        for r in range(num_rutas):
+            self._calcular_ruta(solucion, r)
+        solucion.penalizacion = sum(self.penalizacion_ruta)
+        return solucion.penalizacion
+
+    def delta(self, movimiento, solucion):
+        """Cambio de penalización del movimiento (sin aplicarlo) sobre la solución preparada."""
+        if type(movimiento) is Reubicacion:
+            origen, p = movimiento.ruta_origen, movimiento.pos_origen
+            destino, q = movimiento.ruta_destino, movimiento.pos_destino
+            if origen != destino:
+                tienda = int(solucion.tour[solucion.inicios[origen] + p])
+                delta = 0.0
+                if self.capacidad is not None:
+                    demanda = self.demandas[tienda]
+                    carga_origen, carga_destino = self.cargas[origen], self.cargas[destino]
+                    delta += self.peso_capacidad * (
+                        self._exceso(carga_origen - demanda) - self._exceso(carga_origen)
+                        + self._exceso(carga_destino + demanda) - self._exceso(carga_destino))
+                if self.con_ventanas:
+                    prefijos_o, sufijos_o = self.prefijos[origen], self.sufijos[origen]
+                    prefijos_d, sufijos_d = self.prefijos[destino], self.sufijos[destino]
+                    retraso_origen = self._concatenar(prefijos_o[p - 1], sufijos_o[p + 1])[1]
+                    retraso_destino = self._concatenar(
+                        self._concatenar(prefijos_d[q - 1], self._segmento_nodo[tienda]), sufijos_d[q])[1]
+                    delta += self.peso_ventanas * (retraso_origen + retraso_destino
+                                                   - prefijos_o[-1][1] - prefijos_d[-1][1])
+                return delta
+
+            # reubicación dentro de la ruta: la carga no cambia
+            if not self.con_ventanas or p == q:
+                return 0.0
+            ruta = solucion.ruta(origen)
+            if p < q:
+                a, b, tramo = p, q, ruta[p + 1:q + 1].tolist() + [int(ruta[p])]
+            else:
+                a, b, tramo = q, p, [int(ruta[p])] + ruta[q:p].tolist()
+        else:
+            # intercambio intra-ruta
+            if not self.con_ventanas:
+                return 0.0
+            origen, a, b = movimiento.ruta, movimiento.i, movimiento.j
+            ruta = solucion.ruta(origen)
+            tramo = [int(ruta[b])] + ruta[a + 1:b].tolist() + [int(ruta[a])]
+
+        retraso = self._retraso_con_tramo(origen, a, b, tramo)
+        return self.peso_ventanas * (retraso - self.prefijos[origen][-1][1])
+
+    def aplicar(self, movimiento, solucion):
+        """Actualiza la caché de las rutas que cambió el movimiento (ya aplicado sobre la solución)."""
+        if type(movimiento) is Reubicacion:
+            origen, p = movimiento.ruta_origen, movimiento.pos_origen
+            destino, q = movimiento.ruta_destino, movimiento.pos_destino
+            if origen != destino:
+                tienda = int(solucion.tour[solucion.inicios[destino] + q])
+                demanda = self.demandas[tienda] if self.capacidad is not None else 0.0
+                solucion.penalizacion += self._calcular_ruta(solucion, origen, p, p - 1, -demanda)
+                solucion.penalizacion += self._calcular_ruta(solucion, destino, q, q, demanda)
+                return
+            a, b = min(p, q), max(p, q)
+        else:
+            origen, a, b = movimiento.ruta, movimiento.i, movimiento.j
+        solucion.penalizacion += self._calcular_ruta(solucion, origen, a, b)
+
+    def resumen(self, solucion):
+        """Exceso de carga, retraso total y factibilidad de 'solucion' (se prepara la caché para ella)."""
+        self.preparar(solucion)
+        exceso = sum(self._exceso(c) for c in self.cargas) if self.capacidad is not None else 0.0
+        retraso = sum(p[-1][1] for p in self.prefijos) if self.con_ventanas else 0.0
+        return {
+            'penalizacion': float(solucion.penalizacion),
+            'exceso_capacidad': float(exceso),
+            'retraso_min': float(retraso),
+            'factible': bool(exceso <= 1e-9 and retraso <= 1e-9),
+            'vehiculos_usados': int(np.count_nonzero(np.diff(solucion.inicios) > 2)),
+        }
@@ -3,6 +3,9 @@ import numpy as np
 # radio de la tierra en kilómetros (km)
 R_TIERRA = 6371.0 
 
+# filas de la matriz que se calculan por bloque (limita la memoria temporal)
+FILAS_POR_BLOQUE = 512
+
 def haversine(lat1, lon1, lat2, lon2):
     """
     Calcula la distancia de la Gran Círculo (Haversine) entre dos 
@@ -25,15 +28,59 @@ def haversine(lat1, lon1, lat2, lon2):
     distancia = R_TIERRA * c
     return distancia
 
+def _haversine_radianes(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """Haversine con broadcasting sobre coordenadas ya convertidas a radianes."""
+    a = np.sin((lat2 - lat1) / 2)**2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2)**2
+    # arcsin(sqrt(a)) equivale a arctan2(sqrt(a), sqrt(1 - a)) y es más barato
+    return 2 * R_TIERRA * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_uno_a_muchos(lat, lon, latitudes, longitudes, dtype=np.float64):
+    """
+    Calcula la distancia Haversine (km) de un punto a un arreglo de puntos.
+    Devuelve un arreglo con una distancia por punto destino.
+    """
+    lat_rad = np.radians(lat)
+    lats_rad = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lons_rad = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    distancias = _haversine_radianes(lat_rad, np.radians(lon), np.cos(lat_rad),
+                                     lats_rad, lons_rad, np.cos(lats_rad))
+    return distancias.astype(dtype, copy=False)
+
+def matriz_haversine(coordenadas, coordenadas_destino=None, dtype=np.float64,
+                     filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Calcula la matriz de distancias Haversine (km) entre dos conjuntos de puntos.
+    'coordenadas' es un arreglo (N, 2) de [latitud, longitud]; si no se indica
+    'coordenadas_destino' se calculan todos los pares (N x N).
+    La matriz se llena por bloques de filas para no crear temporales de N x N.
+    """
+    origen = np.radians(np.asarray(coordenadas, dtype=np.float64))
+    destino = origen if coordenadas_destino is None else \
+        np.radians(np.asarray(coordenadas_destino, dtype=np.float64))
+
+    lat_d = destino[:, 0][np.newaxis, :]
+    lon_d = destino[:, 1][np.newaxis, :]
+    cos_d = np.cos(lat_d)
+
+    matriz = np.empty((origen.shape[0], destino.shape[0]), dtype=dtype)
+    for inicio in range(0, origen.shape[0], filas_por_bloque):
+        fin = min(inicio + filas_por_bloque, origen.shape[0])
+        lat_o = origen[inicio:fin, 0][:, np.newaxis]
+        lon_o = origen[inicio:fin, 1][:, np.newaxis]
+        matriz[inicio:fin] = _haversine_radianes(lat_o, lon_o, np.cos(lat_o),
+                                                 lat_d, lon_d, cos_d)
+
+    if coordenadas_destino is None:
+        # la distancia de un nodo a sí mismo es exactamente cero
+        np.fill_diagonal(matriz, 0)
+    return matriz
+
 def calcular_distancia_ruta(ruta_ids, matriz_distancia):
     """Calcula la distancia total de una ruta."""
-    distancia_total = 0
-    if not ruta_ids or len(ruta_ids) < 2:
+    ruta_ids = np.asarray(ruta_ids)
+    if ruta_ids.size < 2:
         return 0
-    
-    for i in range(len(ruta_ids) - 1):
-        origen_id = ruta_ids[i]
-        destino_id = ruta_ids[i+1]
-        distancia_total += matriz_distancia[origen_id, destino_id]
-        
-    return distancia_total
\ No newline at end of file
+
+    # suma vectorizada de las aristas (ruta[k], ruta[k+1])
+    return matriz_distancia[ruta_ids[:-1], ruta_ids[1:]].sum()
@@ -0,0 +1,107 @@
+import random
+import numpy as np
+from movimientos import Reubicacion, proponer_intercambio, _entero
+
+# número de vecinos cercanos por nodo que se consideran por defecto
+K_VECINOS = 10
+
+# filas de la matriz que se procesan por bloque al buscar los vecinos
+FILAS_POR_BLOQUE = 1024
+
+
+def construir_vecinos_cercanos(matriz_distancia, k=K_VECINOS, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Índice de candidatos: para cada nodo, los IDs de sus k nodos más cercanos
+    (sin incluirse a sí mismo), ordenados de menor a mayor distancia.
+    Usa argpartition por bloques de filas, O(N^2) una sola vez.
+    """
+    num_nodos = matriz_distancia.shape[0]
+    k = min(k, num_nodos - 1)
+    vecinos = np.empty((num_nodos, k), dtype=np.int32)
+
+    for inicio in range(0, num_nodos, filas_por_bloque):
+        fin = min(inicio + filas_por_bloque, num_nodos)
+        bloque = np.array(matriz_distancia[inicio:fin], dtype=np.float64)
+        filas = np.arange(fin - inicio)
+        bloque[filas, inicio + filas] = np.inf # excluir al propio nodo
+
+        candidatos = np.argpartition(bloque, k - 1, axis=1)[:, :k]
+        orden = np.argsort(np.take_along_axis(bloque, candidatos, axis=1), axis=1)
+        vecinos[inicio:fin] = np.take_along_axis(candidatos, orden, axis=1)
+    return vecinos
+
+
+def obtener_vecinos_cercanos(datos, k=K_VECINOS):
+    """Devuelve el índice de k vecinos de 'datos', construyéndolo (y guardándolo en 'datos') si hace falta."""
+    vecinos = datos.get('vecinos_cercanos')
+    if vecinos is None or vecinos.shape[1] < min(k, datos['num_nodos'] - 1):
+        matriz_distancia = datos['matriz_distancia']
+        if hasattr(matriz_distancia, 'vecinos_cercanos'):
+            # modo disperso: el índice ya viene del KD-tree de la matriz
+            vecinos = matriz_distancia.vecinos_cercanos(k)
+        else:
+            vecinos = construir_vecinos_cercanos(matriz_distancia, k)
+        datos['vecinos_cercanos'] = vecinos
+    return vecinos[:, :k]
+
+
+class VecindarioGranular:
+    """
+    Generador de movimientos restringido a vecinos cercanos: la reubicación solo
+    propone insertar una tienda justo antes o después de uno de sus k vecinos
+    (si el vecino es un CD, al inicio o al final de una ruta de ese CD).
+    El intercambio intra-ruta se mantiene igual que en proponer_movimiento.
+    """
+
+    def __init__(self, datos, k=K_VECINOS):
+        self.vecinos = obtener_vecinos_cercanos(datos, k)
+        self.tiendas = np.asarray(datos['indices_tiendas'], dtype=np.int64)
+        self.es_cd = np.zeros(datos['num_nodos'], dtype=bool)
+        self.es_cd[datos['indices_cds']] = True
+        self._rutas_por_cd = None
+
+    def rutas_de_cd(self, solucion, cd):
+        """Índices de las rutas que salen del CD (las rutas nunca cambian de CD)."""
+        if self._rutas_por_cd is None or self._num_rutas != solucion.num_rutas:
+            self._num_rutas = solucion.num_rutas
+            self._rutas_por_cd = {}
+            for r, cd_ruta in enumerate(solucion.tour[solucion.inicios[:-1]].tolist()):
+                self._rutas_por_cd.setdefault(cd_ruta, []).append(r)
+        return self._rutas_por_cd[cd]
+
+    def proponer(self, solucion, rng=random):
+        """Elige un movimiento granular; devuelve None si no es posible."""
+        if rng.random() >= 0.5:
+            return proponer_intercambio(solucion, rng)
+
+        inicios = solucion.inicios
+        tienda = self.tiendas[_entero(rng, len(self.tiendas))]
+        vecino = self.vecinos[tienda, _entero(rng, self.vecinos.shape[1])]
+
+        # ubicación de la tienda a mover
+        g_tienda = solucion.posicion[tienda]
+        ruta_origen = int(np.searchsorted(inicios, g_tienda, side='right')) - 1
+        pos_origen = int(g_tienda - inicios[ruta_origen])
+
+        if self.es_cd[vecino]:
+            # insertar al inicio o al final de una ruta que sale de ese CD
+            rutas_cd = self.rutas_de_cd(solucion, int(vecino))
+            ruta_destino = rutas_cd[_entero(rng, len(rutas_cd))]
+            largo = int(inicios[ruta_destino + 1] - inicios[ruta_destino])
+            if ruta_destino == ruta_origen:
+                largo -= 1
+            pos_destino = 1 if rng.random() < 0.5 else largo - 1
+        else:
+            g_vecino = solucion.posicion[vecino]
+            ruta_destino = int(np.searchsorted(inicios, g_vecino, side='right')) - 1
+            pos_vecino = int(g_vecino - inicios[ruta_destino])
+            # posición del vecino en la ruta destino ya sin la tienda
+            if ruta_destino == ruta_origen and pos_origen < pos_vecino:
+                pos_vecino -= 1
+            # insertar antes o después del vecino
+            pos_destino = pos_vecino if rng.random() < 0.5 else pos_vecino + 1
+
+        if ruta_destino == ruta_origen and pos_destino == pos_origen:
+            return None
+        return Reubicacion(ruta_origen, pos_origen, ruta_destino, pos_destino)
+
@@ -1,62 +1,145 @@
-import matplotlib.pyplot as plt
+import json
+import matplotlib
 import numpy as np
-from model import Solucion 
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from model import Solucion
 
-# define una paleta de colores para las 10 rutas
-COLORES_RUTA = plt.cm.get_cmap('hsv', 10) 
+# paleta de colores de las rutas (se muestrean tantos colores como rutas haya)
+PALETA_RUTAS = 'hsv'
 
-def dibujar_mapa_rutas(solucion_final, datos, titulo="Rutas Optimizadas - Culiacán"):
+# con más CDs que este número no se escriben sus nombres en el mapa
+MAX_ETIQUETAS_CD = 50
+
+def colores_rutas(num_rutas):
+    """Un color RGBA por ruta, repartidos en la paleta (hsv es cíclica: no se repite el primero)."""
+    return matplotlib.colormaps[PALETA_RUTAS](np.arange(num_rutas) / max(num_rutas, 1))
+
+def _segmentos_rutas(solucion, coordenadas):
+    """
+    Segmentos ((lon, lat) -> (lon, lat)) de todas las rutas no vacías, tomados del
+    tour completo en una sola operación, y la ruta a la que pertenece cada segmento.
+    """
+    xy = coordenadas[solucion.tour][:, ::-1]
+    segmentos = np.stack((xy[:-1], xy[1:]), axis=1)
+
+    largos = np.diff(solucion.inicios)
+    ruta_de_posicion = np.repeat(np.arange(solucion.num_rutas), largos)[:-1]
+    validos = np.ones(len(segmentos), dtype=bool)
+    validos[solucion.inicios[1:-1] - 1] = False # aristas entre el final de una ruta y la siguiente
+    validos &= (largos >= 3)[ruta_de_posicion] # rutas sin tiendas [CD -> CD]
+    return segmentos[validos], ruta_de_posicion[validos]
+
+def _dibujar_en_ejes(ax, solucion_final, datos, titulo):
+    coordenadas = datos['coordenadas']
+    latitudes, longitudes = coordenadas[:, 0], coordenadas[:, 1]
+    indices_tiendas = np.asarray(datos['indices_tiendas'])
+    indices_cds = np.asarray(datos['indices_cds'])
+
+    # tiendas: círculos grises (más pequeños cuantas más tiendas haya)
+    tam_tienda = float(np.clip(5000 / max(len(indices_tiendas), 1), 2, 50))
+    ax.scatter(longitudes[indices_tiendas], latitudes[indices_tiendas],
+               c='lightgray', s=tam_tienda, edgecolors='gray', zorder=1,
+               label=f'Tiendas ({len(indices_tiendas)})')
+
+    # centros de distribución (CDs): cuadrados rojos
+    ax.scatter(longitudes[indices_cds], latitudes[indices_cds],
+               c='red', marker='s', s=150, zorder=3,
+               label=f'Centros de Distribución ({len(indices_cds)})')
+
+    # anotar los nombres de los CDs (solo si son pocos)
+    if len(indices_cds) <= MAX_ETIQUETAS_CD:
+        nombres_nodos = datos['nombres_nodos']
+        for i in indices_cds.tolist():
+            ax.annotate(nombres_nodos[i], (longitudes[i] + 0.001, latitudes[i] + 0.001), fontsize=8)
+
+    # todas las rutas en una sola colección de líneas
+    colores = colores_rutas(solucion_final.num_rutas)
+    segmentos, ruta_de_segmento = _segmentos_rutas(solucion_final, coordenadas)
+    ax.add_collection(LineCollection(segmentos, colors=colores[ruta_de_segmento],
+                                     linewidths=2.0, alpha=0.8, zorder=2))
+
+    # marcar el CD de cada ruta con un punto del color de la ruta
+    no_vacias = np.flatnonzero(np.diff(solucion_final.inicios) >= 3)
+    cds_rutas = solucion_final.tour[solucion_final.inicios[no_vacias]]
+    ax.scatter(longitudes[cds_rutas], latitudes[cds_rutas], color=colores[no_vacias],
+               marker='o', s=100, zorder=3)
+
+    # configuración final del gráfico
+    ax.set_title(titulo, fontsize=14)
+    ax.set_xlabel("Longitud", fontsize=10)
+    ax.set_ylabel("Latitud", fontsize=10)
+    ax.grid(True, alpha=0.2)
+    ax.legend(loc='upper right', fontsize=8)
+
+def crear_figura_rutas(solucion_final, datos, titulo="Rutas Optimizadas - Culiacán", tamano=(10, 10)):
+    """
+    Crea la figura del mapa sin pyplot (no abre ventanas ni necesita pantalla),
+    lista para guardarse en un proceso por lotes o servidor.
+    """
+    figura = Figure(figsize=tamano)
+    _dibujar_en_ejes(figura.add_subplot(), solucion_final, datos, titulo)
+    figura.tight_layout()
+    return figura
+
+def guardar_mapa_rutas(solucion_final, datos, archivo, titulo="Rutas Optimizadas - Culiacán", dpi=150):
+    """Dibuja el mapa y lo guarda en 'archivo'; el formato (PNG, SVG, PDF...) sale de la extensión."""
+    crear_figura_rutas(solucion_final, datos, titulo).savefig(archivo, dpi=dpi)
+    return archivo
+
+def dibujar_mapa_rutas(solucion_final, datos, titulo="Rutas Optimizadas - Culiacán", archivo=None):
     """
     Dibuja el mapa de Culiacán con los nodos y las rutas finales de la mejor solución.
+    Con 'archivo' lo guarda sin abrir ventanas; sin él lo muestra en pantalla.
+    """
+    if archivo is not None:
+        return guardar_mapa_rutas(solucion_final, datos, archivo, titulo)
+
+    import matplotlib.pyplot as plt # solo el modo interactivo necesita pyplot
+    figura, ax = plt.subplots(figsize=(10, 10))
+    _dibujar_en_ejes(ax, solucion_final, datos, titulo)
+    figura.tight_layout()
+    plt.show()
+
+def rutas_a_geojson(solucion_final, datos):
     """
-    df = datos['df_nodos']
-    
-    # extraer coordenadas
-    latitudes = df['Latitud'].values
-    longitudes = df['Longitud'].values
-    
-    # iniciar la figura del mapa
-    plt.figure(figsize=(10, 10))
-    
-    # Dibujar todos los Nodos
-    
-    # tiendas: círculos pequeños y grises
-    indices_tiendas = datos['indices_tiendas']
-    plt.scatter(longitudes[indices_tiendas], latitudes[indices_tiendas], 
-                c='lightgray', s=50, edgecolors='gray', zorder=1, label='Tiendas (90)')
-    
-    # centros de distribución (CDs): cuadrados grandes y negros/rojos
-    indices_cds = datos['indices_cds']
-    plt.scatter(longitudes[indices_cds], latitudes[indices_cds], 
-                c='red', marker='s', s=150, zorder=3, label='Centros de Distribución (10)')
-    
-    # anotar los nombres de los CDs
-    for i in indices_cds:
-        plt.annotate(df.loc[df['ID_NUMERICO'] == i, 'Nombre'].iloc[0], 
-                     (longitudes[i] + 0.001, latitudes[i] + 0.001), fontsize=8)
-
-    # dibujar las rutas (líneas)
-    for i, ruta in enumerate(solucion_final.rutas):
+    Rutas como FeatureCollection de GeoJSON: una LineString por ruta no vacía
+    (coordenadas [longitud, latitud]) con su distancia y costo, y un Point por CD.
+    """
+    coordenadas = datos['coordenadas']
+    nombres_nodos = datos['nombres_nodos']
+    factor = datos['factor_combustible']
+    features = []
+
+    for r in range(solucion_final.num_rutas):
+        ruta = solucion_final.ruta(r)
         if len(ruta) < 3:
             continue
-            
-        color = COLORES_RUTA(i) 
-        
-        # obtener coordenadas de la secuencia de la ruta
-        ruta_lat = [latitudes[id] for id in ruta]
-        ruta_lon = [longitudes[id] for id in ruta]
-        
-        # dibujar la línea de la ruta
-        plt.plot(ruta_lon, ruta_lat, color=color, linewidth=2.0, alpha=0.8, 
-                 zorder=2)
-        
-        # marcar el nodo CD en el centro de la ruta con un punto más grande
-        plt.scatter(longitudes[ruta[0]], latitudes[ruta[0]], color=color, marker='o', s=100, zorder=3)
-        
-    # configuración final del gráfico
-    plt.title(titulo, fontsize=14)
-    plt.xlabel("Longitud", fontsize=10)
-    plt.ylabel("Latitud", fontsize=10)
-    plt.grid(True, alpha=0.2)
-    plt.tight_layout()
-    plt.show()
\ No newline at end of file
+        distancia = float(solucion_final.distancias_ruta[r])
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': coordenadas[ruta][:, ::-1].tolist()},
+            'properties': {
+                'ruta': r,
+                'id_cd': int(ruta[0]),
+                'cd': str(nombres_nodos[ruta[0]]),
+                'num_tiendas': len(ruta) - 2,
+                'distancia_km': distancia,
+                'costo_combustible': distancia * factor,
+            },
+        })
+
+    for cd in datos['indices_cds']:
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': coordenadas[cd][::-1].tolist()},
+            'properties': {'id_cd': int(cd), 'cd': str(nombres_nodos[cd]), 'tipo': 'CD'},
+        })
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+def exportar_geojson(solucion_final, datos, archivo):
+    """Guarda las rutas en 'archivo' en formato GeoJSON."""
+    with open(archivo, 'w', encoding='utf-8') as f:
+        json.dump(rutas_a_geojson(solucion_final, datos), f, ensure_ascii=False)
+    return archivo
@@ -1,16 +1,13 @@
+from functools import partial
 import numpy as np
-import pandas as pd
-from scipy.spatial.distance import pdist # necesario para calcular distancias entre sensores
 
 # importamos el modelo de campo
-from modelo_campo import cargar_y_preprocesar_datos, TAMANO_CAMPO, NUM_SENSORES
+from modelo_campo import ModeloCampo, NUM_SENSORES
+
+# modelo del CSV por defecto: se carga la primera vez que se pide (no al importar)
+_MODELO_POR_DEFECTO = None
+_MODELO_CARGADO = False
 
-# cargar datos una sola vez
-DATOS_CAMPO, ARBOL_KDTREE, MAPA_CULTIVOS = cargar_y_preprocesar_datos()
-if DATOS_CAMPO is None:
-    # aseguramos que las constantes existan para evitar errores de importación en otros módulos
-    DATOS_CAMPO = pd.DataFrame()
-    
 MIN_SENSORES_CULTIVO = 2 # mínimo de sensores requerido por cultivo (ajustable)
 
 # pesos (W) para la función objetivo
@@ -18,59 +15,77 @@ PESO_CULTIVO = 1000  # máxima prioridad
 PESO_RIESGO = 100    # alta prioridad
 PESO_COBERTURA = 10  # baja prioridad
 
-def calcular_aptitud(posiciones_enjambre):
+def modelo_por_defecto():
+    """ModeloCampo de 'datos cultivos.csv' (o None si no existe), cargado una sola vez."""
+    global _MODELO_POR_DEFECTO, _MODELO_CARGADO
+    if not _MODELO_CARGADO:
+        _MODELO_POR_DEFECTO = ModeloCampo.desde_csv()
+        _MODELO_CARGADO = True
+    return _MODELO_POR_DEFECTO
+
+def crear_funcion_aptitud(modelo):
+    """función de aptitud ligada a 'modelo' (se puede enviar a procesos trabajadores)."""
+    return partial(calcular_aptitud, modelo=modelo)
+
+def calcular_aptitud(posiciones_enjambre, modelo=None):
     """
     función de aptitud (fitness) que PSO intentará minimizar.
-    evalúa las coordenadas normalizadas (X, Y) de los sensores.
+    evalúa las coordenadas normalizadas (X, Y) de los sensores sobre 'modelo'
+    (un ModeloCampo; por defecto el del CSV del proyecto).
+    todo el enjambre se evalúa a la vez: una sola consulta al KDtree con los
+    (partículas * sensores) puntos (o una lectura del ráster del modelo, si lo tiene)
+    y operaciones de NumPy sobre arreglos (P, S).
     """
-    if DATOS_CAMPO.empty:
+    if modelo is None:
+        modelo = modelo_por_defecto()
+    if modelo is None or modelo.num_puntos == 0:
         return np.inf * np.ones(posiciones_enjambre.shape[0])
 
     num_particulas = posiciones_enjambre.shape[0]
-    aptitud = np.zeros(num_particulas)
     
     # IDs de cultivo a buscar (1, 2, 3)
-    IDS_CULTIVOS = list(MAPA_CULTIVOS.values())
+    IDS_CULTIVOS = modelo.ids_cultivos
     
-    for i in range(num_particulas):
-        particula_actual = posiciones_enjambre[i, :]
-        # redimensionar el vector plano a pares de coordenadas (x_norm, y_norm)
-        coordenadas_sensores = particula_actual.reshape(NUM_SENSORES, 2)
-        
-        # 1- asegurar coordenadas válidas (dentro del rango 0-100)
-        coordenadas_sensores = np.clip(coordenadas_sensores, 0, TAMANO_CAMPO).astype(float)
-        
-        # búsqueda georreferenciada inversa (usando KDtree)
-        # encontramos el punto de dato real más cercano para cada ubicación de sensor
-        # k=1 para buscar el vecino más cercano.
-        distancias, indices = ARBOL_KDTREE.query(coordenadas_sensores, k=1)
-        
-        # obtenemos los atributos de los puntos de datos más cercanos
-        ids_cultivos_cercanos = DATOS_CAMPO['ID_Cultivo'].iloc[indices].values
-        riesgo_cercano = DATOS_CAMPO['Indice_Riesgo'].iloc[indices].values
+    # redimensionar cada vector plano a pares de coordenadas (x_norm, y_norm): (P, S, 2)
+    # y asegurar coordenadas válidas (dentro del rango 0-100)
+    coordenadas_sensores = np.clip(posiciones_enjambre.reshape(num_particulas, NUM_SENSORES, 2),
+                                   0, modelo.tamano_campo).astype(float)
+    
+    # búsqueda georreferenciada inversa (KDtree o ráster de vecino más cercano)
+    # el punto de dato real más cercano a cada sensor de todo el enjambre, en una sola consulta
+    indices = modelo.indices_cercanos(coordenadas_sensores.reshape(-1, 2)).reshape(num_particulas, NUM_SENSORES)
+    
+    # obtenemos los atributos de los puntos de datos más cercanos (indexado de arreglos)
+    ids_cultivos_cercanos = modelo.ids_cultivo[indices]
+    riesgo_cercano = modelo.riesgo[indices]
+    
+    # P1: penalización por cobertura (amontonamiento)
+    # minimizar: 1 / (distancia mínima entre sensores), con las distancias de cada
+    # partícula en un tensor (P, S, S) sin la diagonal
+    if NUM_SENSORES > 1:
+        diferencias = coordenadas_sensores[:, :, np.newaxis, :] - coordenadas_sensores[:, np.newaxis, :, :]
+        distancias_pares = np.sqrt(np.sum(diferencias ** 2, axis=-1))
+        diagonal = np.arange(NUM_SENSORES)
+        distancias_pares[:, diagonal, diagonal] = np.inf
+        dist_minima = distancias_pares.min(axis=(1, 2))
+    else:
+        dist_minima = np.full(num_particulas, 0.001)
         
-        # P1: penalización por cobertura (amontonamiento)
-        # minimizar: 1 / (distancia mínima entre sensores)
-        if coordenadas_sensores.shape[0] > 1:
-            distancias_pares = pdist(coordenadas_sensores)
-            dist_minima = np.min(distancias_pares) if distancias_pares.size > 0 else 0.001
-        else:
-            dist_minima = 0.001
-            
-        P_cobertura = 1 / (dist_minima + 1e-6)
+    P_cobertura = 1 / (dist_minima + 1e-6)
 
-        # P2: penalización por zonas de riesgo
-        # minimizar: 1 - promedio de riesgo cubierto (alto promedio de riesgo cubierto = bajo costo)
-        P_riesgo = 1 - np.mean(riesgo_cercano)
+    # P2: penalización por zonas de riesgo
+    # minimizar: 1 - promedio de riesgo cubierto (alto promedio de riesgo cubierto = bajo costo)
+    P_riesgo = 1 - riesgo_cercano.mean(axis=1)
 
-        # P3: penalización por cultivo (requisito mínimo)
-        P_cultivo = 0
-        for id_c in IDS_CULTIVOS:
-            conteo = np.sum(ids_cultivos_cercanos == id_c)
-            # penaliza con un valor alto si no se cumple el mínimo
-            P_cultivo += max(0, MIN_SENSORES_CULTIVO - conteo) * 100 
+    # P3: penalización por cultivo (requisito mínimo)
+    # conteo de sensores por (partícula, cultivo) con un solo bincount
+    num_ids = max(IDS_CULTIVOS + [int(modelo.ids_cultivo.max())]) + 1
+    desplazados = np.arange(num_particulas)[:, np.newaxis] * num_ids + ids_cultivos_cercanos
+    conteos = np.bincount(desplazados.ravel(), minlength=num_particulas * num_ids).reshape(num_particulas, num_ids)
+    # penaliza con un valor alto si no se cumple el mínimo
+    P_cultivo = np.sum(np.maximum(0, MIN_SENSORES_CULTIVO - conteos[:, IDS_CULTIVOS]) * 100, axis=1)
 
-        # función objetivo final
-        aptitud[i] = (PESO_CULTIVO * P_cultivo) + (PESO_RIESGO * P_riesgo) + (PESO_COBERTURA * P_cobertura)
+    # función objetivo final
+    aptitud = (PESO_CULTIVO * P_cultivo) + (PESO_RIESGO * P_riesgo) + (PESO_COBERTURA * P_cobertura)
         
-    return aptitud
\ No newline at end of file
+    return aptitud
@@ -4,29 +4,20 @@ import pandas as pd
 
 # importar las funciones de los módulos
 from optimizador_pso import ejecutar_optimizacion_pso
-from modelo_campo import cargar_y_preprocesar_datos, NUM_SENSORES, TAMANO_CAMPO
+from modelo_campo import ModeloCampo, NUM_SENSORES
 
-def transformar_a_geografico(df_datos, posicion_optima):
+def transformar_a_geografico(modelo, posicion_optima):
     """
     transforma las coordenadas normalizadas (0-100) de vuelta a Latitud y Longitud (WGS 84).
     """
-    if df_datos is None:
+    if modelo is None:
         return None
-        
-    # obtener los límites originales del campo
-    lat_min, lat_max = df_datos['Latitud'].min(), df_datos['Latitud'].max()
-    lon_min, lon_max = df_datos['Longitud'].min(), df_datos['Longitud'].max()
     
     # el resultado 'posicion_optima' es un vector plano [x1, y1, x2, y2, ...]
     coordenadas_norm = posicion_optima.reshape(NUM_SENSORES, 2)
     
-    # 1- revertir la normalización de X (Longitud)
-    longitudes_optimas = (coordenadas_norm[:, 0] / TAMANO_CAMPO) * \
-                         (lon_max - lon_min) + lon_min
-                         
-    # 2- revertir la normalización de Y (Latitud)
-    latitudes_optimas = (coordenadas_norm[:, 1] / TAMANO_CAMPO) * \
-                        (lat_max - lat_min) + lat_min
+    # revertir la normalización con los límites originales del campo
+    latitudes_optimas, longitudes_optimas = modelo.a_geografico(coordenadas_norm)
                         
     return pd.DataFrame({
         'Latitud_Optima': latitudes_optimas, 
@@ -78,19 +69,21 @@ def main():
     """Función principal de ejecución del proyecto."""
     print("Proyecto: Optimización de Riego con PSO (Guasave)")
     
-    # 1- cargar y normalizar datos reales
-    df_datos, arbol_kdtree, mapa_cultivos = cargar_y_preprocesar_datos()
-    if df_datos is None:
+    # 1- cargar y normalizar datos reales (una sola vez)
+    modelo = ModeloCampo.desde_csv()
+    if modelo is None:
         return 
+    df_datos = modelo.datos
         
     # 2- ejecutar la optimización 
-    costo_optimo, posicion_optima, historial_costo = ejecutar_optimizacion_pso(num_particulas=80, iteraciones=200)
+    costo_optimo, posicion_optima, historial_costo = ejecutar_optimizacion_pso(num_particulas=80, iteraciones=200,
+                                                                               modelo=modelo)
     
     print(f"\nresultados finales de la optimización")
     print(f"mejor costo (fitness): {costo_optimo:.4f}")
     
     # 3- transformación inversa para visualización
-    coordenadas_optimas_geo = transformar_a_geografico(df_datos, posicion_optima)
+    coordenadas_optimas_geo = transformar_a_geografico(modelo, posicion_optima)
     
     # 4- visualizar
     if coordenadas_optimas_geo is not None:
@@ -3,49 +3,149 @@ import numpy as np
 from scipy.spatial import KDTree # usado para la búsqueda eficiente del vecino más cercano
 
 # constantes del espacio de búsqueda normalizado para PSO
-TAMANO_CAMPO = 100 
+TAMANO_CAMPO = 100
 NUM_SENSORES = 10
 
+# mapeo numérico para los cultivos
+MAPA_CULTIVOS = {'Maiz': 1, 'Tomate': 2, 'Chile': 3}
+
+# celdas por lado del ráster de vecino más cercano (None: siempre se consulta el KDtree)
+RESOLUCION_RASTER = None
+
+class ModeloCampo:
+    """
+    modelo de un campo ya preprocesado, que se construye una sola vez: los atributos de
+    los puntos de muestreo como arreglos contiguos de NumPy (coordenadas normalizadas,
+    índice de riesgo e ID de cultivo), el KDtree sobre las coordenadas y los límites de
+    la normalización. es independiente de variables globales: se puede enviar a procesos
+    trabajadores y tener varios campos a la vez.
+    con 'resolucion_raster' se precalcula además un ráster (Voronoi discretizado) con el
+    índice del punto más cercano al centro de cada celda; la búsqueda de atributos de un
+    sensor pasa a ser una lectura indexada en lugar de una consulta al KDtree.
+    """
+
+    def __init__(self, df, tamano_campo=TAMANO_CAMPO, mapa_cultivos=MAPA_CULTIVOS,
+                 resolucion_raster=RESOLUCION_RASTER):
+        df = df.copy()
+        self.tamano_campo = tamano_campo
+        self.mapa_cultivos = dict(mapa_cultivos)
+
+        # normalización del riesgo
+
+        # normalizar salinidad (0 a 1)
+        salinidad_norm = (df['Salinidad (dS/m)'] - df['Salinidad (dS/m)'].min()) / \
+                         (df['Salinidad (dS/m)'].max() - df['Salinidad (dS/m)'].min())
+
+        # normalizar elevación (0 a 1) - se invierte: baja elevación es ALTO riesgo de drenaje
+        elevacion_norm = 1 - (df['Elevacion (m)'] - df['Elevacion (m)'].min()) / \
+                             (df['Elevacion (m)'].max() - df['Elevacion (m)'].min())
+
+        # índice de riesgo combinado (60% salinidad + 40% baja elevación)
+        df['Indice_Riesgo'] = 0.6 * salinidad_norm + 0.4 * elevacion_norm
+
+        # proyección y escalamiento WGS 84 (límites guardados para la transformación inversa)
+        self.lat_min, self.lat_max = df['Latitud'].min(), df['Latitud'].max()
+        self.lon_min, self.lon_max = df['Longitud'].min(), df['Longitud'].max()
+
+        # coordenadas normalizadas (X_norm, Y_norm) para el espacio de búsqueda PSO
+        df['X_norm'] = (df['Longitud'] - self.lon_min) / (self.lon_max - self.lon_min) * tamano_campo
+        df['Y_norm'] = (df['Latitud'] - self.lat_min) / (self.lat_max - self.lat_min) * tamano_campo
+
+        df['ID_Cultivo'] = df['Cultivo'].map(self.mapa_cultivos)
+        self.datos = df # tabla completa, para reportes y gráficas
+
+        # arreglos del camino crítico (los cultivos fuera del mapa quedan con ID 0,
+        # que no cuenta para ningún cultivo)
+        self.coordenadas = np.ascontiguousarray(df[['X_norm', 'Y_norm']].to_numpy(dtype=np.float64))
+        self.riesgo = np.ascontiguousarray(df['Indice_Riesgo'].to_numpy(dtype=np.float64))
+        self.ids_cultivo = np.ascontiguousarray(df['ID_Cultivo'].fillna(0).to_numpy(dtype=np.int64))
+        self.ids_cultivos = list(self.mapa_cultivos.values())
+
+        # árbol de búsqueda para las coordenadas normalizadas
+        self.arbol = KDTree(self.coordenadas)
+
+        self.raster = None
+        self.resolucion_raster = None
+        if resolucion_raster:
+            self.construir_raster(resolucion_raster)
+
+    @classmethod
+    def desde_csv(cls, ruta_csv="datos cultivos.csv", **opciones):
+        """carga el CSV del campo; devuelve None si el archivo no existe."""
+        try:
+            df = pd.read_csv(ruta_csv)
+        except FileNotFoundError:
+            print(f"ERROR: archivo CSV no encontrado en la ruta: {ruta_csv}")
+            return None
+        modelo = cls(df, **opciones)
+        print(f"datos reales de Guasave cargados y normalizados a un espacio "
+              f"{modelo.tamano_campo}x{modelo.tamano_campo}.")
+        return modelo
+
+    @property
+    def num_puntos(self):
+        return len(self.coordenadas)
+
+    def construir_raster(self, resolucion):
+        """
+        ráster resolucion x resolucion sobre el campo: cada celda guarda el índice del
+        punto de muestreo más cercano a su centro (una consulta al KDtree por celda).
+        """
+        centros = (np.arange(resolucion) + 0.5) * (self.tamano_campo / resolucion)
+        x, y = np.meshgrid(centros, centros, indexing='ij')
+        _, indices = self.arbol.query(np.column_stack((x.ravel(), y.ravel())), k=1)
+        # raster[i, j]: celda i en X y j en Y
+        self.raster = np.ascontiguousarray(indices.reshape(resolucion, resolucion), dtype=np.int32)
+        self.resolucion_raster = resolucion
+        return self.raster
+
+    def indices_cercanos(self, coordenadas_norm, exacto=False):
+        """
+        índice del punto de muestreo más cercano a cada (x_norm, y_norm) de un arreglo (N, 2):
+        lectura del ráster si está construido (y no se pide 'exacto'), si no el KDtree.
+        """
+        coordenadas_norm = np.asarray(coordenadas_norm, dtype=np.float64)
+        if self.raster is None or exacto:
+            _, indices = self.arbol.query(coordenadas_norm, k=1)
+            return indices
+        celdas = (coordenadas_norm * (self.resolucion_raster / self.tamano_campo)).astype(np.int64)
+        np.clip(celdas, 0, self.resolucion_raster - 1, out=celdas)
+        return self.raster[celdas[:, 0], celdas[:, 1]]
+
+    def precision_raster(self, num_muestras=100000, semilla=0):
+        """
+        compara el ráster con la búsqueda exacta del KDtree en posiciones uniformes del
+        campo: fracción de coincidencias del punto y del cultivo, y error del riesgo.
+        """
+        if self.raster is None:
+            raise ValueError("El ráster no está construido (ver construir_raster).")
+        rng = np.random.default_rng(semilla)
+        posiciones = rng.uniform(0, self.tamano_campo, size=(num_muestras, 2))
+        exactos = self.indices_cercanos(posiciones, exacto=True)
+        aproximados = self.indices_cercanos(posiciones)
+        error_riesgo = np.abs(self.riesgo[aproximados] - self.riesgo[exactos])
+        return {
+            'resolucion': self.resolucion_raster,
+            'coincidencia_punto': float(np.mean(aproximados == exactos)),
+            'coincidencia_cultivo': float(np.mean(self.ids_cultivo[aproximados] == self.ids_cultivo[exactos])),
+            'error_riesgo_medio': float(error_riesgo.mean()),
+            'error_riesgo_max': float(error_riesgo.max()),
+        }
+
+    def a_geografico(self, coordenadas_norm):
+        """revierte la normalización: (N, 2) de (x_norm, y_norm) a latitudes y longitudes."""
+        coordenadas_norm = np.asarray(coordenadas_norm, dtype=np.float64)
+        longitudes = coordenadas_norm[:, 0] / self.tamano_campo * (self.lon_max - self.lon_min) + self.lon_min
+        latitudes = coordenadas_norm[:, 1] / self.tamano_campo * (self.lat_max - self.lat_min) + self.lat_min
+        return latitudes, longitudes
+
 def cargar_y_preprocesar_datos(ruta_csv="datos cultivos.csv"):
     """
-    carga los datos geoespaciales, calcula el índice de riesgo combinado 
+    carga los datos geoespaciales, calcula el índice de riesgo combinado
     y normaliza las coordenadas para el espacio de búsqueda del PSO (0-100).
+    (compatibilidad: devuelve la tabla, el KDtree y el mapa de cultivos de un ModeloCampo)
     """
-    try:
-        df = pd.read_csv(ruta_csv)
-    except FileNotFoundError:
-        print(f"ERROR: archivo CSV no encontrado en la ruta: {ruta_csv}")
+    modelo = ModeloCampo.desde_csv(ruta_csv)
+    if modelo is None:
         return None, None, None
-
-    # normalización del riesgo
-    
-    # normalizar salinidad (0 a 1)
-    salinidad_norm = (df['Salinidad (dS/m)'] - df['Salinidad (dS/m)'].min()) / \
-                     (df['Salinidad (dS/m)'].max() - df['Salinidad (dS/m)'].min())
-                     
-    # normalizar elevación (0 a 1) - se invierte: baja elevación es ALTO riesgo de drenaje
-    elevacion_norm = 1 - (df['Elevacion (m)'] - df['Elevacion (m)'].min()) / \
-                         (df['Elevacion (m)'].max() - df['Elevacion (m)'].min())
-
-    # índice de riesgo combinado (60% salinidad + 40% baja elevación)
-    df['Indice_Riesgo'] = 0.6 * salinidad_norm + 0.4 * elevacion_norm
-    
-    # proyección y escalamiento WGS 84
-    lat_min, lat_max = df['Latitud'].min(), df['Latitud'].max()
-    lon_min, lon_max = df['Longitud'].min(), df['Longitud'].max()
-    
-    # coordenadas normalizadas (X_norm, Y_norm) para el espacio de búsqueda PSO
-    df['X_norm'] = (df['Longitud'] - lon_min) / (lon_max - lon_min) * TAMANO_CAMPO
-    df['Y_norm'] = (df['Latitud'] - lat_min) / (lat_max - lat_min) * TAMANO_CAMPO
-    
-    # mapeo numérico para los cultivos
-    mapa_cultivos = {'Maiz': 1, 'Tomate': 2, 'Chile': 3}
-    df['ID_Cultivo'] = df['Cultivo'].map(mapa_cultivos)
-    
-    print(f"datos reales de Guasave cargados y normalizados a un espacio {TAMANO_CAMPO}x{TAMANO_CAMPO}.")
-    
-    # árbol de búsqueda para las coordenadas normalizadas
-    coordenadas_kdtree = df[['X_norm', 'Y_norm']].values
-    arbol_kdtree = KDTree(coordenadas_kdtree)
-    
-    return df, arbol_kdtree, mapa_cultivos
\ No newline at end of file
+    return modelo.datos, modelo.arbol, modelo.mapa_cultivos
@@ -2,18 +2,21 @@ import numpy as np
 import pyswarms as ps
 
 # importamos la función de aptitud y las constantes del espacio
-from funcion_aptitud import calcular_aptitud
+from funcion_aptitud import calcular_aptitud, crear_funcion_aptitud
 from modelo_campo import TAMANO_CAMPO, NUM_SENSORES 
 
-def ejecutar_optimizacion_pso(num_particulas=80, iteraciones=200):
+def ejecutar_optimizacion_pso(num_particulas=80, iteraciones=200, modelo=None):
     """
     configura y ejecuta el algoritmo PSO para encontrar la mejor colocación.
+    'modelo' es el ModeloCampo a evaluar (por defecto el del CSV del proyecto).
     retorna el mejor costo, la mejor posición (coordenadas normalizadas) e historial.
     """
+    tamano_campo = modelo.tamano_campo if modelo is not None else TAMANO_CAMPO
+    funcion_aptitud = crear_funcion_aptitud(modelo) if modelo is not None else calcular_aptitud
     dimensiones = 2 * NUM_SENSORES # dos dimensiones (x, y) por cada sensor
     
     # 1- definir los límites del espacio de búsqueda (0 a TAMANO_CAMPO)
-    limites = (np.zeros(dimensiones), np.ones(dimensiones) * TAMANO_CAMPO)
+    limites = (np.zeros(dimensiones), np.ones(dimensiones) * tamano_campo)
     
     # 2- configurar los hiperparámetros del enjambre
     opciones = {
@@ -32,7 +35,7 @@ def ejecutar_optimizacion_pso(num_particulas=80, iteraciones=200):
 
     # 4- ejecutar la optimización
     print(f"\niniciando optimización PSO con {num_particulas} partículas y {iteraciones} iteraciones...")
-    costo, posicion_optima = optimizador.optimize(calcular_aptitud, iters=iteraciones, verbose=True)
+    costo, posicion_optima = optimizador.optimize(funcion_aptitud, iters=iteraciones, verbose=True)
     
     print("optimización finalizada!")
     